@@ -0,0 +1,239 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from query_engine import SALES_QUANTILES, AggregateEngine, AggregateResult, FilterKey
+from sales_cube import SalesCube
+from sketches import HLL_PRECISION, KLLSketch, hash_values, hll_interval, hll_registers
+from topk import top_k_rows, top_k_series
+
+# Au-delà de ce nombre de lignes, le dashboard démarre en mode approché (mode exact à la demande)
+APPROX_MIN_ROWS = 10_000_000
+# Lignes tirées par cellule Year × Genre × Platform (échantillon stratifié)
+SAMPLE_PER_CELL = 50
+# Meilleures ventes gardées par cellule : le top 10 d'une sélection est exact
+TOP_PER_CELL = 10
+# Ventes mises en attente avant d'alimenter les sketches KLL (mémoire temporaire bornée en streaming)
+KLL_FLUSH_ROWS = 2_000_000
+CELL_COLUMNS = ["Year", "Genre", "Platform"]
+
+
+def use_approximate(n_rows: int) -> bool:
+    """Mode approché par défaut pour les gros datasets"""
+    return n_rows >= APPROX_MIN_ROWS
+
+
+def _first_per_group(groups: np.ndarray, order: np.ndarray, k: int) -> np.ndarray:
+    """Positions (dans order) des k premières lignes de chaque groupe, order étant trié par groupe"""
+    sorted_groups = groups[order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+    return order[rank < k]
+
+
+def cell_registers(column: pd.Series, groups: np.ndarray, n_groups: int) -> np.ndarray:
+    """Registres HyperLogLog par groupe des valeurs non manquantes d'une colonne"""
+    present = column.notna().to_numpy()
+    return hll_registers(hash_values(column[present]), groups[present], n_groups)
+
+
+class CellSketches:
+    """Nombre de lignes, distincts (HyperLogLog) et quantiles des ventes (KLL) par cellule Year × Genre × Platform.
+
+    Les sketches se replient morceau par morceau (fold) puis se figent (finish) : la même
+    structure sert à la table en mémoire (un seul morceau) et au mode streaming. Une requête
+    ne lit que les cellules de la sélection : son coût ne dépend pas du nombre de lignes.
+    """
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+        self.keys: Optional[pd.MultiIndex] = None
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.title_registers = np.zeros((0, 1 << HLL_PRECISION), dtype=np.uint8)
+        # None si le dataset n'a pas de colonne Publisher
+        self.publisher_registers: Optional[np.ndarray] = np.zeros((0, 1 << HLL_PRECISION), dtype=np.uint8)
+        self.quantile_sketches: List[KLLSketch] = []
+        self.cell_year = np.zeros(0, dtype=np.int64)
+        self.cell_genre = self.cell_platform = np.zeros(0, dtype=object)
+        # Ventes en attente : chaque sketch KLL reçoit ses valeurs par lots (une mise à jour par cellule et par lot)
+        self._pending: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._pending_rows = 0
+
+    def _cell_ids(self, chunk: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """(cellule locale de chaque ligne, identifiant global de chaque cellule locale), nouvelles cellules ajoutées"""
+        codes, labels = zip(*(pd.factorize(chunk[col]) for col in CELL_COLUMNS))
+        sizes = [len(label) for label in labels]
+        flat = (codes[0].astype(np.int64) * sizes[1] + codes[1]) * sizes[2] + codes[2]
+        uniques, local = np.unique(flat, return_inverse=True)
+        year, genre, platform = np.unravel_index(uniques, sizes)
+        cells = pd.MultiIndex.from_arrays([np.asarray(labels[0])[year].astype(np.int64),
+                                           np.asarray(labels[1]).astype(str)[genre],
+                                           np.asarray(labels[2]).astype(str)[platform]], names=CELL_COLUMNS)
+        ids = self.keys.get_indexer(cells) if self.keys is not None else np.full(len(cells), -1)
+        new = ids < 0
+        if new.any():
+            first = 0 if self.keys is None else len(self.keys)
+            ids[new] = first + np.arange(new.sum())
+            self.keys = cells[new] if self.keys is None else self.keys.append(cells[new])
+            self._grow(int(new.sum()))
+        return local.reshape(-1), ids
+
+    def _grow(self, n_new: int) -> None:
+        first = len(self.counts)
+        self.counts = np.concatenate([self.counts, np.zeros(n_new, dtype=np.int64)])
+        empty = np.zeros((n_new, self.title_registers.shape[1]), dtype=np.uint8)
+        self.title_registers = np.concatenate([self.title_registers, empty])
+        if self.publisher_registers is not None:
+            self.publisher_registers = np.concatenate([self.publisher_registers, empty])
+        self.quantile_sketches += [KLLSketch(seed=self.seed + c) for c in range(first, first + n_new)]
+
+    def fold(self, chunk: pd.DataFrame) -> np.ndarray:
+        """Replie un morceau de lignes dans les sketches ; renvoie la cellule (globale) de chaque ligne"""
+        if "Publisher" not in chunk.columns:
+            self.publisher_registers = None
+        local, ids = self._cell_ids(chunk)
+        n_local = len(ids)
+        self.counts[ids] += np.bincount(local, minlength=n_local)
+        self.title_registers[ids] = np.maximum(self.title_registers[ids],
+                                               cell_registers(chunk["Name"], local, n_local))
+        if self.publisher_registers is not None:
+            self.publisher_registers[ids] = np.maximum(self.publisher_registers[ids],
+                                                       cell_registers(chunk["Publisher"], local, n_local))
+        groups = ids[local]
+        self._pending.append((groups, chunk["Global_Sales"].to_numpy(dtype=np.float64)))
+        self._pending_rows += len(chunk)
+        if self._pending_rows >= KLL_FLUSH_ROWS:
+            self._flush()
+        return groups
+
+    def _flush(self) -> None:
+        """Verse les ventes en attente dans les sketches KLL, cellule par cellule"""
+        if not self._pending:
+            return
+        groups = np.concatenate([g for g, _ in self._pending])
+        values = np.concatenate([v for _, v in self._pending])
+        order = np.argsort(groups, kind="stable")
+        groups, values = groups[order], values[order]
+        starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+        bounds = np.r_[starts, len(groups)]
+        for i, start in enumerate(starts):
+            self.quantile_sketches[groups[start]].update(values[start:bounds[i + 1]])
+        self._pending, self._pending_rows = [], 0
+
+    def finish(self) -> "CellSketches":
+        """Fin du repli : sketches à jour et axes des cellules prêts pour select()"""
+        self._flush()
+        if self.keys is not None:
+            self.cell_year = self.keys.get_level_values(0).to_numpy(dtype=np.int64)
+            self.cell_genre = self.keys.get_level_values(1).to_numpy(dtype=object)
+            self.cell_platform = self.keys.get_level_values(2).to_numpy(dtype=object)
+        return self
+
+    def select(self, key: FilterKey) -> np.ndarray:
+        """Indices des cellules de la sélection"""
+        (y0, y1), platforms, genres = key
+        mask = ((self.cell_year >= y0) & (self.cell_year <= y1)
+                & np.isin(self.cell_genre, np.array(genres, dtype=object))
+                & np.isin(self.cell_platform, np.array(platforms, dtype=object)))
+        return np.flatnonzero(mask)
+
+    def distinct_titles(self, cells: np.ndarray) -> Dict[str, float]:
+        return hll_interval(self.title_registers[cells].max(axis=0, initial=0))
+
+    def distinct_publishers(self, cells: np.ndarray) -> Optional[Dict[str, float]]:
+        if self.publisher_registers is None:
+            return None
+        return hll_interval(self.publisher_registers[cells].max(axis=0, initial=0))
+
+    def sales_quantiles(self, cells: np.ndarray) -> Dict[str, Dict[str, float]]:
+        # Graine fixe : cellules fusionnées dans un ordre fixe, donc même résultat d'un processus à l'autre
+        merged = KLLSketch(seed=0)
+        for c in cells:
+            merged.merge(self.quantile_sketches[c])
+        return {name: merged.interval(q) for name, q in SALES_QUANTILES.items()}
+
+
+class SketchIndex(CellSketches):
+    """Sketches par cellule de la table en mémoire, plus un échantillon et les meilleures ventes de chaque cellule.
+
+    Par cellule : échantillon aléatoire de SAMPLE_PER_CELL lignes (nuages de points, top
+    éditeurs estimé) et TOP_PER_CELL meilleures ventes (top 10 exact d'une sélection).
+    """
+
+    def __init__(self, df: pd.DataFrame, seed: int = 0):
+        super().__init__(seed)
+        groups = self.fold(df)
+        self.finish()
+
+        # Échantillon stratifié : ordre aléatoire dans chaque cellule, SAMPLE_PER_CELL premières lignes
+        rng = np.random.default_rng(seed)
+        order = np.lexsort((rng.random(len(df)), groups))
+        sample = _first_per_group(groups, order, SAMPLE_PER_CELL)
+        self.sample_positions, self.sample_groups = sample, groups[sample]
+        self.sample_counts = np.bincount(self.sample_groups, minlength=len(self.counts))
+
+        sales = df["Global_Sales"].to_numpy(dtype=np.float64)
+        order = np.lexsort((-sales, groups))
+        top = _first_per_group(groups, order, TOP_PER_CELL)
+        self.top_positions, self.top_groups = top, groups[top]
+
+
+class ApproxAggregateEngine(AggregateEngine):
+    """Moteur d'agrégats en mode approché : lignes, distincts, quantiles et éditeurs lus dans les sketches.
+
+    Sommes, moyennes et IC restent exacts (cube). Les vues ligne à ligne ne passent plus
+    par les bitmaps : nuages de points sur l'échantillon stratifié, top éditeurs estimé
+    en pondérant l'échantillon, distincts (HyperLogLog) et quantiles (KLL) avec leur
+    intervalle de confiance.
+    """
+
+    def __init__(self, df: pd.DataFrame, cube: SalesCube, index=None, sketches: SketchIndex = None, **kwargs):
+        super().__init__(df, cube, index, **kwargs)
+        self.sketches = sketches if sketches is not None else SketchIndex(df)
+
+    def _agg_cells(self, r: AggregateResult) -> np.ndarray:
+        return self.sketches.select(r.key)
+
+    def _sample(self, r: AggregateResult) -> np.ndarray:
+        in_selection = np.isin(self.sketches.sample_groups, r["cells"])
+        return np.sort(self.sketches.sample_positions[in_selection])
+
+    def _agg_rows(self, r: AggregateResult) -> pd.DataFrame:
+        return self.df.iloc[self._sample(r)]
+
+    def _agg_top_games(self, r: AggregateResult) -> pd.DataFrame:
+        positions = self.sketches.top_positions[np.isin(self.sketches.top_groups, r["cells"])]
+        return top_k_rows(self.df, np.sort(positions), "Global_Sales", 10)
+
+    def _agg_top_publishers(self, r: AggregateResult) -> pd.Series:
+        if "Publisher" not in self.df.columns:
+            return pd.Series(dtype="float64")
+        sketches = self.sketches
+        in_selection = np.isin(sketches.sample_groups, r["cells"])
+        positions, groups = sketches.sample_positions[in_selection], sketches.sample_groups[in_selection]
+        # Chaque ligne tirée représente count / sample_count lignes de sa cellule
+        weights = sketches.counts[groups] / sketches.sample_counts[groups]
+        rows = self.df.iloc[positions]
+        estimated = pd.Series(rows["Global_Sales"].to_numpy(dtype=np.float64) * weights, index=rows.index)
+        totals = estimated.groupby(rows["Publisher"].astype(str).to_numpy()).sum()
+        return top_k_series(totals.rename("Global_Sales"), 10)
+
+    def _agg_distinct_titles(self, r: AggregateResult) -> Dict[str, float]:
+        return self.sketches.distinct_titles(r["cells"])
+
+    def _agg_distinct_publishers(self, r: AggregateResult) -> Dict[str, float]:
+        estimate = self.sketches.distinct_publishers(r["cells"])
+        return estimate if estimate is not None else super()._agg_distinct_publishers(r)
+
+    def _agg_sales_quantiles(self, r: AggregateResult) -> Dict[str, Dict[str, float]]:
+        return self.sketches.sales_quantiles(r["cells"])
+
+
+def approximate(engine: AggregateEngine) -> ApproxAggregateEngine:
+    """Version approchée d'un moteur en mémoire (mêmes données, même cube, cache séparé)"""
+    approx = ApproxAggregateEngine(engine.df, engine.cube, engine.index, max_entries=engine.max_entries,
+                                   data_version=engine.data_version + "~approx",
+                                   publisher_topk=engine.publisher_topk)
+    approx.distributions = engine.distributions
+    return approx
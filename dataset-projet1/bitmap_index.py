@@ -0,0 +1,100 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+INDEXED_COLUMNS = ["Platform", "Genre", "Year"]
+
+
+def sparse_positions(bits: np.ndarray, n_rows: int) -> np.ndarray:
+    """Positions des bits à 1 d'un bitmap packé peu rempli : seuls ses mots de 64 bits non nuls sont décompressés"""
+    pad = (-len(bits)) % 8
+    words = np.concatenate([bits, np.zeros(pad, dtype=np.uint8)]) if pad else np.ascontiguousarray(bits)
+    nonzero = np.flatnonzero(words.view(np.uint64))
+    word, bit = np.nonzero(np.unpackbits(words.reshape(-1, 8)[nonzero], axis=1))
+    positions = nonzero[word] * 64 + bit
+    # Les bits de bourrage du dernier octet peuvent être à 1 (bitmap complémenté)
+    return positions[positions < n_rows]
+
+
+class BitmapIndex:
+    """Bitmaps compressés (np.packbits) par valeur de Platform, Genre et Year"""
+
+    def __init__(self, df: pd.DataFrame, columns: Iterable[str] = INDEXED_COLUMNS):
+        self.n_rows = len(df)
+        self.n_bytes = (self.n_rows + 7) // 8
+        self.bitmaps: Dict[str, Dict[object, np.ndarray]] = {}
+        for col in columns:
+            self.bitmaps[col] = self._build(df[col])
+
+    def _build(self, column: pd.Series) -> Dict[object, np.ndarray]:
+        """Un bitmap packé par valeur distincte, en un seul tri des codes"""
+        codes, uniques = pd.factorize(column, sort=True)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        bitmaps = {}
+        for i, value in enumerate(uniques):
+            bits = np.zeros(self.n_rows, dtype=bool)
+            bits[order[bounds[i]:bounds[i + 1]]] = True
+            bitmaps[self._key(value)] = np.packbits(bits)
+        return bitmaps
+
+    @staticmethod
+    def _key(value: object) -> object:
+        """Clé de dictionnaire homogène (int pour les années, str sinon)"""
+        return int(value) if isinstance(value, (int, np.integer)) else str(value)
+
+    def values(self, column: str) -> List[object]:
+        """Valeurs indexées d'une colonne"""
+        return list(self.bitmaps[column])
+
+    def union(self, column: str, values: Iterable[object]) -> np.ndarray:
+        """OU des bitmaps des valeurs sélectionnées d'une dimension"""
+        selected = [self.bitmaps[column][v] for v in map(self._key, values) if v in self.bitmaps[column]]
+        if not selected:
+            return np.zeros(self.n_bytes, dtype=np.uint8)
+        return np.bitwise_or.reduce(selected)
+
+    def resolve(self, year_range: Tuple[int, int], platforms: Iterable[str],
+                genres: Iterable[str]) -> np.ndarray:
+        """Bitmap packé de la sélection : OU dans chaque dimension, ET entre dimensions"""
+        years = [y for y in self.bitmaps["Year"] if year_range[0] <= y <= year_range[1]]
+        bits: Optional[np.ndarray] = None
+        # On commence par la dimension la plus sélective pour limiter le travail
+        for column, values in sorted([("Platform", list(platforms)), ("Genre", list(genres)), ("Year", years)],
+                                     key=lambda item: len(item[1])):
+            if not values:
+                return np.zeros(self.n_bytes, dtype=np.uint8)
+            union = self.union(column, values)
+            bits = union if bits is None else np.bitwise_and(bits, union, out=bits)
+        return bits
+
+    def extended(self, rows: pd.DataFrame) -> "BitmapIndex":
+        """Nouvel index avec rows ajoutées en fin de table : seuls les octets de queue sont recalculés"""
+        new = object.__new__(BitmapIndex)
+        new.n_rows = self.n_rows + len(rows)
+        new.n_bytes = (new.n_rows + 7) // 8
+        new.bitmaps = {}
+        # Le premier octet touché peut déjà contenir des lignes : on le repart de ses bits existants
+        start = self.n_rows // 8
+        head_bits = self.n_rows - start * 8
+        for col, bitmaps in self.bitmaps.items():
+            added = rows[col].map(self._key).to_numpy()
+            new.bitmaps[col] = {}
+            for value in list(bitmaps) + [v for v in pd.unique(added) if v not in bitmaps]:
+                old = bitmaps.get(value)
+                head = old[:start] if old is not None else np.zeros(start, dtype=np.uint8)
+                tail = (np.unpackbits(old[start:], count=head_bits) if old is not None
+                        else np.zeros(head_bits, dtype=np.uint8))
+                tail = np.concatenate([tail, (added == value).astype(np.uint8)])
+                new.bitmaps[col][value] = np.concatenate([head, np.packbits(tail)])
+        return new
+
+    def positions(self, year_range: Tuple[int, int], platforms: Iterable[str],
+                  genres: Iterable[str]) -> np.ndarray:
+        """Positions (iloc) des lignes qui passent les filtres, dans l'ordre du DataFrame"""
+        return self.to_positions(self.resolve(year_range, platforms, genres))
+
+    def to_positions(self, bits: np.ndarray) -> np.ndarray:
+        """Décompresse un bitmap packé en positions de lignes"""
+        return np.flatnonzero(np.unpackbits(bits, count=self.n_rows))
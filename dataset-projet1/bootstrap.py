@@ -0,0 +1,72 @@
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from distributions import sorted_quantiles
+
+N_BOOT = 1000
+CONFIDENCE = 0.95
+# Tirages (réplications × lignes) d'un lot de groupes : borne la mémoire temporaire
+MAX_DRAWS = 20_000_000
+# Au-delà, la moyenne rééchantillonnée suit la loi normale (TCL) : on la tire directement
+BOOTSTRAP_MAX_ROWS = 20_000
+
+
+def bootstrap_means(values: np.ndarray, starts: np.ndarray, counts: np.ndarray, n_boot: int,
+                    rng: np.random.Generator) -> np.ndarray:
+    """Moyennes rééchantillonnées (groupes, n_boot), un tirage 2D d'indices par lot de groupes"""
+    out = np.empty((len(counts), n_boot))
+    large = counts > BOOTSTRAP_MAX_ROWS
+    for g in np.flatnonzero(large):
+        segment = values[starts[g]:starts[g] + counts[g]]
+        out[g] = segment.mean() + segment.std(ddof=1) / np.sqrt(counts[g]) * rng.standard_normal(n_boot)
+
+    small = np.flatnonzero(~large)
+    # Lots de groupes consécutifs dont les tirages tiennent dans MAX_DRAWS
+    batch_id = np.cumsum(counts[small]) * n_boot // MAX_DRAWS
+    for batch in np.unique(batch_id):
+        groups = small[batch_id == batch]
+        c, s = counts[groups], starts[groups]
+        row_count, row_start = np.repeat(c, c), np.repeat(s, c)
+        # Indice tiré uniformément dans le segment de chaque groupe, pour chaque réplication
+        draws = (rng.random((n_boot, len(row_count)), dtype=np.float32) * row_count).astype(np.intp) + row_start
+        bounds = np.r_[0, np.cumsum(c)[:-1]]
+        out[groups] = (np.add.reduceat(values[draws], bounds, axis=1) / c).T
+    return out
+
+
+def bootstrap_medians(values: np.ndarray, starts: np.ndarray, counts: np.ndarray, n_boot: int,
+                      rng: np.random.Generator) -> np.ndarray:
+    """Médianes rééchantillonnées (groupes, n_boot) sans tirer les lignes, valeurs triées par segment.
+
+    Le m-ième plus petit des n indices tirés vaut floor(n · U(m)), où U(m) ~ Beta(m, n - m + 1)
+    est la m-ième statistique d'ordre de n uniformes ; la suivante s'en déduit par
+    U(m+1) = U(m) + (1 - U(m)) · Beta(1, n - m). Coût indépendant de la taille des groupes.
+    """
+    n = counts[:, None].astype(np.float64)
+    m = np.floor((n + 1) / 2)
+    lower = rng.beta(m, n - m + 1, size=(len(counts), n_boot))
+    upper = lower + (1 - lower) * rng.beta(1, np.maximum(n - m, 1), size=(len(counts), n_boot))
+    last = starts[:, None] + counts[:, None] - 1
+    lo = np.minimum(starts[:, None] + np.floor(n * lower).astype(np.intp), last)
+    hi = np.minimum(starts[:, None] + np.floor(n * upper).astype(np.intp), last)
+    odd = (counts % 2 == 1)[:, None]
+    return np.where(odd, values[lo], (values[lo] + values[hi]) / 2)
+
+
+def bootstrap_table(labels: Iterable, values: np.ndarray, starts: np.ndarray, counts: np.ndarray, name: str,
+                    n_boot: int = N_BOOT, confidence: float = CONFIDENCE, seed: int = 0) -> pd.DataFrame:
+    """Moyenne et médiane de chaque groupe avec leur IC bootstrap (percentiles), valeurs triées par segment"""
+    rng = np.random.default_rng(seed)
+    alpha = (1 - confidence) / 2
+    table = pd.DataFrame({"Count": counts}, index=pd.Index(list(labels), name=name))
+    if not len(counts):
+        return table.assign(Mean=[], Mean_Low=[], Mean_High=[], Median=[], Median_Low=[], Median_High=[])
+    table["Mean"] = np.add.reduceat(values, starts) / counts
+    low, high = np.quantile(bootstrap_means(values, starts, counts, n_boot, rng), [alpha, 1 - alpha], axis=1)
+    table["Mean_Low"], table["Mean_High"] = low, high
+    table["Median"] = sorted_quantiles(values, starts, counts, np.array([0.5]))[:, 0]
+    low, high = np.quantile(bootstrap_medians(values, starts, counts, n_boot, rng), [alpha, 1 - alpha], axis=1)
+    table["Median_Low"], table["Median_High"] = low, high
+    return table
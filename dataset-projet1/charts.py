@@ -0,0 +1,107 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Au-delà de ces seuils on change de rendu pour borner la taille de la page et le temps d'affichage
+SVG_MAX_POINTS = 2_000
+WEBGL_MAX_POINTS = 30_000
+DENSITY_BINS = 60
+
+
+def scatter_mode(n_points: int) -> str:
+    """Mode de rendu adapté au nombre de points : svg, webgl ou density"""
+    if n_points <= SVG_MAX_POINTS:
+        return "svg"
+    if n_points <= WEBGL_MAX_POINTS:
+        return "webgl"
+    return "density"
+
+
+def _clip(df: pd.DataFrame, column: str, bounds: Optional[Tuple[float, float]]) -> pd.DataFrame:
+    """Restreint les lignes à une plage de valeurs (zoom)"""
+    if bounds is None:
+        return df
+    values = df[column]
+    return df[(values >= bounds[0]) & (values <= bounds[1])]
+
+
+def density_heatmap(df: pd.DataFrame, x: str, y: str, weight: str, title: str,
+                    labels: Dict[str, str], bins: int = DENSITY_BINS) -> "go.Figure":
+    """Binning 2D côté serveur : nombre de jeux et somme de weight par case"""
+    import plotly.graph_objects as go
+
+    xs = df[x].to_numpy(dtype=np.float64)
+    ys = df[y].to_numpy(dtype=np.float64)
+    counts, x_edges, y_edges = np.histogram2d(xs, ys, bins=bins)
+    sums, _, _ = np.histogram2d(xs, ys, bins=[x_edges, y_edges], weights=df[weight].to_numpy(dtype=np.float64))
+
+    # histogram2d indexe [x, y] alors que Heatmap attend z[ligne y][colonne x]
+    z = np.where(counts > 0, counts, np.nan).T
+    fig = go.Figure(go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=z,
+        customdata=np.round(sums.T, 2),
+        colorscale="Viridis",
+        colorbar=dict(title="Jeux"),
+        hovertemplate=(f"{labels.get(x, x)} : %{{x:.1f}}<br>{labels.get(y, y)} : %{{y:.2f}}"
+                       f"<br>Jeux : %{{z:.0f}}<br>{labels.get(weight, weight)} : %{{customdata:.2f}}<extra></extra>"),
+    ))
+    fig.update_layout(title=title, xaxis_title=labels.get(x, x), yaxis_title=labels.get(y, y))
+    return fig
+
+
+def adaptive_scatter(df: pd.DataFrame, x: str, y: str, color: str, size: str, hover_data: List[str],
+                     title: str, labels: Dict[str, str],
+                     x_range: Optional[Tuple[float, float]] = None,
+                     y_range: Optional[Tuple[float, float]] = None) -> "go.Figure":
+    """Nuage de points px.scatter qui bascule en Scattergl puis en densité 2D selon le volume.
+
+    x_range / y_range restreignent les données (zoom) : une fois la zone assez petite,
+    les points individuels réapparaissent. Le mode de rendu est rappelé dans le titre.
+    """
+    df = _clip(_clip(df, x, x_range), y, y_range)
+    mode = scatter_mode(len(df))
+    if mode == "density":
+        return density_heatmap(df, x, y, size, f"{title} — densité ({len(df):,} jeux)", labels)
+    if mode == "webgl":
+        title = f"{title} — rendu WebGL ({len(df):,} jeux)"
+
+    import plotly.express as px
+
+    kwargs: Dict[str, Any] = {"render_mode": "webgl"} if mode == "webgl" else {}
+    fig = px.scatter(
+        df,
+        x=x,
+        y=y,
+        color=color,
+        size=size,
+        hover_data=hover_data,
+        title=title,
+        labels=labels,
+        **kwargs
+    )
+    return fig
+
+
+def add_forecast_bands(fig: "go.Figure", forecast: pd.DataFrame, column: str) -> "go.Figure":
+    """Prolonge chaque courbe de fig (une trace par modalité de column) par sa prévision et sa bande à 95 %"""
+    import plotly.graph_objects as go
+
+    for trace in list(fig.data):
+        series = forecast[forecast[column] == trace.name]
+        if series.empty:
+            continue
+        color = trace.line.color
+        years = series["Year"].tolist()
+        fig.add_trace(go.Scatter(
+            x=years + years[::-1], y=series["High"].tolist() + series["Low"].tolist()[::-1],
+            fill="toself", fillcolor=color, opacity=0.15, line=dict(width=0),
+            hoverinfo="skip", showlegend=False, legendgroup=trace.name,
+        ))
+        fig.add_trace(go.Scatter(
+            x=years, y=series["Forecast"], mode="lines", line=dict(color=color, dash="dash"),
+            name=f"{trace.name} (prévision)", showlegend=False, legendgroup=trace.name,
+        ))
+    return fig
@@ -0,0 +1,246 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow absent : on retombe sur la lecture CSV classique
+    pa = None
+    feather = None
+
+CSV_PATH = "vgsales.csv"
+SNAPSHOT_SUFFIX = ".feather"
+META_SUFFIX = ".meta.json"
+# À incrémenter dès que le schéma ou le format du snapshot change
+SNAPSHOT_VERSION = 2
+
+# Schéma compact appliqué une fois à l'ingestion
+CATEGORY_COLUMNS = ["Name", "Platform", "Genre", "Publisher", "Developer", "Rating"]
+SALES_COLUMNS = ["NA_Sales", "EU_Sales", "JP_Sales", "Other_Sales", "Global_Sales"]
+SCHEMA_DTYPES = {
+    "Year": "int16",
+    "Critic_Score": "Int8",
+    "Critic_Count": "Int16",
+    "User_Count": "Int32",
+    "User_Score": "float32",
+}
+
+
+def _snapshot_paths(csv_path: str) -> Dict[str, str]:
+    """Chemins du snapshot columnar et de ses métadonnées, à côté du CSV"""
+    base, _ = os.path.splitext(csv_path)
+    return {"snapshot": base + SNAPSHOT_SUFFIX, "meta": base + SNAPSHOT_SUFFIX + META_SUFFIX}
+
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """Empreinte SHA-256 d'un fichier, lue par blocs"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def memory_usage_mb(df: pd.DataFrame) -> float:
+    """Empreinte mémoire réelle d'un DataFrame (chaînes comprises), en Mo"""
+    return float(df.memory_usage(deep=True).sum()) / (1024 * 1024)
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Applique le schéma compact : dimensions catégorielles, ventes float32, scores entiers nullables"""
+    df = df.copy()
+    # User_Score contient "tbd" : nettoyage numérique une fois pour toutes (échelle 0-10)
+    if "User_Score" in df.columns:
+        df["User_Score"] = pd.to_numeric(df["User_Score"], errors="coerce")
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    for col in SALES_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("float32")
+    for col, dtype in SCHEMA_DTYPES.items():
+        if col in df.columns:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def clean_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Nettoyage d'un bloc brut du CSV (le fichier entier ou un morceau lu en streaming)"""
+    # Renommer la colonne pour plus de clarté
+    df.rename(columns={"Year_of_Release": "Year"}, inplace=True)
+    # Supprimer les lignes avec des valeurs manquantes dans les colonnes essentielles
+    df.dropna(subset=["Year", "Genre", "Platform", "Global_Sales"], inplace=True)
+    df["Year"] = df["Year"].astype(int)
+    return df.reset_index(drop=True)
+
+
+def append_rows(df: pd.DataFrame, rows: pd.DataFrame) -> pd.DataFrame:
+    """Ajoute des lignes en fin de dataset en conservant le schéma compact (catégories unifiées et triées)"""
+    rows = apply_schema(rows.reindex(columns=df.columns))
+    columns = {}
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            added = rows[col].dropna().astype(str).unique()
+            categories = df[col].cat.categories.union(pd.Index(added), sort=False).sort_values()
+            dtype = pd.CategoricalDtype(categories)
+            columns[col] = union_categoricals([df[col].astype(dtype), rows[col].astype(str).where(rows[col].notna())
+                                               .astype(dtype)])
+        else:
+            columns[col] = pd.concat([df[col], rows[col]], ignore_index=True)
+    return pd.DataFrame(columns)
+
+
+def parse_csv(csv_path: str = CSV_PATH) -> pd.DataFrame:
+    """Lecture et nettoyage du CSV source (chemin lent de référence)"""
+    return clean_frame(pd.read_csv(csv_path))
+
+
+def ingest_csv(csv_path: str = CSV_PATH) -> Tuple[pd.DataFrame, Dict[str, float]]:
+    """Parse le CSV, applique le schéma compact et mesure le gain mémoire"""
+    raw = parse_csv(csv_path)
+    df = apply_schema(raw)
+    report = {
+        "memory_before_mb": round(memory_usage_mb(raw), 3),
+        "memory_after_mb": round(memory_usage_mb(df), 3),
+    }
+    return df, report
+
+
+def _read_meta(meta_path: str) -> Optional[Dict[str, Any]]:
+    """Métadonnées du snapshot, ou None si absentes/illisibles"""
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta_path: str, meta: Dict[str, Any]) -> None:
+    """Écriture atomique des métadonnées du snapshot"""
+    tmp_path = meta_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+
+def snapshot_is_fresh(csv_path: str = CSV_PATH) -> bool:
+    """Vrai si le snapshot correspond au CSV (mtime, puis hash si le mtime a bougé)"""
+    paths = _snapshot_paths(csv_path)
+    meta = _read_meta(paths["meta"])
+    if meta is None or not os.path.exists(paths["snapshot"]):
+        return False
+    if meta.get("version") != SNAPSHOT_VERSION:
+        return False
+
+    stat = os.stat(csv_path)
+    if meta.get("mtime_ns") == stat.st_mtime_ns and meta.get("size") == stat.st_size:
+        return True
+
+    # Le mtime a changé (copie, checkout git...) : le contenu fait foi
+    if meta.get("sha256") != file_hash(csv_path):
+        return False
+    meta.update({"mtime_ns": stat.st_mtime_ns, "size": stat.st_size})
+    _write_meta(paths["meta"], meta)
+    return True
+
+
+def write_snapshot(df: pd.DataFrame, csv_path: str = CSV_PATH,
+                   report: Optional[Dict[str, float]] = None) -> str:
+    """Écrit le snapshot Feather typé à côté du CSV et retourne son chemin"""
+    paths = _snapshot_paths(csv_path)
+    stat = os.stat(csv_path)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    tmp_path = paths["snapshot"] + ".tmp"
+    # Sans compression pour permettre la lecture en memory map sans copie
+    feather.write_feather(table, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, paths["snapshot"])
+
+    _write_meta(paths["meta"], {
+        "version": SNAPSHOT_VERSION,
+        "source": os.path.basename(csv_path),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": file_hash(csv_path),
+        "rows": len(df),
+        **(report or {}),
+    })
+    return paths["snapshot"]
+
+
+def read_snapshot(csv_path: str = CSV_PATH) -> pd.DataFrame:
+    """Lecture multi-thread et memory-mappée du snapshot Feather.
+
+    split_blocks évite la consolidation : les colonnes numériques sans valeur manquante
+    restent des vues (en lecture seule) sur les buffers Arrow du fichier mappé.
+    """
+    paths = _snapshot_paths(csv_path)
+    table = feather.read_table(paths["snapshot"], memory_map=True, use_threads=True)
+    return table.to_pandas(use_threads=True, split_blocks=True)
+
+
+def memory_report(csv_path: str = CSV_PATH) -> Dict[str, float]:
+    """Rapport mémoire avant/après schéma compact, mesuré lors de la dernière ingestion"""
+    meta = _read_meta(_snapshot_paths(csv_path)["meta"]) or {}
+    return {key: meta[key] for key in ("memory_before_mb", "memory_after_mb") if key in meta}
+
+
+def dataset_version(csv_path: str = CSV_PATH) -> str:
+    """Identifiant court du contenu du CSV, utilisé pour invalider les caches dérivés"""
+    meta = _read_meta(_snapshot_paths(csv_path)["meta"]) or {}
+    stat = os.stat(csv_path)
+    # Hash du snapshot seulement s'il décrit encore ce CSV (le mode streaming ne le réécrit pas)
+    if meta.get("sha256") and meta.get("mtime_ns") == stat.st_mtime_ns and meta.get("size") == stat.st_size:
+        return meta["sha256"][:12]
+    return file_hash(csv_path)[:12]
+
+
+def load_games(csv_path: str = CSV_PATH) -> pd.DataFrame:
+    """Charge le dataset depuis le snapshot s'il est à jour, sinon ingère le CSV"""
+    if feather is None:
+        return ingest_csv(csv_path)[0]
+
+    if snapshot_is_fresh(csv_path):
+        try:
+            return read_snapshot(csv_path)
+        except (OSError, pa.ArrowInvalid):
+            pass  # Snapshot corrompu : on le régénère ci-dessous
+
+    df, report = ingest_csv(csv_path)
+    try:
+        write_snapshot(df, csv_path, report)
+    except OSError:
+        return df  # Répertoire en lecture seule : on sert quand même les données
+    # On relit le snapshot pour servir des buffers mappés plutôt que la copie d'ingestion
+    return read_snapshot(csv_path)
+
+
+def shared_view(frame: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """Vue superficielle d'une table partagée pour une session : aucune donnée copiée, et grâce au
+    Copy-on-Write toute écriture (colonne ajoutée, .loc, inplace=True...) copie au lieu de modifier le partagé"""
+    return None if frame is None else frame.copy(deep=False)
+
+
+def enable_copy_on_write() -> None:
+    """Active le Copy-on-Write de pandas (toujours actif à partir de pandas 3)"""
+    if int(pd.__version__.split(".")[0]) < 3:
+        pd.set_option("mode.copy_on_write", True)
+
+
+class SharedDataset:
+    """Dataset chargé une fois par processus (buffers Arrow memory-mappés), lu par les sessions via shared_view()"""
+
+    def __init__(self, csv_path: str = CSV_PATH):
+        enable_copy_on_write()
+        self.csv_path = csv_path
+        self._frame = load_games(csv_path)
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """Frame partagé, réservé aux structures dérivées construites une fois (cube, index...)"""
+        return self._frame
@@ -0,0 +1,82 @@
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Profil de distribution : centiles 0 à 100 de chaque modalité (boîtes, violons, tableaux de centiles)
+PROFILE_PERCENTILES = np.arange(101)
+DISTRIBUTION_COLUMNS = ["Genre", "Platform", "Publisher"]
+
+
+def sorted_quantiles(values: np.ndarray, starts: np.ndarray, counts: np.ndarray, qs: np.ndarray) -> np.ndarray:
+    """Quantiles (interpolation linéaire, comme np.quantile) de segments déjà triés : tableau (segments, qs)"""
+    position = starts[:, None] + qs[None, :] * (counts[:, None] - 1)
+    low = np.floor(position).astype(np.intp)
+    high = np.minimum(low + 1, (starts + counts - 1)[:, None])
+    frac = position - low
+    return values[low] + frac * (values[high] - values[low])
+
+
+def profile_table(labels: np.ndarray, values: np.ndarray, starts: np.ndarray, counts: np.ndarray, name: str,
+                  percentiles: np.ndarray = PROFILE_PERCENTILES) -> pd.DataFrame:
+    """Effectif et centiles de chaque segment trié"""
+    table = pd.DataFrame(sorted_quantiles(values, starts, counts, percentiles / 100),
+                         index=pd.Index(labels, name=name), columns=[f"P{p}" for p in percentiles])
+    table.insert(0, "Count", counts)
+    return table
+
+
+class SortedGroups:
+    """Valeurs d'une mesure triées par (modalité, valeur), construites une seule fois.
+
+    Une sélection de lignes (masque) garde l'ordre : les segments de chaque modalité
+    restent triés, et les quantiles s'obtiennent par simple indexation, sans re-tri.
+    """
+
+    def __init__(self, column: pd.Series, values: np.ndarray):
+        codes, uniques = pd.factorize(column, sort=True)
+        values = np.asarray(values, dtype=np.float64)
+        order = np.lexsort((values, codes))
+        order = order[(codes[order] >= 0) & ~np.isnan(values[order])]
+        self.name = column.name
+        self.labels = np.array([str(u) for u in uniques], dtype=object)
+        self.order = order
+        self.codes = codes[order]
+        self.values = values[order]
+
+    def segments(self, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(libellés, valeurs, débuts, effectifs) des modalités présentes dans la sélection, valeurs triées par segment"""
+        codes, values = self.codes, self.values
+        if mask is not None:
+            keep = mask[self.order]
+            codes, values = codes[keep], values[keep]
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.zeros(0, dtype=np.intp)
+        counts = np.diff(np.r_[starts, len(codes)])
+        return self.labels[codes[starts]], values, starts, counts
+
+    def profile(self, mask: Optional[np.ndarray] = None, percentiles: np.ndarray = PROFILE_PERCENTILES) -> pd.DataFrame:
+        """Nombre de lignes et centiles de chaque modalité présente dans la sélection"""
+        return profile_table(*self.segments(mask), self.name, percentiles)
+
+
+class DistributionIndex:
+    """Ventes triées par modalité pour chaque dimension, construites au premier besoin puis partagées"""
+
+    def __init__(self, df: pd.DataFrame, columns: Iterable[str] = DISTRIBUTION_COLUMNS,
+                 value_column: str = "Global_Sales"):
+        self.df = df
+        self.columns = [col for col in columns if col in df.columns]
+        self.value_column = value_column
+        self._groups: Dict[str, SortedGroups] = {}
+        self._lock = threading.Lock()
+
+    def groups(self, column: str) -> SortedGroups:
+        if column not in self._groups:
+            with self._lock:
+                if column not in self._groups:
+                    self._groups[column] = SortedGroups(self.df[column], self.df[self.value_column].to_numpy())
+        return self._groups[column]
+
+    def profile(self, column: str, mask: Optional[np.ndarray] = None) -> pd.DataFrame:
+        return self.groups(column).profile(mask)
@@ -0,0 +1,156 @@
+import os
+import shutil
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+
+from materialized import key_digest
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow absent : export Parquet indisponible
+    pa = pq = None
+
+EXPORTS_SUFFIX = ".exports"
+# Lignes écrites par morceau : la mémoire d'un export ne dépend pas de la taille de la sélection
+CHUNK_ROWS = 100_000
+# Versions du dataset dont on garde les exports sur disque (les plus récentes)
+KEEP_VERSIONS = 3
+# JSON écrit en JSON Lines (un objet par ligne) : seul format JSON qui s'écrit par morceaux
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "json": "application/x-ndjson",
+}
+EXPORT_EXTENSIONS = {"csv": "csv", "parquet": "parquet", "json": "jsonl"}
+# Agrégats des graphiques proposés à l'export (petits : écrits en un seul morceau)
+EXPORTED_AGGREGATES = ["genre_sales", "platform_sales", "sales_by_year", "region_sales", "top_games",
+                       "top_publishers", "genre_platform", "genre_year", "platform_year"]
+
+
+def exports_root(csv_path: str) -> str:
+    """Répertoire des exports générés, à côté du CSV"""
+    return os.path.splitext(csv_path)[0] + EXPORTS_SUFFIX
+
+
+def available_formats() -> list:
+    return [fmt for fmt in EXPORT_FORMATS if fmt != "parquet" or pq is not None]
+
+
+def row_chunks(df: pd.DataFrame, positions: np.ndarray, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Lignes de la sélection, lues morceau par morceau depuis les positions de l'index"""
+    if not len(positions):
+        yield df.iloc[:0]  # sélection vide : fichier avec les seules colonnes
+    for start in range(0, len(positions), chunk_rows):
+        yield df.iloc[positions[start:start + chunk_rows]]
+
+
+def aggregate_frame(value: Any, name: str) -> pd.DataFrame:
+    """Agrégat du dashboard (Series, DataFrame, dict de valeurs) sous forme de table exportable"""
+    if isinstance(value, pd.DataFrame):
+        return value.reset_index() if value.index.name is not None else value
+    if isinstance(value, pd.Series):
+        return value.rename(value.name or name).reset_index()
+    if isinstance(value, dict):
+        return pd.DataFrame({"Key": list(value), name: list(value.values())})
+    return pd.DataFrame({name: [value]})
+
+
+def write_export(chunks: Iterable[pd.DataFrame], path: str, fmt: str) -> None:
+    """Écrit les morceaux les uns après les autres dans un fichier CSV, Parquet ou JSON Lines"""
+    if fmt == "parquet":
+        if pq is None:
+            raise ValueError("L'export Parquet nécessite pyarrow")
+        writer = None
+        try:
+            for chunk in chunks:
+                # Catégories en texte : schéma identique d'un morceau à l'autre
+                table = pa.Table.from_pandas(_plain(chunk), preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        return
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format d'export inconnu : {fmt}")
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for i, chunk in enumerate(chunks):
+            if fmt == "csv":
+                chunk.to_csv(f, header=i == 0, index=False)
+            elif len(chunk):
+                f.write(_plain(chunk).to_json(orient="records", lines=True, force_ascii=False))
+                f.write("\n")
+
+
+def _plain(chunk: pd.DataFrame) -> pd.DataFrame:
+    categories = [col for col in chunk.columns if isinstance(chunk[col].dtype, pd.CategoricalDtype)]
+    return chunk.astype({col: "string" for col in categories}) if categories else chunk
+
+
+class ExportCache:
+    """Fichiers d'export générés une fois par (version des données, contenu, état de filtres, format).
+
+    Le fichier est écrit par morceaux dans un fichier temporaire puis renommé : un
+    export interrompu ne laisse rien de lisible, et les exports suivants sont relus du disque.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def path(self, version: str, name: str, key: Hashable, fmt: str) -> str:
+        return os.path.join(self.root, version, f"{name}-{key_digest(key)[:16]}.{fmt}")
+
+    def get(self, version: str, name: str, key: Hashable, fmt: str,
+            chunks: Callable[[], Iterable[pd.DataFrame]]) -> str:
+        """Chemin du fichier d'export, généré au premier appel"""
+        path = self.path(version, name, key, fmt)
+        if os.path.exists(path):
+            return path
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                self._prune(version)
+                tmp_path = path + ".tmp"
+                write_export(chunks(), tmp_path, fmt)
+                os.replace(tmp_path, path)
+        return path
+
+    def open(self, version: str, name: str, key: Hashable, fmt: str,
+             chunks: Callable[[], Iterable[pd.DataFrame]]):
+        """Fichier d'export ouvert en lecture binaire (pour un téléchargement)"""
+        return open(self.get(version, name, key, fmt, chunks), "rb")
+
+    def _prune(self, version: str) -> None:
+        """Supprime les exports des versions les plus anciennes"""
+        versions = sorted((entry for entry in os.scandir(self.root) if entry.is_dir()),
+                          key=lambda entry: entry.stat().st_mtime, reverse=True)
+        for entry in versions[KEEP_VERSIONS:]:
+            if entry.name != version:
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def export_sources(engine, agg) -> Dict[str, Callable[[], Iterable[pd.DataFrame]]]:
+    """Contenus exportables d'un état de filtres : lignes (par morceaux) et agrégats des graphiques"""
+    def rows() -> Iterator[pd.DataFrame]:
+        if engine.index is not None:
+            return row_chunks(engine.df, agg["positions"])
+        # Sans index : toute la sélection relue par lots (partitions Parquet en streaming, curseur du backend),
+        # jamais les lignes de détail plafonnées du moteur
+        if hasattr(engine, "store"):
+            return engine.store.row_batches(*agg.key)
+        if hasattr(engine, "backend"):
+            return engine.backend.row_batches(*agg.key, chunk_rows=CHUNK_ROWS)
+        if not agg["rows_complete"]:
+            raise ValueError("Lignes de détail tronquées : export des lignes indisponible pour ce moteur")
+        return row_chunks(agg["rows"], np.arange(len(agg["rows"])))
+
+    sources = {"rows": rows}
+    for name in EXPORTED_AGGREGATES:
+        sources[name] = (lambda name=name: [aggregate_frame(agg[name], name)])
+    return sources
@@ -0,0 +1,154 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+def plotly_figure(spec: Dict[str, Any]) -> Any:
+    """Figure Plotly enveloppant une spécification déjà valide, sans la revalider (coût négligeable)"""
+    import plotly.graph_objects as go
+
+    return go.Figure(spec, _validate=False)
+
+
+class FigureCache:
+    """Cache des figures déjà rendues : spécifications Plotly et PNG matplotlib, éviction LRU bornée en octets.
+
+    Avec directory, chaque figure est aussi écrite sur disque (les clés contiennent la version
+    des données) : après un redémarrage, les figures sont relues au lieu d'être reconstruites.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, directory: Optional[str] = None,
+                 max_disk_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._entries: "OrderedDict[Hashable, Tuple[str, Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_bytes = 0
+        if directory is not None:
+            try:
+                os.makedirs(directory, exist_ok=True)
+                self.disk_bytes = sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+            except OSError:
+                self.directory = None
+
+    def _disk_path(self, key: Hashable) -> str:
+        return os.path.join(self.directory, hashlib.sha1(repr(key).encode("utf-8")).hexdigest())
+
+    def _disk_get(self, key: Hashable) -> Optional[bytes]:
+        """Figure écrite sur disque par ce processus ou un précédent, ou None"""
+        if self.directory is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                payload = f.read()
+            os.utime(path)  # l'élagage du disque se fait par date de dernier accès
+        except OSError:
+            return None
+        self.disk_hits += 1
+        return payload
+
+    def _disk_put(self, key: Hashable, payload: bytes) -> None:
+        """Écrit une figure sur disque puis élague les plus anciennes au-delà du budget"""
+        if self.directory is None:
+            return
+        path = self._disk_path(key)
+        try:
+            replaced = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(path + ".tmp", "wb") as f:
+                f.write(payload)
+            os.replace(path + ".tmp", path)
+        except OSError:
+            return
+        with self._lock:
+            self.disk_bytes += len(payload) - replaced
+            if self.disk_bytes <= self.max_disk_bytes:
+                return
+            entries = sorted((entry for entry in os.scandir(self.directory) if entry.is_file()),
+                             key=lambda entry: entry.stat().st_mtime)
+            self.disk_bytes = sum(entry.stat().st_size for entry in entries)
+            for entry in entries:
+                if self.disk_bytes <= self.max_disk_bytes * 0.8:
+                    break
+                self.disk_bytes -= entry.stat().st_size
+                os.remove(entry.path)
+
+    def _get(self, key: Hashable):
+        """Entrée mémorisée (et rafraîchie dans l'ordre LRU), ou None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def _put(self, key: Hashable, kind: str, payload: Any, size: int) -> None:
+        """Mémorise une entrée puis évince les plus anciennes au-delà du budget"""
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size_bytes -= old[2]
+            self._entries[key] = (kind, payload, size)
+            self.size_bytes += size
+            while self.size_bytes > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self.size_bytes -= evicted
+
+    def plotly(self, key: Hashable, builder: Callable[[], Any]) -> Dict[str, Any]:
+        """Spécification (dict) d'une figure Plotly mémorisée, ou construite puis mémorisée.
+
+        Le dict n'est jamais revalidé en go.Figure : plotly_figure() l'enveloppe tel quel pour st.plotly_chart.
+        """
+        entry = self._get(("plotly", key))
+        if entry is not None:
+            return entry[1]
+        stored = self._disk_get(("plotly", key))
+        if stored is not None:
+            spec = json.loads(stored)
+            self._put(("plotly", key), "plotly", spec, len(stored))
+            return spec
+        fig = builder()
+        payload = fig.to_json()
+        spec = fig.to_dict()
+        self._put(("plotly", key), "plotly", spec, len(payload))
+        self._disk_put(("plotly", key), payload.encode("utf-8"))
+        return spec
+
+    def png(self, key: Hashable, builder: Callable[[], Any], dpi: int = 200) -> bytes:
+        """PNG d'une figure matplotlib, rastérisée une seule fois par clé"""
+        entry = self._get(("png", key))
+        if entry is not None:
+            return entry[1]
+        stored = self._disk_get(("png", key))
+        if stored is not None:
+            self._put(("png", key), "png", stored, len(stored))
+            return stored
+        import matplotlib.pyplot as plt
+
+        fig = builder()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight")
+        plt.close(fig)
+        payload = buffer.getvalue()
+        self._put(("png", key), "png", payload, len(payload))
+        self._disk_put(("png", key), payload)
+        return payload
+
+    def clear(self) -> None:
+        """Vide le cache (nouvelle version des données)"""
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
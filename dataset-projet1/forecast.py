@@ -0,0 +1,65 @@
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+# Années projetées après la dernière année sélectionnée
+FORECAST_HORIZON = 3
+# Années récentes sur lesquelles la tendance est ajustée (les cycles de vie ne sont pas linéaires)
+FORECAST_WINDOW = 8
+# Minimum d'années pour ajuster une droite et estimer sa dispersion
+MIN_FIT_YEARS = 3
+
+
+def fit_trends(matrix: np.ndarray, years: np.ndarray, window: int = FORECAST_WINDOW,
+               horizon: int = FORECAST_HORIZON, z: float = 1.96) -> Dict[str, np.ndarray]:
+    """Droites des moindres carrés ajustées d'un coup sur toutes les séries (lignes de matrix).
+
+    matrix : (séries, années) dense, zéros compris. Renvoie pente, niveau, années
+    projetées, prévision et bande de prédiction à 95 % (séries, horizon), bornées à 0.
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)[:, -window:]
+    x = np.asarray(years, dtype=np.float64)[-window:]
+    n = len(x)
+    future = np.arange(1, horizon + 1) + (years[-1] if len(years) else 0)
+    if n < MIN_FIT_YEARS:
+        empty = np.zeros((len(matrix), 0))
+        return {"slope": np.zeros(len(matrix)), "level": np.zeros(len(matrix)), "years": future[:0],
+                "forecast": empty, "low": empty, "high": empty}
+    # Formes fermées vectorisées : une seule matrice de centrage pour toutes les séries
+    xc = x - x.mean()
+    sxx = float(xc @ xc)
+    y_mean = matrix.mean(axis=1)
+    slope = (matrix - y_mean[:, None]) @ xc / sxx
+    fitted = y_mean[:, None] + slope[:, None] * xc[None, :]
+    sigma = np.sqrt(((matrix - fitted) ** 2).sum(axis=1) / (n - 2))
+    dx = future - x.mean()
+    forecast = y_mean[:, None] + slope[:, None] * dx[None, :]
+    half = z * sigma[:, None] * np.sqrt(1 + 1 / n + dx[None, :] ** 2 / sxx)
+    return {
+        "slope": slope,
+        "level": np.maximum(fitted[:, -1], 0.0),
+        "years": future,
+        "forecast": np.maximum(forecast, 0.0),
+        "low": np.maximum(forecast - half, 0.0),
+        "high": np.maximum(forecast + half, 0.0),
+    }
+
+
+def forecast_frame(fit: Dict[str, np.ndarray], labels: List[str], name: str) -> pd.DataFrame:
+    """Format long (Year, dimension, Forecast, Low, High) des prévisions"""
+    n_series, horizon = fit["forecast"].shape
+    return pd.DataFrame({
+        "Year": np.tile(fit["years"], n_series),
+        name: np.repeat(np.array(labels, dtype=object), horizon),
+        "Forecast": fit["forecast"].ravel(),
+        "Low": fit["low"].ravel(),
+        "High": fit["high"].ravel(),
+    })
+
+
+def trend_table(fit: Dict[str, np.ndarray], labels: List[str], name: str) -> pd.DataFrame:
+    """Pente annuelle et niveau ajusté de chaque série, par pente décroissante"""
+    table = pd.DataFrame({"Slope": fit["slope"], "Level": fit["level"]},
+                         index=pd.Index(list(labels), name=name))
+    return table.sort_values("Slope", ascending=False, kind="stable")
@@ -0,0 +1,297 @@
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from bitmap_index import BitmapIndex
+from data_store import SALES_COLUMNS, SharedDataset, append_rows, clean_frame, dataset_version
+from materialized import MaterializedViews
+from query_engine import AggregateEngine
+from sales_cube import SalesCube
+
+DELTAS_SUFFIX = ".deltas"
+KEY_COLUMNS = ["Name", "Platform"]
+# Colonnes obligatoires d'un nouveau jeu : sans elles, la ligne est écartée (comptée dans rejected_rows)
+INSERT_COLUMNS = ["Year", "Genre", "Platform", "Global_Sales"]
+# Compaction après ce nombre de deltas, ou dès que les lignes ajoutées dépassent cette part du dataset
+COMPACT_EVERY = 20
+COMPACT_RATIO = 0.10
+# Intervalle minimal entre deux scrutations du CSV (mtime) et du répertoire des deltas
+REFRESH_INTERVAL_S = 5.0
+
+GameKey = Tuple[str, str]
+FileSignature = Tuple[int, int]
+HASH_MODULUS = 2 ** 64
+
+
+def deltas_dir(csv_path: str) -> str:
+    """Répertoire où déposer les fichiers delta (CSV au format de vgsales.csv), à côté du CSV"""
+    return os.path.splitext(csv_path)[0] + DELTAS_SUFFIX
+
+
+def file_signature(path: str) -> Optional[FileSignature]:
+    """(mtime_ns, taille) d'un fichier, ou None s'il est absent"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def rows_digest(rows: pd.DataFrame) -> int:
+    """Somme (modulo 2^64) des empreintes des lignes : indépendante de l'ordre et du découpage en deltas"""
+    if not len(rows):
+        return 0
+    return int(pd.util.hash_pandas_object(rows, index=False).to_numpy().sum(dtype=np.uint64))
+
+
+def read_delta(path: str) -> pd.DataFrame:
+    """Lit un fichier delta : nouvelles lignes complètes, ou Name/Platform + ventes mises à jour"""
+    try:
+        delta = pd.read_csv(path)
+    except pd.errors.EmptyDataError:
+        delta = pd.DataFrame()
+    delta.rename(columns={"Year_of_Release": "Year"}, inplace=True)
+    return delta.reindex(columns=delta.columns.union(KEY_COLUMNS, sort=False)).dropna(subset=KEY_COLUMNS)
+
+
+def valid_inserts(inserts: pd.DataFrame) -> np.ndarray:
+    """Masque des nouveaux jeux complets (année, genre, plateforme et ventes numériques renseignés)"""
+    inserts = inserts.reindex(columns=INSERT_COLUMNS)
+    numeric = inserts[["Year", "Global_Sales"]].apply(pd.to_numeric, errors="coerce")
+    return (inserts[["Genre", "Platform"]].notna().all(axis=1) & numeric.notna().all(axis=1)).to_numpy()
+
+
+class LiveState:
+    """Version publiée du dataset : moteur d'agrégats et tout ce qu'il faut pour lui appliquer des deltas"""
+
+    def __init__(self, engine: AggregateEngine, keys: Dict[GameKey, int], base_version: str,
+                 signature: Optional[FileSignature]):
+        self.engine = engine
+        self.keys = keys
+        self.base_version = base_version
+        self.signature = signature
+        self.generation = 0
+        # Empreinte du contenu courant relativement au CSV (lignes ajoutées ou modifiées moins lignes remplacées) :
+        # même données ⇒ même version, que les deltas aient été compactés ou non
+        self.content_digest = 0
+        self.applied: List[str] = []
+        self.delta_rows = 0
+        # Lignes de delta écartées : clé inconnue sans les colonnes d'un nouveau jeu
+        self.rejected_rows = 0
+
+    @property
+    def data_version(self) -> str:
+        """Version du CSV, suffixée de l'empreinte du contenu modifié par les deltas"""
+        return self.base_version if not self.content_digest else f"{self.base_version}+{self.content_digest:016x}"
+
+
+class LiveDataset:
+    """Dataset et structures dérivées (cube, bitmaps, top éditeurs) tenus à jour sans redémarrage.
+
+    Deltas : chaque delta produit de nouvelles structures à partir des précédentes sans
+    tout recalculer, puis un nouveau moteur est publié d'un seul coup. Les deltas appliqués
+    restent dans le répertoire des deltas (rejoués au chargement) ; la compaction les
+    fusionne en un seul fichier et reconstruit les structures à partir du dataset courant.
+
+    Vues matérialisées : cube et agrégats sont persistés par version des données, pour
+    qu'un redémarrage reparte à chaud.
+
+    Rechargement à chaud : si le mtime ou la taille du CSV changent, un thread d'arrière-plan
+    recharge tout (snapshot, cube, bitmaps, deltas rejoués) puis remplace l'état publié.
+    Les reruns en cours gardent le moteur qu'ils ont déjà en main jusqu'à leur fin.
+    """
+
+    def __init__(self, csv_path: str, max_entries: int = 64):
+        self.csv_path = csv_path
+        self.deltas_dir = deltas_dir(csv_path)
+        self.max_entries = max_entries
+        self.reloads = 0
+        self._last_scan = 0.0
+        self._lock = threading.Lock()
+        self._reloader: Optional[threading.Thread] = None
+        self._state = self._load()
+
+    @property
+    def engine(self) -> AggregateEngine:
+        """Moteur de la version publiée"""
+        return self._state.engine
+
+    @property
+    def data_version(self) -> str:
+        return self._state.data_version
+
+    @property
+    def rejected_rows(self) -> int:
+        """Lignes de delta écartées depuis le dernier chargement (nouveaux jeux incomplets)"""
+        return self._state.rejected_rows
+
+    @property
+    def reloading(self) -> bool:
+        """Vrai pendant un rechargement d'arrière-plan"""
+        return self._reloader is not None and self._reloader.is_alive()
+
+    def _engine(self, state: LiveState, frame: pd.DataFrame, cube: SalesCube, index: BitmapIndex,
+                publisher_topk=None) -> AggregateEngine:
+        return AggregateEngine(frame, cube, index, max_entries=self.max_entries,
+                               data_version=state.data_version, publisher_topk=publisher_topk,
+                               views=MaterializedViews(self.csv_path, state.data_version))
+
+    def _load(self) -> LiveState:
+        """Charge le CSV (via son snapshot), construit les structures et rejoue les deltas"""
+        signature = file_signature(self.csv_path)
+        frame = SharedDataset(self.csv_path).frame
+        keys = dict(zip(zip(frame["Name"].astype(str), frame["Platform"].astype(str)), range(len(frame))))
+        state = LiveState(None, keys, dataset_version(self.csv_path), signature)
+        # Cube relu depuis la vue matérialisée de cette version s'il existe
+        cube = MaterializedViews(self.csv_path, state.data_version).cube(lambda: SalesCube(frame))
+        state.engine = self._engine(state, frame, cube, BitmapIndex(frame))
+        self._apply_pending(state)
+        return state
+
+    def pending(self, state: Optional[LiveState] = None) -> List[str]:
+        """Fichiers delta pas encore appliqués, dans l'ordre de leurs noms"""
+        state = state or self._state
+        if not os.path.isdir(self.deltas_dir):
+            return []
+        return sorted(name for name in os.listdir(self.deltas_dir)
+                      if name.endswith(".csv") and name not in state.applied)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Scrute le CSV et les deltas ; vrai si un nouveau moteur a été publié par cet appel.
+
+        Un seul thread travaille à la fois : les autres reruns continuent avec le moteur
+        courant au lieu d'attendre (pas d'effet de troupeau).
+        """
+        now = time.monotonic()
+        if not force and now - self._last_scan < REFRESH_INTERVAL_S:
+            return False
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            self._last_scan = now
+            if self.reloading:
+                return False
+            if file_signature(self.csv_path) != self._state.signature:
+                # CSV modifié : rechargement complet en arrière-plan, l'ancienne version reste servie
+                self._reloader = threading.Thread(target=self._reload, name="vgsales-reload", daemon=True)
+                self._reloader.start()
+                return False
+            return self._apply_pending(self._state)
+        finally:
+            self._lock.release()
+
+    def _reload(self) -> None:
+        signature = file_signature(self.csv_path)
+        try:
+            state = self._load()
+        except (OSError, ValueError, KeyError):
+            return  # Fichier en cours d'écriture ou illisible : nouvel essai à la prochaine scrutation
+        # Le CSV a encore bougé pendant le chargement : on attend qu'il soit stable
+        if state.signature != signature or file_signature(self.csv_path) != signature:
+            return
+        with self._lock:
+            self._state = state
+            self.reloads += 1
+
+    def _apply_pending(self, state: LiveState) -> bool:
+        names = self.pending(state)
+        for name in names:
+            self._apply(state, read_delta(os.path.join(self.deltas_dir, name)))
+            state.applied.append(name)
+        if names and (len(state.applied) >= COMPACT_EVERY
+                      or state.delta_rows > COMPACT_RATIO * len(state.engine.df)):
+            self._compact(state)
+        return bool(names)
+
+    def apply_delta(self, delta: pd.DataFrame) -> None:
+        """Applique un delta déjà chargé (sans le journaliser dans le répertoire des deltas)"""
+        with self._lock:
+            self._apply(self._state, delta)
+
+    def _apply(self, state: LiveState, delta: pd.DataFrame) -> None:
+        engine = state.engine
+        frame, cube, index, topk = engine.df, engine.cube, engine.index, engine.publisher_topk
+        delta = delta.rename(columns={"Year_of_Release": "Year"})
+        keys = list(zip(delta["Name"].astype(str), delta["Platform"].astype(str)))
+        is_update = np.array([key in state.keys for key in keys], dtype=bool)
+
+        # Validation de tout le delta avant de toucher à l'état : une ligne de clé inconnue sans année,
+        # genre ou ventes (delta de mises à jour seules) est écartée au lieu de faire échouer le delta
+        inserts = delta[~is_update].drop_duplicates(subset=KEY_COLUMNS, keep="last")
+        complete = valid_inserts(inserts)
+        state.rejected_rows += int((~complete).sum())
+        inserts = inserts[complete]
+        if len(inserts):
+            inserts = clean_frame(inserts.assign(Year=pd.to_numeric(inserts["Year"]),
+                                                 Global_Sales=pd.to_numeric(inserts["Global_Sales"])))
+
+        # Mises à jour : seules les colonnes de ventes changent ; le cube retire l'ancienne ligne et ajoute la nouvelle
+        updates = delta[is_update].drop_duplicates(subset=KEY_COLUMNS, keep="last")
+        positions = np.array([state.keys[key] for key in zip(updates["Name"].astype(str),
+                                                               updates["Platform"].astype(str))], dtype=np.intp)
+        if len(positions):
+            old_rows = frame.iloc[positions]
+            columns = {}
+            for col in SALES_COLUMNS:
+                if col not in updates.columns or col not in frame.columns:
+                    continue
+                values = pd.to_numeric(updates[col], errors="coerce").to_numpy()
+                present = ~np.isnan(values)
+                column = frame[col].to_numpy().copy()
+                column[positions[present]] = values[present]
+                columns[col] = column
+            frame = frame.assign(**columns)
+            cube = cube.apply_rows(old_rows, -1).apply_rows(frame.iloc[positions], +1)
+
+        # Nouveaux jeux (déjà validés) : ajoutés en fin de table, bitmaps étendus par la queue
+        start = len(frame)
+        if len(inserts):
+            frame = append_rows(frame, inserts)
+            inserts = frame.iloc[start:]
+            try:
+                cube = cube.apply_rows(inserts, +1)
+            except KeyError:
+                cube = SalesCube(frame)  # nouvelle année, genre ou plateforme : axes du cube à refaire
+            index = index.extended(inserts)
+            for i, key in enumerate(zip(inserts["Name"].astype(str), inserts["Platform"].astype(str))):
+                state.keys[key] = start + i
+
+        if topk is not None:
+            topk = topk.updated(positions, frame["Global_Sales"].to_numpy(dtype=np.float64)[positions],
+                                frame["Publisher"].iloc[start:], frame["Global_Sales"].iloc[start:].to_numpy())
+        state.delta_rows += len(updates) + len(inserts)
+        state.generation += 1
+        if len(positions) or len(inserts):
+            replaced = rows_digest(old_rows) if len(positions) else 0
+            added = rows_digest(frame.iloc[positions]) + rows_digest(inserts)
+            state.content_digest = (state.content_digest + added - replaced) % HASH_MODULUS
+        state.engine = self._engine(state, frame, cube, index, topk)
+
+    def compact(self) -> None:
+        """Fusionne les deltas appliqués et reconstruit les structures (sans dérive flottante)"""
+        with self._lock:
+            self._compact(self._state)
+
+    def _compact(self, state: LiveState) -> None:
+        # Mêmes données, donc même version (content_digest inchangé) : les caches et vues restent valables
+        frame = state.engine.df
+        state.engine = self._engine(state, frame, SalesCube(frame), BitmapIndex(frame))
+        state.delta_rows = 0
+        if len(state.applied) <= 1:
+            return
+        # Un seul fichier remplace les deltas appliqués : pour chaque jeu, dernière valeur connue par colonne
+        paths = [os.path.join(self.deltas_dir, name) for name in state.applied]
+        merged = pd.concat([read_delta(path) for path in paths], ignore_index=True)
+        merged = merged.groupby(KEY_COLUMNS, sort=False, as_index=False).last()
+        name = os.path.splitext(state.applied[-1])[0] + ".compacted.csv"
+        tmp_path = os.path.join(self.deltas_dir, name + ".tmp")
+        merged.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, os.path.join(self.deltas_dir, name))
+        for path in paths:
+            if os.path.basename(path) != name:
+                os.remove(path)
+        state.applied = [name]
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+from typing import Any, Dict, Hashable, Optional
+
+import numpy as np
+
+from sales_cube import SalesCube
+
+VIEWS_SUFFIX = ".views"
+FIGURES_SUFFIX = ".figures"
+# Version du format des vues : à incrémenter dès qu'un agrégat matérialisé change de calcul ou de forme
+# (les vues des versions précédentes sont alors ignorées puis élaguées)
+VIEWS_VERSION = 1
+# Versions du dataset dont on garde les vues sur disque (les plus récentes)
+KEEP_VERSIONS = 3
+# Agrégats ligne à ligne : trop gros et recalculés vite depuis l'index, jamais matérialisés.
+# game_choices contient des positions de lignes, valables pour une seule disposition de la table
+TRANSIENT_AGGREGATES = {"rows", "bits", "positions", "mask", "sales", "game_choices"}
+
+
+def views_root(csv_path: str) -> str:
+    """Répertoire des vues matérialisées, à côté du CSV"""
+    return os.path.splitext(csv_path)[0] + VIEWS_SUFFIX
+
+
+def figures_root(csv_path: str) -> str:
+    """Répertoire des figures rendues persistées (clés déjà versionnées), à côté du CSV"""
+    return os.path.splitext(csv_path)[0] + FIGURES_SUFFIX
+
+
+def key_digest(key: Hashable) -> str:
+    """Nom de fichier stable d'une clé (tuple de chaînes et d'entiers)"""
+    return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+
+
+def _atomic_write(path: str, payload: bytes) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+class MaterializedViews:
+    """Cube et agrégats par état de filtres persistés sur disque, un répertoire par version du dataset.
+
+    Rien n'est lu à la création : le cube est relu (memory map) au premier besoin et les
+    agrégats d'un état de filtres quand cet état est demandé pour la première fois.
+    """
+
+    def __init__(self, csv_path: str, version: str):
+        self.version = version
+        self.root = views_root(csv_path)
+        # Un répertoire par (format des vues, version des données)
+        self.name = f"v{VIEWS_VERSION}-{version}"
+        self.path = os.path.join(self.root, self.name)
+        self._writable = True
+        try:
+            os.makedirs(os.path.join(self.path, "aggregates"), exist_ok=True)
+            os.utime(self.path)
+            self._prune()
+        except OSError:
+            self._writable = False  # Répertoire en lecture seule : vues désactivées, tout est recalculé
+
+    def _prune(self) -> None:
+        """Supprime les vues des versions les plus anciennes"""
+        versions = sorted((entry for entry in os.scandir(self.root) if entry.is_dir()),
+                          key=lambda entry: entry.stat().st_mtime, reverse=True)
+        for entry in versions[KEEP_VERSIONS:]:
+            if entry.name != self.name:
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+    # --- Cube ---
+
+    def load_cube(self) -> Optional[SalesCube]:
+        """Cube matérialisé de cette version, ou None"""
+        try:
+            with open(os.path.join(self.path, "cube.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            cube = np.load(os.path.join(self.path, "cube.npy"), mmap_mode="r")
+            return SalesCube.from_arrays(cube, meta["year_min"], meta["genres"], meta["platforms"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save_cube(self, cube: SalesCube) -> None:
+        if not self._writable:
+            return
+        try:
+            tmp_path = os.path.join(self.path, "cube.tmp.npy")
+            np.save(tmp_path, cube.cube)
+            os.replace(tmp_path, os.path.join(self.path, "cube.npy"))
+            meta = {"year_min": cube.year_min, "genres": cube.genres, "platforms": cube.platforms}
+            _atomic_write(os.path.join(self.path, "cube.json"), json.dumps(meta).encode("utf-8"))
+        except OSError:
+            pass
+
+    def cube(self, build) -> SalesCube:
+        """Cube lu sur disque, ou construit par build() puis matérialisé"""
+        cube = self.load_cube()
+        if cube is None:
+            cube = build()
+            self.save_cube(cube)
+        return cube
+
+    # --- Agrégats par état de filtres ---
+
+    def _aggregates_path(self, key: Hashable) -> str:
+        return os.path.join(self.path, "aggregates", key_digest(key) + ".pkl")
+
+    def load_aggregates(self, key: Hashable) -> Dict[str, Any]:
+        """Agrégats matérialisés d'un état de filtres (dictionnaire vide si absents ou illisibles)"""
+        try:
+            with open(self._aggregates_path(key), "rb") as f:
+                stored_key, values = pickle.load(f)
+        except Exception:
+            # Fichier absent, tronqué, ou écrit par d'autres versions de pandas / numpy
+            # (AttributeError, ImportError...) : simple absence de vue, tout est recalculé
+            return {}
+        return values if stored_key == key else {}
+
+    def save_aggregates(self, key: Hashable, values: Dict[str, Any]) -> None:
+        """Matérialise les agrégats calculés (fusionnés avec ceux déjà sur disque)"""
+        if not self._writable:
+            return
+        values = {name: value for name, value in values.items() if name not in TRANSIENT_AGGREGATES}
+        if not values:
+            return
+        merged = {**self.load_aggregates(key), **values}
+        try:
+            _atomic_write(self._aggregates_path(key), pickle.dumps((key, merged), protocol=pickle.HIGHEST_PROTOCOL))
+        except OSError:
+            pass
@@ -0,0 +1,115 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# En dessous de ce nombre de lignes, le coût du pool de processus dépasse le gain : on reste mono-cœur
+PARALLEL_MIN_ROWS = 5_000_000
+# Taille minimale d'une partition de lignes confiée à un processus
+MIN_PARTITION_ROWS = 500_000
+
+_Block = Tuple[str, Tuple[int, ...], str]
+
+# Pool créé au premier appel parallèle puis réutilisé (le démarrage des processus coûte ~1 s)
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def available_cpus() -> int:
+    """Cœurs utilisables par ce processus (affinité CPU du conteneur, sinon tous les cœurs de la machine)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def worker_count(n_rows: int, workers: Optional[int] = None, min_rows: int = PARALLEL_MIN_ROWS) -> int:
+    """Nombre de processus à utiliser pour n_rows lignes (1 = chemin mono-cœur)"""
+    if n_rows < min_rows:
+        return 1
+    workers = workers or available_cpus()
+    return max(1, min(workers, n_rows // MIN_PARTITION_ROWS))
+
+
+def _executor() -> ProcessPoolExecutor:
+    """Pool de processus partagé, dimensionné une fois pour tous les cœurs disponibles.
+
+    Jamais remplacé ni arrêté : une autre session peut être en train d'y attendre ses résultats.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn : pas de fork d'un processus qui fait tourner des threads (serveur Streamlit)
+            _pool = ProcessPoolExecutor(max_workers=available_cpus(), mp_context=get_context("spawn"))
+        return _pool
+
+
+def _share(array: np.ndarray) -> Tuple[shared_memory.SharedMemory, _Block]:
+    """Copie un tableau dans un segment de mémoire partagée (une seule copie pour tous les processus)"""
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def _partial_sums(codes_block: _Block, weights_block: Optional[_Block], count_rows: List[int],
+                  size: int, start: int, stop: int) -> np.ndarray:
+    """Sommes par groupe d'une partition de lignes [start, stop), lue en mémoire partagée"""
+    shms = [shared_memory.SharedMemory(name=codes_block[0])]
+    try:
+        codes = np.ndarray(codes_block[1], dtype=codes_block[2], buffer=shms[0].buf)[start:stop]
+        weights = None
+        if weights_block is not None:
+            shms.append(shared_memory.SharedMemory(name=weights_block[0]))
+            weights = np.ndarray(weights_block[1], dtype=weights_block[2], buffer=shms[1].buf)[:, start:stop]
+        n_measures = len(count_rows) + (0 if weights is None else len(weights))
+        out = np.empty((n_measures, size))
+        w = 0
+        for m in range(n_measures):
+            if m in count_rows:
+                out[m] = np.bincount(codes, minlength=size)
+            else:
+                out[m] = np.bincount(codes, weights=weights[w], minlength=size)
+                w += 1
+        del codes, weights
+        return out
+    finally:
+        for shm in shms:
+            shm.close()
+
+
+def group_sums(codes: np.ndarray, weights: Sequence[Optional[np.ndarray]], size: int,
+               workers: Optional[int] = None, min_rows: int = PARALLEL_MIN_ROWS) -> np.ndarray:
+    """Sommes par groupe (codes 0..size-1) de plusieurs mesures : tableau (mesures, size).
+
+    Une mesure à None compte les lignes. Au-delà de min_rows, les lignes sont découpées
+    en partitions agrégées en parallèle par un pool de processus qui lisent codes et poids
+    en mémoire partagée ; les sommes partielles (une par partition) sont ensuite additionnées.
+    """
+    codes = np.asarray(codes, dtype=np.intp)
+    n_workers = worker_count(len(codes), workers, min_rows)
+    if n_workers == 1:
+        out = np.zeros((len(weights), size))
+        for m, w in enumerate(weights):
+            out[m] = np.bincount(codes, weights=w, minlength=size)
+        return out
+
+    count_rows = [m for m, w in enumerate(weights) if w is None]
+    weighted = [np.asarray(w, dtype=np.float64) for w in weights if w is not None]
+    bounds = np.linspace(0, len(codes), n_workers + 1).astype(int)
+    shms = []
+    try:
+        codes_shm, codes_block = _share(codes)
+        shms.append(codes_shm)
+        weights_block = None
+        if weighted:
+            weights_shm, weights_block = _share(np.stack(weighted))
+            shms.append(weights_shm)
+        partials = _executor().map(_partial_sums, [codes_block] * n_workers, [weights_block] * n_workers,
+                                   [count_rows] * n_workers, [size] * n_workers, bounds[:-1], bounds[1:])
+        return np.sum(list(partials), axis=0)
+    finally:
+        for shm in shms:
+            shm.close()
+            shm.unlink()
@@ -0,0 +1,153 @@
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import quote, unquote
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow absent : pas de stockage partitionné
+    pa = None
+    pq = None
+
+PARTITIONS_SUFFIX = ".parts"
+# Partitionnement par défaut ; ["Year", "Platform"] découpe aussi par plateforme
+PARTITION_COLUMNS = ["Year"]
+PartitionKey = Tuple[str, ...]
+
+
+def partition_root(csv_path: str) -> str:
+    """Répertoire des partitions, à côté du CSV"""
+    return os.path.splitext(csv_path)[0] + PARTITIONS_SUFFIX
+
+
+def write_partitioned(frame: pd.DataFrame, root: str, by: Sequence[str] = PARTITION_COLUMNS,
+                      tag: str = "0") -> int:
+    """Écrit frame en Parquet, un fichier part-<tag> par partition (répertoires Year=.../Platform=...).
+
+    Appelée une fois par morceau en ingestion streaming : une partition peut donc
+    contenir plusieurs fichiers. Retourne le nombre de fichiers écrits.
+    """
+    written = 0
+    for values, group in frame.groupby(list(by), sort=False, observed=True):
+        values = values if isinstance(values, tuple) else (values,)
+        parts = [f"{col}={quote(str(value), safe='')}" for col, value in zip(by, values)]
+        directory = os.path.join(root, *parts)
+        os.makedirs(directory, exist_ok=True)
+        pq.write_table(pa.Table.from_pandas(group, preserve_index=False),
+                       os.path.join(directory, f"part-{tag}.parquet"))
+        written += 1
+    return written
+
+
+class PartitionedStore:
+    """Lecture des seules partitions qui intersectent les filtres (predicate pushdown), avec cache LRU"""
+
+    def __init__(self, root: str, by: Sequence[str] = PARTITION_COLUMNS, max_bytes: int = 256 * 1024 * 1024):
+        self.root = root
+        self.by = list(by)
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._partitions: Optional[Dict[PartitionKey, str]] = None
+        self._cache: "OrderedDict[PartitionKey, Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def partitions(self) -> Dict[PartitionKey, str]:
+        """Clés de partition (valeurs en chaînes) → répertoire, lues une fois dans l'arborescence"""
+        if self._partitions is None:
+            found: Dict[PartitionKey, str] = {}
+            if os.path.isdir(self.root):
+                for directory, subdirs, files in os.walk(self.root):
+                    if subdirs or not files:
+                        continue
+                    relative = os.path.relpath(directory, self.root).split(os.sep)
+                    key = tuple(unquote(part.split("=", 1)[1]) for part in relative)
+                    if len(key) == len(self.by):
+                        found[key] = directory
+            self._partitions = found
+        return self._partitions
+
+    def prune(self, year_range: Iterable[int], platforms: Optional[Iterable[str]] = None) -> List[PartitionKey]:
+        """Partitions dont l'année (et la plateforme si partitionné par Platform) passe les filtres"""
+        y0, y1 = year_range
+        platforms = None if platforms is None else set(platforms)
+        keep = []
+        for key in sorted(self.partitions()):
+            values = dict(zip(self.by, key))
+            if "Year" in values and not y0 <= int(values["Year"]) <= y1:
+                continue
+            if platforms is not None and "Platform" in values and values["Platform"] not in platforms:
+                continue
+            keep.append(key)
+        return keep
+
+    def _load(self, key: PartitionKey) -> pd.DataFrame:
+        """Partition depuis le cache LRU, ou lue sur disque puis mémorisée (budget en octets)"""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        frame = pd.concat([pq.read_table(path).to_pandas() for path in self._files(key)], ignore_index=True)
+        size = int(frame.memory_usage(deep=True).sum())
+        with self._lock:
+            if size <= self.max_bytes and key not in self._cache:
+                self._cache[key] = (frame, size)
+                self.size_bytes += size
+                while self.size_bytes > self.max_bytes:
+                    _, (_, evicted) = self._cache.popitem(last=False)
+                    self.size_bytes -= evicted
+        return frame
+
+    def _files(self, key: PartitionKey) -> List[str]:
+        """Fichiers Parquet d'une partition (un par morceau écrit)"""
+        directory = self.partitions()[key]
+        return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".parquet"))
+
+    def batches(self, year_range: Iterable[int], platforms: Iterable[str], genres: Iterable[str],
+                cached: bool = True) -> Iterator[pd.DataFrame]:
+        """Lignes de la sélection par lots, en ne lisant que les partitions retenues par prune().
+
+        cached=False lit les partitions fichier par fichier sans les mettre en cache : pour un
+        parcours complet (export), la mémoire reste bornée et le cache des requêtes intact.
+        """
+        y0, y1 = year_range
+        platforms, genres = list(platforms), list(genres)
+        for key in self.prune((y0, y1), platforms):
+            frames = [self._load(key)] if cached else (pq.read_table(path).to_pandas() for path in self._files(key))
+            for frame in frames:
+                mask = ((frame["Year"] >= y0) & (frame["Year"] <= y1)
+                        & frame["Platform"].astype(str).isin(platforms) & frame["Genre"].astype(str).isin(genres))
+                if mask.any():
+                    yield frame[mask]
+
+    def read(self, year_range: Iterable[int], platforms: Iterable[str], genres: Iterable[str],
+             max_rows: Optional[int] = None) -> pd.DataFrame:
+        """Lignes de la sélection (au plus max_rows), lues dans les partitions retenues par prune()"""
+        parts, total = [], 0
+        for part in self.batches(year_range, platforms, genres):
+            if max_rows is not None:
+                part = part.head(max_rows - total)
+            parts.append(part)
+            total += len(part)
+            if max_rows is not None and total >= max_rows:
+                break
+        if not parts:
+            return pd.DataFrame()
+        return pd.concat(parts, ignore_index=True)
+
+    def reset(self) -> None:
+        """Supprime les partitions sur disque et vide le cache (avant une réécriture complète)"""
+        with self._lock:
+            self._cache.clear()
+            self.size_bytes = 0
+            self._partitions = None
+        shutil.rmtree(self.root, ignore_errors=True)
@@ -0,0 +1,41 @@
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional
+
+import numpy as np
+
+
+class PerfReport:
+    """Temps de démarrage à froid et latence des reruns par page (fenêtre glissante)"""
+
+    def __init__(self, window: int = 50):
+        self.window = window
+        self.startup_s: Optional[float] = None
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, page: str, seconds: float) -> None:
+        """Enregistre la durée d'un rerun ; le tout premier du processus compte comme démarrage à froid"""
+        with self._lock:
+            if self.startup_s is None:
+                self.startup_s = seconds
+                return
+            self._samples.setdefault(page, deque(maxlen=self.window)).append(seconds)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Médiane, p95 et nombre de reruns mesurés par page (en millisecondes)"""
+        with self._lock:
+            samples = {page: np.array(values) * 1000 for page, values in self._samples.items()}
+        return {
+            page: {"median_ms": float(np.median(ms)), "p95_ms": float(np.percentile(ms, 95)), "runs": len(ms)}
+            for page, ms in samples.items() if len(ms)
+        }
+
+    def format_summary(self) -> str:
+        """Résumé lisible pour la sidebar"""
+        lines = ["⏱️ **Performances**"]
+        if self.startup_s is not None:
+            lines.append(f"Démarrage à froid : {self.startup_s * 1000:.0f} ms")
+        for page, stats in self.summary().items():
+            lines.append(f"{page} : {stats['median_ms']:.0f} ms (p95 {stats['p95_ms']:.0f} ms, {stats['runs']} reruns)")
+        return "  \n".join(lines)
@@ -0,0 +1,235 @@
+import sqlite3
+import threading
+from typing import Any, Iterable, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data_store import apply_schema
+from query_engine import AggregateEngine, AggregateResult
+from sales_cube import MEASURES, REGION_COLUMNS, SalesCube
+from topk import top_k_indices, top_k_series
+
+try:
+    import duckdb
+except ImportError:  # DuckDB absent : SQLite (bibliothèque standard) avec index
+    duckdb = None
+
+DIMENSIONS = ["Year", "Genre", "Platform"]
+SUM_COLUMNS = ["Global_Sales"] + REGION_COLUMNS
+
+
+class PandasBackend:
+    """Backend de référence : masque booléen puis groupby pandas"""
+
+    name = "pandas"
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+
+    def _mask(self, year_range: Iterable[int], platforms: Iterable[str], genres: Iterable[str]) -> pd.Series:
+        y0, y1 = year_range
+        df = self.df
+        return ((df["Year"] >= y0) & (df["Year"] <= y1)
+                & df["Platform"].astype(str).isin(list(platforms)) & df["Genre"].astype(str).isin(list(genres)))
+
+    def _selection(self, year_range: Iterable[int], platforms: Iterable[str], genres: Iterable[str]) -> pd.DataFrame:
+        return self.df[self._mask(year_range, platforms, genres)]
+
+    def cells(self, year_range, platforms, genres) -> pd.DataFrame:
+        """Mesures du cube (MEASURES) par cellule Year × Genre × Platform non vide"""
+        selection = self._selection(year_range, platforms, genres)
+        sales = selection["Global_Sales"].astype("float64")
+        measures = selection[DIMENSIONS].astype({"Genre": str, "Platform": str}).assign(
+            **{col: selection[col].astype("float64") for col in SUM_COLUMNS},
+            Count=1.0,
+            Global_Sales_Sq=sales * sales,
+        )
+        return measures.groupby(DIMENSIONS, sort=True)[MEASURES].sum().reset_index()
+
+    def top_games(self, year_range, platforms, genres, k: int = 10) -> pd.DataFrame:
+        """k lignes les plus vendues de la sélection (égalités : ordre du fichier)"""
+        selection = self._selection(year_range, platforms, genres)
+        return selection.iloc[top_k_indices(selection["Global_Sales"].to_numpy(dtype=np.float64), k)]
+
+    def top_publishers(self, year_range, platforms, genres, k: int = 10) -> pd.Series:
+        """k éditeurs les plus vendus de la sélection (égalités : ordre alphabétique)"""
+        selection = self._selection(year_range, platforms, genres)
+        selection = selection[selection["Publisher"].notna()]
+        sales = selection["Global_Sales"].astype("float64")
+        return top_k_series(sales.groupby(selection["Publisher"].astype(str).rename("Publisher"), sort=True).sum(), k)
+
+    def rows(self, year_range, platforms, genres) -> pd.DataFrame:
+        """Lignes de la sélection, dans l'ordre du fichier"""
+        return self._selection(year_range, platforms, genres)
+
+    def row_batches(self, year_range, platforms, genres, chunk_rows: int) -> Iterator[pd.DataFrame]:
+        """Lignes de la sélection par lots, lues aux positions du masque (sélection jamais copiée en entier)"""
+        positions = np.flatnonzero(self._mask(year_range, platforms, genres).to_numpy())
+        if not len(positions):
+            yield self.df.iloc[:0]
+        for start in range(0, len(positions), chunk_rows):
+            yield self.df.iloc[positions[start:start + chunk_rows]]
+
+
+class SQLBackend:
+    """Backend SQL embarqué : DuckDB (vectorisé, multi-cœurs) s'il est installé, sinon SQLite indexé.
+
+    Les graphiques s'expriment en requêtes GROUP BY sur une table games chargée une fois ;
+    la colonne _pos (position dans le DataFrame source) départage les égalités comme pandas.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.columns = list(df.columns)
+        # Dimensions en chaînes : les catégorielles pandas ne passent pas telles quelles en SQL
+        table = df.astype({col: object for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)})
+        table = table.assign(_pos=np.arange(len(df)))
+        self._lock = threading.Lock()
+        if duckdb is not None:
+            self.name = "duckdb"
+            self.conn = duckdb.connect()
+            self.conn.register("games_df", table)
+            self.conn.execute("CREATE TABLE games AS SELECT * FROM games_df")
+            self.conn.unregister("games_df")
+        else:
+            self.name = "sqlite"
+            self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+            table.to_sql("games", self.conn, index=False)
+            self.conn.execute("CREATE INDEX idx_games_filters ON games (Year, Platform, Genre)")
+            self.conn.execute("CREATE INDEX idx_games_sales ON games (Global_Sales DESC, _pos)")
+
+    def _query(self, sql: str, params: List[Any]) -> pd.DataFrame:
+        with self._lock:
+            if self.name == "duckdb":
+                return self.conn.execute(sql, params).df()
+            return pd.read_sql_query(sql, self.conn, params=params)
+
+    @staticmethod
+    def _where(year_range, platforms, genres) -> Tuple[str, List[Any]]:
+        """Clause WHERE paramétrée d'un état de filtres"""
+        platforms, genres = list(platforms), list(genres)
+        sql = ("WHERE Year BETWEEN ? AND ?"
+               f" AND Platform IN ({', '.join('?' * len(platforms))})"
+               f" AND Genre IN ({', '.join('?' * len(genres))})")
+        return sql, [int(year_range[0]), int(year_range[1])] + platforms + genres
+
+    def cells(self, year_range, platforms, genres) -> pd.DataFrame:
+        """Mesures du cube (MEASURES) par cellule Year × Genre × Platform non vide"""
+        if not platforms or not genres:
+            return pd.DataFrame(columns=DIMENSIONS + MEASURES)
+        where, params = self._where(year_range, platforms, genres)
+        sums = ", ".join(f"SUM({col}) AS {col}" for col in SUM_COLUMNS)
+        return self._query(
+            f"SELECT Year, Genre, Platform, {sums}, COUNT(*) AS Count,"
+            f" SUM(Global_Sales * Global_Sales) AS Global_Sales_Sq"
+            f" FROM games {where} GROUP BY Year, Genre, Platform ORDER BY Year, Genre, Platform",
+            params)
+
+    def top_games(self, year_range, platforms, genres, k: int = 10) -> pd.DataFrame:
+        """k lignes les plus vendues de la sélection (égalités : ordre du fichier)"""
+        if not platforms or not genres:
+            return pd.DataFrame(columns=self.columns)
+        where, params = self._where(year_range, platforms, genres)
+        rows = self._query(f"SELECT * FROM games {where} ORDER BY Global_Sales DESC, _pos LIMIT {int(k)}", params)
+        return apply_schema(rows.drop(columns="_pos"))
+
+    def top_publishers(self, year_range, platforms, genres, k: int = 10) -> pd.Series:
+        """k éditeurs les plus vendus de la sélection (égalités : ordre alphabétique)"""
+        if not platforms or not genres:
+            return pd.Series(dtype="float64")
+        where, params = self._where(year_range, platforms, genres)
+        sums = self._query(
+            f"SELECT Publisher, SUM(Global_Sales) AS Global_Sales FROM games {where} AND Publisher IS NOT NULL"
+            f" GROUP BY Publisher ORDER BY Global_Sales DESC, Publisher LIMIT {int(k)}",
+            params)
+        return pd.Series(sums["Global_Sales"].to_numpy(dtype=np.float64),
+                         index=pd.Index(sums["Publisher"], name="Publisher"), name="Global_Sales")
+
+    def rows(self, year_range, platforms, genres) -> pd.DataFrame:
+        """Lignes de la sélection, dans l'ordre du fichier"""
+        if not platforms or not genres:
+            return pd.DataFrame(columns=self.columns)
+        where, params = self._where(year_range, platforms, genres)
+        return apply_schema(self._query(f"SELECT * FROM games {where} ORDER BY _pos", params).drop(columns="_pos"))
+
+    def row_batches(self, year_range, platforms, genres, chunk_rows: int) -> Iterator[pd.DataFrame]:
+        """Lignes de la sélection par lots lus sur un curseur : le résultat n'est jamais matérialisé en entier"""
+        if not platforms or not genres:
+            yield pd.DataFrame(columns=self.columns)
+            return
+        where, params = self._where(year_range, platforms, genres)
+        sql = f"SELECT * FROM games {where} ORDER BY _pos"
+        if self.name == "duckdb":
+            # Curseur sur sa propre connexion (même base) : le verrou n'est pas tenu pendant l'export
+            cursor = self.conn.cursor()
+            cursor.execute(sql, params)
+            vectors = max(1, chunk_rows // 2048)  # DuckDB rend les lignes par vecteurs de 2048
+            fetch = lambda: cursor.fetch_df_chunk(vectors)
+        else:
+            with self._lock:
+                cursor = self.conn.execute(sql, params)
+            names = [column[0] for column in cursor.description]
+
+            def fetch() -> pd.DataFrame:
+                with self._lock:
+                    return pd.DataFrame.from_records(cursor.fetchmany(chunk_rows), columns=names)
+        empty = True
+        while True:
+            batch = fetch()
+            if batch.empty:
+                break
+            empty = False
+            yield apply_schema(batch.drop(columns="_pos"))
+        if empty:
+            yield pd.DataFrame(columns=self.columns)
+
+
+BACKENDS = {"pandas": PandasBackend, "sql": SQLBackend}
+
+
+def make_backend(name: str, df: pd.DataFrame):
+    """Instancie un backend de requêtes par son nom (pandas ou sql)"""
+    if name not in BACKENDS:
+        raise ValueError(f"Backend inconnu : {name!r} (attendu : {', '.join(BACKENDS)})")
+    return BACKENDS[name](df)
+
+
+class BackendAggregateEngine(AggregateEngine):
+    """Moteur d'agrégats dont les lectures de base passent par un backend de requêtes.
+
+    Le cube ne sert plus qu'aux libellés et aux bornes d'années : fenêtres, séries,
+    lignes et tops viennent des requêtes du backend.
+    """
+
+    def __init__(self, df: pd.DataFrame, cube: SalesCube, backend, max_entries: int = 64,
+                 data_version: str = ""):
+        super().__init__(df, cube, None, max_entries=max_entries, data_version=data_version)
+        self.backend = backend
+        self.publisher_topk = None
+
+    def _agg_cells(self, r: AggregateResult) -> pd.DataFrame:
+        return self.backend.cells(*r.key)
+
+    def _agg_series(self, r: AggregateResult) -> np.ndarray:
+        genre_labels, platform_labels = r["labels"]
+        years = self.cube.selected_years(r.key[0])
+        series = np.zeros((len(MEASURES), len(years), len(genre_labels), len(platform_labels)))
+        cells = r["cells"]
+        if len(cells) and len(years):
+            yi = cells["Year"].to_numpy(dtype=np.int64) - years[0]
+            gi = pd.Index(genre_labels).get_indexer(cells["Genre"].astype(str))
+            pi = pd.Index(platform_labels).get_indexer(cells["Platform"].astype(str))
+            np.add.at(series, (slice(None), yi, gi, pi), cells[MEASURES].to_numpy(dtype=np.float64).T)
+        return series
+
+    def _agg_window(self, r: AggregateResult) -> np.ndarray:
+        return r["series"].sum(axis=1)
+
+    def _agg_rows(self, r: AggregateResult) -> pd.DataFrame:
+        return self.backend.rows(*r.key)
+
+    def _agg_top_games(self, r: AggregateResult) -> pd.DataFrame:
+        return self.backend.top_games(*r.key)
+
+    def _agg_top_publishers(self, r: AggregateResult) -> pd.Series:
+        return self.backend.top_publishers(*r.key)
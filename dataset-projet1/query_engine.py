@@ -0,0 +1,398 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from bitmap_index import BitmapIndex
+from bootstrap import bootstrap_table
+from distributions import DistributionIndex, SortedGroups, profile_table
+from forecast import fit_trends, forecast_frame, trend_table
+from sales_cube import REGION_COLUMNS, SalesCube
+from topk import IncrementalTopK, top_k_indices, top_k_rows, top_k_series
+
+FilterKey = Tuple[Tuple[int, int], Tuple[str, ...], Tuple[str, ...]]
+Segments = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+# Quantiles des ventes affichés avec les KPIs
+SALES_QUANTILES = {"median": 0.5, "p90": 0.9}
+# Éditeurs gardés dans les vues de distribution (ceux qui ont le plus de jeux dans la sélection)
+DISTRIBUTION_PUBLISHERS = 20
+# Jeux proposés au choix (recommandations) : les meilleures ventes de la sélection
+GAME_CHOICES = 200
+
+
+def exact_estimate(value: float) -> Dict[str, float]:
+    """Valeur exacte au format des estimations approchées (intervalle de largeur nulle)"""
+    value = float(value)
+    return {"value": value, "low": value, "high": value}
+
+
+def filter_key(year_range: Iterable[int], platforms: Iterable[str], genres: Iterable[str]) -> FilterKey:
+    """Clé canonique d'un état de filtres (l'ordre de sélection n'a pas d'importance)"""
+    y0, y1 = year_range
+    return (int(y0), int(y1)), tuple(sorted(platforms)), tuple(sorted(genres))
+
+
+class AggregateResult:
+    """Agrégats d'un état de filtres, calculés à la demande (une seule fois) puis mémorisés"""
+
+    def __init__(self, engine: "AggregateEngine", key: FilterKey):
+        self.engine = engine
+        self.key = key
+        self._values: Dict[str, Any] = {}
+        # Agrégats déjà présents dans la vue matérialisée (inutile de les réécrire)
+        self._persisted: set = set()
+        self._lock = threading.RLock()
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self._values:
+            compute = getattr(self.engine, "_agg_" + name, None)
+            if compute is None:
+                raise KeyError(name)
+            with self._lock:
+                if name not in self._values:
+                    self._values[name] = compute(self)
+        return self._values[name]
+
+    def prefetch(self, names: Iterable[str]) -> "AggregateResult":
+        """Calcule d'avance les agrégats déclarés par une page"""
+        for name in names:
+            self[name]
+        return self
+
+    def computed(self) -> List[str]:
+        """Noms des agrégats déjà calculés pour cet état de filtres"""
+        return list(self._values)
+
+
+class AggregateEngine:
+    """Calcule les agrégats du dashboard pour un état de filtres (cube + bitmaps), avec cache LRU"""
+
+    def __init__(self, df: pd.DataFrame, cube: SalesCube, index: BitmapIndex, max_entries: int = 64,
+                 data_version: str = "", publisher_topk: Optional[IncrementalTopK] = None, views=None):
+        self.df = df
+        self.cube = cube
+        self.index = index
+        self.max_entries = max_entries
+        self.data_version = data_version
+        # Vues matérialisées (MaterializedViews) : agrégats relus depuis le disque après un redémarrage
+        self.views = views
+        # df vaut None quand la table n'est pas en mémoire (streaming) : seuls le cube et les sous-classes répondent
+        self.columns = list(df.columns) if df is not None else []
+        # Top éditeurs maintenu par delta de lignes quand la sélection change
+        # (ou repris d'un moteur précédent après application d'un delta)
+        if publisher_topk is None and df is not None and "Publisher" in df.columns:
+            publisher_topk = IncrementalTopK(df["Publisher"], df["Global_Sales"])
+        self.publisher_topk = publisher_topk
+        # Ventes triées par genre, plateforme et éditeur (construites au premier affichage d'une distribution)
+        self.distributions = DistributionIndex(df) if df is not None else None
+        self._cache: "OrderedDict[FilterKey, AggregateResult]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Statistiques globales de la sidebar, indépendantes des filtres
+        if df is not None:
+            self.dataset_stats = {
+                "total_games": len(df),
+                "total_sales": float(df["Global_Sales"].sum()),
+                "avg_score": float(df["Critic_Score"].mean()) if "Critic_Score" in df.columns else 0.0,
+            }
+        else:
+            totals = cube.cube.sum(axis=(1, 2, 3))
+            self.dataset_stats = {
+                "total_games": int(totals[cube.measure("Count")]),
+                "total_sales": float(totals[cube.measure("Global_Sales")]),
+                "avg_score": 0.0,
+            }
+
+    def run(self, year_range: Iterable[int], platforms: Iterable[str], genres: Iterable[str]) -> AggregateResult:
+        """Agrégats (paresseux) de la sélection, lus depuis le cache LRU ou créés puis mémorisés"""
+        key = filter_key(year_range, platforms, genres)
+        with self._lock:
+            result = self._cache.get(key)
+            if result is None:
+                result = AggregateResult(self, key)
+                if self.views is not None:
+                    result._values.update(self.views.load_aggregates(key))
+                    result._persisted.update(result._values)
+                self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return result
+
+    def persist(self, result: AggregateResult) -> None:
+        """Écrit dans la vue matérialisée les agrégats calculés depuis le dernier enregistrement"""
+        if self.views is None:
+            return
+        with result._lock:
+            if set(result._values) <= result._persisted:
+                return
+            values = dict(result._values)
+        self.views.save_aggregates(result.key, values)
+        result._persisted.update(values)
+
+    def clear(self) -> None:
+        """Vide le cache (à appeler si les données changent)"""
+        with self._lock:
+            self._cache.clear()
+
+    # --- Lectures de base : une fenêtre du cube, une série annuelle, un bitmap ---
+
+    def _agg_window(self, r: AggregateResult) -> np.ndarray:
+        year_range, platforms, genres = r.key
+        return self.cube.window(year_range, platforms, genres)
+
+    def _agg_series(self, r: AggregateResult) -> np.ndarray:
+        year_range, platforms, genres = r.key
+        return self.cube.series(year_range, platforms, genres)
+
+    def _agg_labels(self, r: AggregateResult) -> Tuple[List[str], List[str]]:
+        _, platforms, genres = r.key
+        return self.cube.labels(platforms, genres)
+
+    def _agg_bits(self, r: AggregateResult) -> np.ndarray:
+        year_range, platforms, genres = r.key
+        return self.index.resolve(year_range, platforms, genres)
+
+    def _agg_positions(self, r: AggregateResult) -> np.ndarray:
+        return self.index.to_positions(r["bits"])
+
+    def _agg_rows(self, r: AggregateResult) -> pd.DataFrame:
+        return self.df.iloc[r["positions"]]
+
+    # --- KPIs ---
+
+    def _agg_totals(self, r: AggregateResult) -> np.ndarray:
+        return r["window"].sum(axis=(1, 2))
+
+    def _agg_count(self, r: AggregateResult) -> int:
+        return int(r["totals"][self.cube.measure("Count")])
+
+    def _agg_total_sales(self, r: AggregateResult) -> float:
+        return float(r["totals"][self.cube.measure("Global_Sales")])
+
+    def _agg_avg_sales(self, r: AggregateResult) -> float:
+        return r["total_sales"] / r["count"] if r["count"] else float("nan")
+
+    def _agg_std_sales(self, r: AggregateResult) -> float:
+        if not r["count"]:
+            return float("nan")
+        mean_sq = r["totals"][self.cube.measure("Global_Sales_Sq")] / r["count"]
+        return float(np.sqrt(max(mean_sq - r["avg_sales"] ** 2, 0.0)))
+
+    def _agg_conf_interval(self, r: AggregateResult) -> float:
+        return 1.96 * r["std_sales"] / np.sqrt(r["count"]) if r["count"] else float("nan")
+
+    def _agg_region_sales(self, r: AggregateResult) -> Dict[str, float]:
+        return {col: float(r["totals"][self.cube.measure(col)]) for col in REGION_COLUMNS}
+
+    # --- Distincts et quantiles ({"value", "low", "high"}, bornes confondues en mode exact) ---
+
+    def _agg_sales(self, r: AggregateResult) -> np.ndarray:
+        """Ventes de la sélection, lues aux positions de l'index sans copier les lignes"""
+        if self.index is None:
+            return r["rows"]["Global_Sales"].to_numpy(dtype=np.float64)
+        return self.df["Global_Sales"].to_numpy()[r["positions"]].astype(np.float64)
+
+    def _agg_rows_complete(self, r: AggregateResult) -> bool:
+        # Faux quand les lignes de détail de la sélection sont plafonnées
+        return True
+
+    def _distinct(self, r: AggregateResult, column: str) -> Dict[str, float]:
+        if column not in self.columns:
+            return exact_estimate(float("nan"))
+        if self.index is None:
+            return exact_estimate(r["rows"][column].nunique())
+        values = self.df[column]
+        if not isinstance(values.dtype, pd.CategoricalDtype):
+            return exact_estimate(values.iloc[r["positions"]].nunique())
+        # Colonne catégorielle : modalités présentes comptées sur les codes
+        codes = values.cat.codes.to_numpy()[r["positions"]]
+        return exact_estimate(np.count_nonzero(np.bincount(codes[codes >= 0])))
+
+    def _agg_distinct_titles(self, r: AggregateResult) -> Dict[str, float]:
+        return self._distinct(r, "Name")
+
+    def _agg_distinct_publishers(self, r: AggregateResult) -> Dict[str, float]:
+        return self._distinct(r, "Publisher")
+
+    def _agg_sales_quantiles(self, r: AggregateResult) -> Dict[str, Dict[str, float]]:
+        sales = r["sales"]
+        return {name: exact_estimate(np.quantile(sales, q) if len(sales) else float("nan"))
+                for name, q in SALES_QUANTILES.items()}
+
+    # --- Marges par dimension ---
+
+    def _agg_genre_sales(self, r: AggregateResult) -> pd.Series:
+        w, cube = r["window"], self.cube
+        return self._marginal(w[cube.measure("Global_Sales")].sum(axis=1), w[cube.measure("Count")].sum(axis=1),
+                              r["labels"][0], "Genre")
+
+    def _agg_platform_sales(self, r: AggregateResult) -> pd.Series:
+        w, cube = r["window"], self.cube
+        return self._marginal(w[cube.measure("Global_Sales")].sum(axis=0), w[cube.measure("Count")].sum(axis=0),
+                              r["labels"][1], "Platform")
+
+    def _agg_top_platforms(self, r: AggregateResult) -> pd.Series:
+        return top_k_series(r["platform_sales"], 10)
+
+    def _agg_top_genre(self, r: AggregateResult) -> str:
+        return r["genre_sales"].index[0] if not r["genre_sales"].empty else "—"
+
+    def _agg_sales_by_year(self, r: AggregateResult) -> pd.DataFrame:
+        s, cube = r["series"], self.cube
+        year_sales = self._marginal(s[cube.measure("Global_Sales")].sum(axis=(1, 2)),
+                                    s[cube.measure("Count")].sum(axis=(1, 2)),
+                                    cube.selected_years(r.key[0]), "Year")
+        return year_sales.reset_index()
+
+    # --- Matrices Genre × Platform pour les heatmaps ---
+
+    def _agg_genre_platform(self, r: AggregateResult) -> pd.DataFrame:
+        w, cube = r["window"], self.cube
+        genre_labels, platform_labels = r["labels"]
+        genre_platform = pd.DataFrame(w[cube.measure("Global_Sales")], index=pd.Index(genre_labels, name="Genre"),
+                                      columns=pd.Index(platform_labels, name="Platform"))
+        present = w[cube.measure("Count")] > 0
+        return genre_platform.loc[present.any(axis=1), present.any(axis=0)]
+
+    def _agg_heatmap_top5(self, r: AggregateResult) -> pd.DataFrame:
+        genre_platform = r["genre_platform"]
+        top5 = sorted(r["top_platforms"].index[:5])
+        return genre_platform.loc[(genre_platform[top5] != 0).any(axis=1), top5]
+
+    # --- Tendances (Top 6 genres, Top 8 plateformes) ---
+
+    def _agg_genre_year(self, r: AggregateResult) -> pd.DataFrame:
+        s, cube = r["series"], self.cube
+        top_genres = list(top_k_series(r["genre_sales"], 6).index)
+        return self._long(s[cube.measure("Global_Sales")].sum(axis=2), s[cube.measure("Count")].sum(axis=2),
+                          cube.selected_years(r.key[0]), r["labels"][0], top_genres, "Genre")
+
+    def _agg_platform_year(self, r: AggregateResult) -> pd.DataFrame:
+        s, cube = r["series"], self.cube
+        top_platforms = list(r["top_platforms"].index[:8])
+        return self._long(s[cube.measure("Global_Sales")].sum(axis=1), s[cube.measure("Count")].sum(axis=1),
+                          cube.selected_years(r.key[0]), r["labels"][1], top_platforms, "Platform")
+
+    # --- Prévisions : une droite par série Genre / Platform, toutes ajustées en un seul calcul matriciel ---
+
+    def _fit(self, r: AggregateResult, axis: int) -> Tuple[Dict[str, np.ndarray], List[str]]:
+        s, cube = r["series"], self.cube
+        # Matrice dense (séries, années), limitée aux modalités présentes dans la sélection
+        values = s[cube.measure("Global_Sales")].sum(axis=2 - axis).T
+        present = s[cube.measure("Count")].sum(axis=(0, 2 - axis)) > 0
+        labels = [label for label, keep in zip(r["labels"][axis], present) if keep]
+        return fit_trends(values[present], cube.selected_years(r.key[0])), labels
+
+    def _agg_genre_fit(self, r: AggregateResult) -> Tuple[Dict[str, np.ndarray], List[str]]:
+        return self._fit(r, 0)
+
+    def _agg_platform_fit(self, r: AggregateResult) -> Tuple[Dict[str, np.ndarray], List[str]]:
+        return self._fit(r, 1)
+
+    def _agg_genre_forecast(self, r: AggregateResult) -> pd.DataFrame:
+        return forecast_frame(*r["genre_fit"], "Genre")
+
+    def _agg_platform_forecast(self, r: AggregateResult) -> pd.DataFrame:
+        return forecast_frame(*r["platform_fit"], "Platform")
+
+    def _agg_genre_trends(self, r: AggregateResult) -> pd.DataFrame:
+        return trend_table(*r["genre_fit"], "Genre")
+
+    def _agg_platform_trends(self, r: AggregateResult) -> pd.DataFrame:
+        return trend_table(*r["platform_fit"], "Platform")
+
+    # --- Vues ligne à ligne (top jeux, éditeurs) via l'index bitmap ---
+
+    def _agg_top_games(self, r: AggregateResult) -> pd.DataFrame:
+        return top_k_rows(self.df, r["positions"], "Global_Sales", 10)
+
+    def _agg_game_choices(self, r: AggregateResult) -> np.ndarray:
+        # Positions des meilleures ventes de la sélection, proposées dans les listes de choix de jeu
+        sales = self.df["Global_Sales"].to_numpy(dtype=np.float64)[r["positions"]]
+        return r["positions"][top_k_indices(sales, GAME_CHOICES)]
+
+    def _agg_top_publishers(self, r: AggregateResult) -> pd.Series:
+        if self.publisher_topk is None:
+            return pd.Series(dtype="float64")
+        return self.publisher_topk.top(r["bits"], 10)
+
+    # --- Distributions par modalité (centiles P0 à P100) ---
+
+    def _agg_mask(self, r: AggregateResult) -> np.ndarray:
+        return np.unpackbits(r["bits"], count=len(self.df)).astype(bool)
+
+    def _sales_segments(self, r: AggregateResult, column: str, top: Optional[int] = None) -> Segments:
+        """Ventes de la sélection triées par modalité : (libellés, valeurs, débuts, effectifs)"""
+        if self.index is None or self.distributions is None:
+            # Sans index bitmap : tri par modalité des seules lignes de la sélection
+            rows = r["rows"]
+            segments = SortedGroups(rows[column], rows["Global_Sales"].to_numpy()).segments()
+        else:
+            segments = self.distributions.groups(column).segments(r["mask"])
+        if top is None:
+            return segments
+        # Modalités les plus représentées seulement (les débuts restent valables dans values)
+        labels, values, starts, counts = segments
+        keep = top_k_indices(counts, top)
+        return labels[keep], values, starts[keep], counts[keep]
+
+    def _sales_profile(self, r: AggregateResult, column: str, top: Optional[int] = None) -> pd.DataFrame:
+        if column not in self.columns:
+            return pd.DataFrame()
+        return profile_table(*self._sales_segments(r, column, top), column)
+
+    def _agg_genre_distribution(self, r: AggregateResult) -> pd.DataFrame:
+        return self._sales_profile(r, "Genre")
+
+    def _agg_platform_distribution(self, r: AggregateResult) -> pd.DataFrame:
+        return self._sales_profile(r, "Platform")
+
+    def _agg_publisher_distribution(self, r: AggregateResult) -> pd.DataFrame:
+        return self._sales_profile(r, "Publisher", DISTRIBUTION_PUBLISHERS)
+
+    # --- IC bootstrap de la moyenne et de la médiane (rééchantillonnage vectorisé, graine fixe) ---
+
+    def _sales_bootstrap(self, r: AggregateResult, column: str, top: Optional[int] = None) -> pd.DataFrame:
+        if column not in self.columns:
+            return pd.DataFrame()
+        return bootstrap_table(*self._sales_segments(r, column, top), column)
+
+    def _agg_genre_bootstrap(self, r: AggregateResult) -> pd.DataFrame:
+        return self._sales_bootstrap(r, "Genre")
+
+    def _agg_platform_bootstrap(self, r: AggregateResult) -> pd.DataFrame:
+        return self._sales_bootstrap(r, "Platform")
+
+    def _agg_publisher_bootstrap(self, r: AggregateResult) -> pd.DataFrame:
+        return self._sales_bootstrap(r, "Publisher", DISTRIBUTION_PUBLISHERS)
+
+    def _agg_sales_bootstrap(self, r: AggregateResult) -> Dict[str, float]:
+        # Toute la sélection comme un seul groupe
+        values = np.sort(r["sales"])
+        if not len(values):
+            return {}
+        table = bootstrap_table(["Sélection"], values, np.zeros(1, dtype=np.intp), np.array([len(values)]), "Selection")
+        return table.iloc[0].to_dict()
+
+    @staticmethod
+    def _marginal(values: np.ndarray, counts: np.ndarray, labels: Iterable, name: str) -> pd.Series:
+        """Série triée par ventes décroissantes, restreinte aux modalités présentes"""
+        s = pd.Series(values, index=pd.Index(list(labels), name=name), name="Global_Sales")
+        s = s[counts > 0]
+        return s if name == "Year" else s.sort_values(ascending=False, kind="stable")
+
+    @staticmethod
+    def _long(values: np.ndarray, counts: np.ndarray, years: np.ndarray, labels: List[str],
+              keep: List[str], name: str) -> pd.DataFrame:
+        """Format long (Year, dimension, Global_Sales) des cellules non vides des modalités gardées"""
+        keep_pos = [labels.index(label) for label in keep]
+        yi, ki = np.nonzero(counts[:, keep_pos] > 0)
+        return pd.DataFrame({
+            "Year": years[yi],
+            name: np.array(keep, dtype=object)[ki],
+            "Global_Sales": values[:, keep_pos][yi, ki],
+        })
@@ -0,0 +1,141 @@
+from typing import Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from parallel import group_sums
+
+REGION_COLUMNS = ["NA_Sales", "EU_Sales", "JP_Sales", "Other_Sales"]
+# Mesures stockées dans le cube (Count et Global_Sales_Sq servent aux moyennes / écarts-types)
+MEASURES = ["Global_Sales"] + REGION_COLUMNS + ["Count", "Global_Sales_Sq"]
+
+
+class SalesCube:
+    """Cube dense Year × Genre × Platform avec sommes cumulées sur l'axe des années"""
+
+    def __init__(self, df: pd.DataFrame, pre_aggregated: bool = False):
+        """df : une ligne par jeu, ou une ligne par cellule déjà agrégée (colonnes MEASURES) si pre_aggregated"""
+        years = df["Year"].to_numpy()
+        self.year_min = int(years.min()) if len(df) else 0
+        self.year_max = int(years.max()) if len(df) else -1
+        self.years = np.arange(self.year_min, self.year_max + 1)
+
+        genre_codes, self.genres = self._encode(df["Genre"])
+        platform_codes, self.platforms = self._encode(df["Platform"])
+        self._genre_pos = {g: i for i, g in enumerate(self.genres)}
+        self._platform_pos = {p: i for i, p in enumerate(self.platforms)}
+        self._measure_pos = {m: i for i, m in enumerate(MEASURES)}
+
+        shape = (len(self.years), len(self.genres), len(self.platforms))
+        if len(df):
+            flat = np.ravel_multi_index((years - self.year_min, genre_codes, platform_codes), shape)
+        else:
+            flat = np.zeros(0, dtype=np.intp)
+        size = int(np.prod(shape))
+
+        if pre_aggregated:
+            weights = {m: df[m].to_numpy(dtype=np.float64) for m in MEASURES}
+        else:
+            global_sales = df["Global_Sales"].to_numpy(dtype=np.float64)
+            weights = {
+                "Count": None,
+                "Global_Sales_Sq": global_sales * global_sales,
+            }
+        # Group-by des lignes sur les cellules, réparti sur plusieurs cœurs pour les gros volumes
+        self.cube = group_sums(
+            flat,
+            [weights[measure] if measure in weights else df[measure].to_numpy(dtype=np.float64) for measure in MEASURES],
+            size,
+        ).reshape((len(MEASURES),) + shape)
+
+        # cumulative[:, k] = somme des années d'indice < k, d'où une ligne de zéros en tête
+        self.cumulative = np.zeros((len(MEASURES), shape[0] + 1) + shape[1:])
+        np.cumsum(self.cube, axis=1, out=self.cumulative[:, 1:])
+
+    @classmethod
+    def from_arrays(cls, cube: np.ndarray, year_min: int, genres: List[str], platforms: List[str]) -> "SalesCube":
+        """Cube reconstruit depuis ses tableaux (vue matérialisée sur disque), sans repasser sur les lignes"""
+        new = object.__new__(cls)
+        new.year_min = int(year_min)
+        new.year_max = int(year_min) + cube.shape[1] - 1
+        new.years = np.arange(new.year_min, new.year_max + 1)
+        new.genres, new.platforms = list(genres), list(platforms)
+        new._genre_pos = {g: i for i, g in enumerate(new.genres)}
+        new._platform_pos = {p: i for i, p in enumerate(new.platforms)}
+        new._measure_pos = {m: i for i, m in enumerate(MEASURES)}
+        new.cube = cube
+        new.cumulative = np.zeros((len(MEASURES), cube.shape[1] + 1) + cube.shape[2:])
+        np.cumsum(cube, axis=1, out=new.cumulative[:, 1:])
+        return new
+
+    def apply_rows(self, df: pd.DataFrame, sign: int = 1) -> "SalesCube":
+        """Nouveau cube avec les lignes de df ajoutées (sign=+1) ou retirées (sign=-1).
+
+        Lève KeyError si une année, un genre ou une plateforme sort des axes du cube
+        (il faut alors le reconstruire).
+        """
+        years = df["Year"].to_numpy(dtype=np.int64)
+        if len(df) and (years.min() < self.year_min or years.max() > self.year_max):
+            raise KeyError("Year")
+        gi = np.array([self._genre_pos[str(g)] for g in df["Genre"]], dtype=np.intp)
+        pi = np.array([self._platform_pos[str(p)] for p in df["Platform"]], dtype=np.intp)
+
+        new = object.__new__(SalesCube)
+        new.__dict__.update(self.__dict__)
+        new.cube = self.cube.copy()
+        global_sales = df["Global_Sales"].to_numpy(dtype=np.float64)
+        weights = {"Count": np.ones(len(df)), "Global_Sales_Sq": global_sales * global_sales}
+        for m, measure in enumerate(MEASURES):
+            w = weights[measure] if measure in weights else df[measure].to_numpy(dtype=np.float64)
+            np.add.at(new.cube[m], (years - self.year_min, gi, pi), sign * w)
+        new.cumulative = np.zeros_like(self.cumulative)
+        np.cumsum(new.cube, axis=1, out=new.cumulative[:, 1:])
+        return new
+
+    @staticmethod
+    def _encode(column: pd.Series) -> Tuple[np.ndarray, List[str]]:
+        """Codes entiers et libellés d'une dimension (catégorielle ou non)"""
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            return column.cat.codes.to_numpy(), [str(c) for c in column.cat.categories]
+        codes, labels = pd.factorize(column, sort=True)
+        return codes, [str(c) for c in labels]
+
+    def _select(self, year_range: Tuple[int, int], platforms: Iterable[str],
+                genres: Iterable[str]) -> Tuple[int, int, np.ndarray, np.ndarray]:
+        """Traduit une sélection de filtres en indices du cube"""
+        y0 = max(int(year_range[0]), self.year_min) - self.year_min
+        y1 = min(int(year_range[1]), self.year_max) - self.year_min
+        gi = np.array([self._genre_pos[g] for g in genres if g in self._genre_pos], dtype=np.intp)
+        pi = np.array([self._platform_pos[p] for p in platforms if p in self._platform_pos], dtype=np.intp)
+        return y0, y1, gi, pi
+
+    def window(self, year_range: Tuple[int, int], platforms: Iterable[str],
+               genres: Iterable[str]) -> np.ndarray:
+        """Sommes Genre × Platform sur la plage d'années, en O(genres × plateformes)"""
+        y0, y1, gi, pi = self._select(year_range, platforms, genres)
+        if y0 > y1:
+            return np.zeros((len(MEASURES), len(gi), len(pi)))
+        totals = self.cumulative[:, y1 + 1] - self.cumulative[:, y0]
+        return totals[np.ix_(np.arange(len(MEASURES)), gi, pi)]
+
+    def series(self, year_range: Tuple[int, int], platforms: Iterable[str],
+               genres: Iterable[str]) -> np.ndarray:
+        """Sous-cube Year × Genre × Platform de la sélection (sans cumul)"""
+        y0, y1, gi, pi = self._select(year_range, platforms, genres)
+        years = np.arange(y0, y1 + 1)
+        return self.cube[np.ix_(np.arange(len(MEASURES)), years, gi, pi)]
+
+    def labels(self, platforms: Iterable[str], genres: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """Libellés (genres, plateformes) dans l'ordre des axes renvoyés par window/series"""
+        return ([g for g in genres if g in self._genre_pos],
+                [p for p in platforms if p in self._platform_pos])
+
+    def selected_years(self, year_range: Tuple[int, int]) -> np.ndarray:
+        """Années couvertes par l'axe renvoyé par series"""
+        y0 = max(int(year_range[0]), self.year_min)
+        y1 = min(int(year_range[1]), self.year_max)
+        return np.arange(y0, y1 + 1)
+
+    def measure(self, name: str) -> int:
+        """Position d'une mesure sur le premier axe du cube"""
+        return self._measure_pos[name]
@@ -0,0 +1,79 @@
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+REGION_SHARE_COLUMNS = ["NA_Sales", "EU_Sales", "JP_Sales", "Other_Sales"]
+SCORE_COLUMNS = {"Critic_Score": 100.0, "User_Score": 10.0}
+# Poids de chaque groupe de variables dans la similarité (cosinus sur les vecteurs normalisés)
+FEATURE_WEIGHTS = {"regions": 1.0, "volume": 0.5, "scores": 0.5, "Genre": 0.7, "Platform": 0.5}
+# Lignes traitées par bloc de produit matriciel (borne la mémoire temporaire d'une requête)
+BLOCK_ROWS = 65_536
+
+
+def feature_matrix(df: pd.DataFrame) -> np.ndarray:
+    """Vecteurs de caractéristiques normalisés (float32, norme 1), une ligne par jeu.
+
+    Répartition régionale des ventes (parts de chaque région), volume (log des ventes),
+    notes ramenées sur [0, 1] (note manquante : moyenne du catalogue, sans indicateur),
+    genre et plateforme en one-hot. Chaque groupe est pondéré puis le vecteur normalisé :
+    le produit scalaire de deux lignes est leur similarité cosinus.
+    """
+    blocks: List[np.ndarray] = []
+    sales = df[REGION_SHARE_COLUMNS].to_numpy(dtype=np.float32)
+    total = sales.sum(axis=1, keepdims=True)
+    shares = np.divide(sales, total, out=np.full_like(sales, 1 / len(REGION_SHARE_COLUMNS)), where=total > 0)
+    blocks.append(FEATURE_WEIGHTS["regions"] * shares)
+    volume = np.log1p(df["Global_Sales"].to_numpy(dtype=np.float32))[:, None]
+    blocks.append(FEATURE_WEIGHTS["volume"] * volume / max(float(volume.max()), 1e-6))
+
+    for col, scale in SCORE_COLUMNS.items():
+        if col in df.columns:
+            score = df[col].to_numpy(dtype=np.float32, na_value=np.nan) / scale
+            filled = np.where(np.isnan(score), np.nanmean(score) if np.isfinite(score).any() else 0.5, score)
+            blocks.append(FEATURE_WEIGHTS["scores"] * filled[:, None])
+
+    for col in ("Genre", "Platform"):
+        codes, uniques = pd.factorize(df[col], sort=True)
+        one_hot = np.zeros((len(df), len(uniques)), dtype=np.float32)
+        one_hot[np.flatnonzero(codes >= 0), codes[codes >= 0]] = FEATURE_WEIGHTS[col]
+        blocks.append(one_hot)
+
+    features = np.hstack(blocks).astype(np.float32)
+    norms = np.linalg.norm(features, axis=1, keepdims=True)
+    return features / np.maximum(norms, 1e-12)
+
+
+class SimilarityIndex:
+    """Index des plus proches voisins (cosinus) : produit matriciel par blocs + sélection partielle.
+
+    La matrice est construite une fois ; une requête lit chaque bloc une fois (O(n·d))
+    et ne garde que les k meilleurs candidats de chaque bloc avant la fusion finale.
+    """
+
+    def __init__(self, df: pd.DataFrame, block_rows: int = BLOCK_ROWS):
+        self.features = feature_matrix(df)
+        self.block_rows = block_rows
+
+    def neighbours(self, position: int, k: int = 10) -> Dict[str, np.ndarray]:
+        """Les k jeux les plus proches de la ligne position (elle-même exclue), similarité décroissante"""
+        query = self.features[position]
+        candidates, scores = [], []
+        for start in range(0, len(self.features), self.block_rows):
+            sims = self.features[start:start + self.block_rows] @ query
+            if start <= position < start + len(sims):
+                sims[position - start] = -np.inf
+            top = np.argpartition(-sims, min(k, len(sims) - 1))[:k] if len(sims) > k else np.arange(len(sims))
+            candidates.append(top + start)
+            scores.append(sims[top])
+        candidates, scores = np.concatenate(candidates), np.concatenate(scores)
+        best = np.argsort(-scores, kind="stable")[:k]
+        best = best[np.isfinite(scores[best])]
+        return {"positions": candidates[best], "similarity": scores[best]}
+
+    def similar_games(self, df: pd.DataFrame, position: int, k: int = 10) -> pd.DataFrame:
+        """Lignes des k jeux les plus proches, avec leur similarité"""
+        found = self.neighbours(position, k)
+        rows = df.iloc[found["positions"]].copy()
+        rows.insert(0, "Similarity", found["similarity"])
+        return rows
@@ -0,0 +1,123 @@
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# HyperLogLog : 2^p registres, erreur relative ≈ 1.04 / sqrt(2^p) (3,3 % pour p = 10)
+HLL_PRECISION = 10
+# KLL : taille du plus grand compacteur ; erreur de rang ≈ 1 % pour k = 200
+KLL_K = 200
+KLL_RANK_ERROR = 0.01
+
+
+def hash_values(values: pd.Series) -> np.ndarray:
+    """Empreintes 64 bits stables des valeurs (chaînes), valeurs manquantes exclues"""
+    values = values.dropna().astype(str).to_numpy(dtype=object)
+    return pd.util.hash_array(values, categorize=False)
+
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    """Nombre de bits significatifs de chaque entier non signé 64 bits"""
+    x = x.copy()
+    n = np.zeros(len(x), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = (x >> np.uint64(shift)) > 0
+        n += high * shift
+        x = np.where(high, x >> np.uint64(shift), x)
+    return n + (x > 0)
+
+
+def hll_registers(hashes: np.ndarray, groups: np.ndarray, n_groups: int,
+                  precision: int = HLL_PRECISION) -> np.ndarray:
+    """Registres HyperLogLog (n_groups, 2^p) de plusieurs groupes en une passe vectorisée"""
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    registers = np.zeros((n_groups, 1 << precision), dtype=np.uint8)
+    if not len(hashes):
+        return registers
+    index = (hashes >> np.uint64(64 - precision)).astype(np.intp)
+    rest = hashes << np.uint64(precision)
+    rank = np.minimum(64 - _bit_length(rest) + 1, 64 - precision + 1).astype(np.uint8)
+    np.maximum.at(registers, (groups, index), rank)
+    return registers
+
+
+def hll_estimate(registers: np.ndarray) -> float:
+    """Cardinalité estimée à partir des registres (fusionnés par max) d'un HyperLogLog"""
+    m = registers.shape[-1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.exp2(-registers.astype(np.float64)))
+    zeros = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * m and zeros:
+        return float(m * np.log(m / zeros))  # petite cardinalité : comptage linéaire
+    return float(estimate)
+
+
+def hll_interval(registers: np.ndarray, z: float = 1.96) -> dict:
+    """Estimation et intervalle de confiance (erreur relative 1.04 / sqrt(m))"""
+    estimate = hll_estimate(registers)
+    half = z * 1.04 / np.sqrt(registers.shape[-1]) * estimate
+    return {"value": float(estimate), "low": float(max(estimate - half, 0.0)), "high": float(estimate + half)}
+
+
+class KLLSketch:
+    """Sketch de quantiles KLL : compacteurs par niveau, fusionnables, taille O(k)"""
+
+    def __init__(self, k: int = KLL_K, seed: Optional[int] = None):
+        self.k = k
+        self.levels: List[np.ndarray] = [np.zeros(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def n(self) -> int:
+        """Nombre de valeurs résumées"""
+        return int(sum(len(level) << h for h, level in enumerate(self.levels)))
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - h - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self) -> None:
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.zeros(0))
+                level = np.sort(level)
+                # Nombre impair : un élément reste au niveau courant
+                keep, level = (level[-1:], level[:-1]) if len(level) % 2 else (level[:0], level)
+                promoted = level[self._rng.integers(2)::2]
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+                self.levels[h] = keep
+            h += 1
+
+    def update(self, values: Iterable[float]) -> "KLLSketch":
+        values = np.asarray(values, dtype=np.float64)
+        self.levels[0] = np.concatenate([self.levels[0], values[~np.isnan(values)]])
+        self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.zeros(0))
+        for h, level in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], level])
+        self._compress()
+        return self
+
+    def quantile(self, q: float) -> float:
+        """Valeur de rang q (0-1) ; NaN si le sketch est vide"""
+        values = np.concatenate(self.levels)
+        if not len(values):
+            return float("nan")
+        weights = np.concatenate([np.full(len(level), 1 << h, dtype=np.float64)
+                                  for h, level in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        cumulative = np.cumsum(weights[order]) / weights.sum()
+        return float(values[order][min(np.searchsorted(cumulative, q), len(values) - 1)])
+
+    def interval(self, q: float, rank_error: float = KLL_RANK_ERROR) -> dict:
+        """Quantile et bornes obtenues en décalant le rang de l'erreur garantie"""
+        return {"value": self.quantile(q),
+                "low": self.quantile(max(q - rank_error, 0.0)),
+                "high": self.quantile(min(q + rank_error, 1.0))}
@@ -0,0 +1,229 @@
+import os
+import shutil
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from approximate import CellSketches
+from data_store import SALES_COLUMNS, SCHEMA_DTYPES, apply_schema, clean_frame, dataset_version
+from partitions import PARTITION_COLUMNS, PartitionedStore, partition_root, write_partitioned
+from query_engine import AggregateEngine, AggregateResult
+from sales_cube import MEASURES, SalesCube
+from topk import top_k_indices, top_k_series
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # sans pyarrow : agrégats seulement, pas de drill-down ligne à ligne
+    pq = None
+
+# Au-delà de cette taille de CSV (ou avec VGSALES_STREAMING=1), on ne charge plus la table en mémoire
+STREAMING_THRESHOLD_BYTES = 2 * 1024 ** 3
+CHUNK_ROWS = 100_000
+DIMENSIONS = ["Year", "Genre", "Platform"]
+# Lignes gardées par cellule Year × Genre × Platform : le top 10 de toute sélection s'y trouve
+TOP_ROWS = 10
+TOP_COLUMNS = ["Name", "Platform", "Year", "Genre", "Publisher", "Global_Sales"]
+# Plafond du drill-down ligne à ligne (nuages de points) en mode streaming
+MAX_DETAIL_ROWS = 200_000
+
+
+def use_streaming(csv_path: str) -> bool:
+    """Vrai si le CSV doit être agrégé par morceaux plutôt que chargé en entier"""
+    if os.environ.get("VGSALES_STREAMING", "") not in ("", "0"):
+        return True
+    return os.path.getsize(csv_path) > STREAMING_THRESHOLD_BYTES
+
+
+def _fold(acc: Optional[pd.DataFrame], part: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    """Fusionne deux tables d'agrégats partiels (sommes par clé)"""
+    if acc is None:
+        return part
+    return pd.concat([acc, part]).groupby(keys, sort=False).sum()
+
+
+def _row_frame(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Bloc au schéma compact, dimensions en chaînes pour un schéma Parquet stable d'un bloc à l'autre"""
+    chunk = chunk.copy()
+    if "User_Score" in chunk.columns:
+        chunk["User_Score"] = pd.to_numeric(chunk["User_Score"], errors="coerce")
+    for col in SALES_COLUMNS:
+        if col in chunk.columns:
+            chunk[col] = chunk[col].astype("float32")
+    for col, dtype in SCHEMA_DTYPES.items():
+        if col in chunk.columns:
+            chunk[col] = chunk[col].astype(dtype)
+    return chunk
+
+
+class StreamingStore:
+    """Agrégats construits en une passe sur le CSV lu par morceaux, sans jamais matérialiser la table.
+
+    Chaque morceau est replié dans des tables bornées par le nombre de cellules
+    (Year × Genre × Platform, et × Publisher pour les éditeurs) ; les lignes sont
+    recopiées en Parquet partitionné par année (et plateforme si demandé) pour le drill-down.
+    Distincts et quantiles des ventes sont tenus par cellule dans des sketches (HyperLogLog, KLL).
+    """
+
+    def __init__(self, csv_path: str, chunk_rows: int = CHUNK_ROWS, max_detail_rows: int = MAX_DETAIL_ROWS,
+                 partition_by: Iterable[str] = PARTITION_COLUMNS):
+        self.csv_path = csv_path
+        self.chunk_rows = chunk_rows
+        self.max_detail_rows = max_detail_rows
+        self.partitions = PartitionedStore(partition_root(csv_path), by=partition_by)
+        self.columns: List[str] = []
+        self.n_rows = 0
+        self.critic_sum = 0.0
+        self.critic_count = 0
+        self.cells: Optional[pd.DataFrame] = None
+        self.publisher_cells: Optional[pd.DataFrame] = None
+        self.top_rows: Optional[pd.DataFrame] = None
+        self.sketches = CellSketches()
+        self._build()
+
+    def _build(self) -> None:
+        # Partitions écrites à côté puis substituées d'un coup aux anciennes
+        tmp_root = self.partitions.root + ".tmp"
+        shutil.rmtree(tmp_root, ignore_errors=True)
+        for i, raw in enumerate(pd.read_csv(self.csv_path, chunksize=self.chunk_rows)):
+            chunk = _row_frame(clean_frame(raw))
+            if not self.columns:
+                self.columns = list(chunk.columns)
+            if chunk.empty:
+                continue
+            self._fold_chunk(chunk)
+            if pq is not None:
+                write_partitioned(chunk, tmp_root, self.partitions.by, tag=f"{i:06d}")
+        if os.path.isdir(tmp_root):
+            self.partitions.reset()
+            os.replace(tmp_root, self.partitions.root)
+        self.sketches.finish()
+
+        measure_columns = {m: 0.0 for m in MEASURES}
+        empty = pd.DataFrame({"Year": [], "Genre": [], "Platform": [], **measure_columns})
+        self.cells = empty if self.cells is None else self.cells.reset_index()
+        if self.publisher_cells is not None:
+            self.publisher_cells = self.publisher_cells.reset_index()
+        if self.top_rows is not None:
+            self.top_rows = self.top_rows.reset_index(drop=True)
+
+    def _fold_chunk(self, chunk: pd.DataFrame) -> None:
+        """Replie un morceau dans les agrégats : cellules, sketches, éditeurs, top lignes, score critique"""
+        self.n_rows += len(chunk)
+        sales = chunk["Global_Sales"].astype("float64")
+        measures = chunk[DIMENSIONS].assign(
+            **{col: chunk[col].astype("float64") for col in MEASURES if col in chunk.columns},
+            Count=1.0,
+            Global_Sales_Sq=sales * sales,
+        )
+        self.cells = _fold(self.cells, measures.groupby(DIMENSIONS, sort=False)[MEASURES].sum(), DIMENSIONS)
+        self.sketches.fold(chunk)
+
+        if "Publisher" in chunk.columns:
+            keys = DIMENSIONS + ["Publisher"]
+            part = chunk[keys].assign(Global_Sales=sales).groupby(keys, sort=False)[["Global_Sales"]].sum()
+            self.publisher_cells = _fold(self.publisher_cells, part, keys)
+
+        if "Critic_Score" in chunk.columns:
+            scores = chunk["Critic_Score"].dropna()
+            self.critic_sum += float(scores.astype("float64").sum())
+            self.critic_count += len(scores)
+
+        # Top lignes par cellule : on ne garde que TOP_ROWS lignes par cellule après chaque morceau
+        columns = [col for col in TOP_COLUMNS if col in chunk.columns]
+        candidates = chunk[columns] if self.top_rows is None else pd.concat([self.top_rows, chunk[columns]])
+        candidates = candidates.sort_values("Global_Sales", ascending=False, kind="stable")
+        self.top_rows = candidates.groupby(DIMENSIONS, sort=False).head(TOP_ROWS)
+
+    def cube(self) -> SalesCube:
+        """Cube construit à partir des cellules pré-agrégées"""
+        return SalesCube(self.cells, pre_aggregated=True)
+
+    @staticmethod
+    def _mask(frame: pd.DataFrame, year_range: Iterable[int], platforms: Iterable[str],
+              genres: Iterable[str]) -> np.ndarray:
+        y0, y1 = year_range
+        years = frame["Year"]
+        return ((years >= y0) & (years <= y1)
+                & frame["Platform"].astype(str).isin(list(platforms))
+                & frame["Genre"].astype(str).isin(list(genres))).to_numpy()
+
+    def rows(self, year_range: Iterable[int], platforms: Iterable[str], genres: Iterable[str]) -> pd.DataFrame:
+        """Lignes de la sélection (au plus max_detail_rows), lues dans les seules partitions concernées"""
+        if pq is None:
+            return pd.DataFrame(columns=self.columns)
+        rows = self.partitions.read(year_range, platforms, genres, max_rows=self.max_detail_rows)
+        if rows.empty:
+            return pd.DataFrame(columns=self.columns)
+        return apply_schema(rows)
+
+    def row_batches(self, year_range: Iterable[int], platforms: Iterable[str],
+                    genres: Iterable[str]) -> Iterator[pd.DataFrame]:
+        """Toutes les lignes de la sélection (sans plafond), par lots lus fichier par fichier"""
+        if pq is None:
+            raise ValueError("L'export des lignes en mode streaming nécessite pyarrow")
+        empty = True
+        for batch in self.partitions.batches(year_range, platforms, genres, cached=False):
+            empty = False
+            yield apply_schema(batch.reset_index(drop=True))
+        if empty:
+            yield pd.DataFrame(columns=self.columns)
+
+    def top_games(self, year_range: Iterable[int], platforms: Iterable[str], genres: Iterable[str],
+                  k: int = TOP_ROWS) -> pd.DataFrame:
+        """Top k jeux exact de la sélection, à partir des top lignes par cellule"""
+        candidates = self.top_rows[self._mask(self.top_rows, year_range, platforms, genres)]
+        return candidates.iloc[top_k_indices(candidates["Global_Sales"].to_numpy(dtype=np.float64), k)]
+
+    def top_publishers(self, year_range: Iterable[int], platforms: Iterable[str], genres: Iterable[str],
+                       k: int = 10) -> pd.Series:
+        """Top k éditeurs de la sélection, à partir des cellules × éditeur"""
+        if self.publisher_cells is None:
+            return pd.Series(dtype="float64")
+        cells = self.publisher_cells[self._mask(self.publisher_cells, year_range, platforms, genres)]
+        sums = cells.groupby("Publisher", sort=True)["Global_Sales"].sum()
+        return top_k_series(sums, k)
+
+
+class StreamingAggregateEngine(AggregateEngine):
+    """Moteur d'agrégats du mode out-of-core : mêmes agrégats, sans DataFrame ni index bitmap en mémoire"""
+
+    def __init__(self, store: StreamingStore, max_entries: int = 64):
+        super().__init__(None, store.cube(), None, max_entries=max_entries,
+                         data_version=dataset_version(store.csv_path))
+        self.store = store
+        self.columns = store.columns
+        # Score critique moyen cumulé pendant la lecture (absent du cube)
+        self.dataset_stats["avg_score"] = store.critic_sum / store.critic_count if store.critic_count else 0.0
+
+    def _agg_rows(self, r: AggregateResult) -> pd.DataFrame:
+        return self.store.rows(*r.key)
+
+    def _agg_top_games(self, r: AggregateResult) -> pd.DataFrame:
+        return self.store.top_games(*r.key)
+
+    def _agg_top_publishers(self, r: AggregateResult) -> pd.Series:
+        return self.store.top_publishers(*r.key)
+
+    def _agg_rows_complete(self, r: AggregateResult) -> bool:
+        return r["count"] <= self.store.max_detail_rows
+
+    # Distincts et quantiles lus dans les sketches par cellule : les lignes de détail sont plafonnées.
+    # Pas de mode exact ici, il demanderait de relire toutes les partitions de la sélection.
+
+    def _agg_cells(self, r: AggregateResult) -> np.ndarray:
+        return self.store.sketches.select(r.key)
+
+    def _agg_distinct_titles(self, r: AggregateResult) -> Dict[str, float]:
+        return self.store.sketches.distinct_titles(r["cells"])
+
+    def _agg_distinct_publishers(self, r: AggregateResult) -> Dict[str, float]:
+        estimate = self.store.sketches.distinct_publishers(r["cells"])
+        return estimate if estimate is not None else super()._agg_distinct_publishers(r)
+
+    def _agg_sales_quantiles(self, r: AggregateResult) -> Dict[str, Dict[str, float]]:
+        return self.store.sketches.sales_quantiles(r["cells"])
+
+    def _agg_sales_bootstrap(self, r: AggregateResult) -> Dict[str, float]:
+        # Sélection tronquée : pas de bootstrap, l'IC de la moyenne vient du cube (conf_interval)
+        return super()._agg_sales_bootstrap(r) if r["rows_complete"] else {}
@@ -1,11 +1,26 @@
+import time
+_script_start = time.perf_counter()
+
+import os
+from functools import partial
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
 from streamlit_option_menu import option_menu
 import numpy as np
+from data_store import SharedDataset, dataset_version, memory_report, shared_view
+from live_data import LiveDataset, file_signature
+from approximate import approximate, use_approximate
+from materialized import figures_root
+from sales_cube import SalesCube
+from query_backend import BackendAggregateEngine, make_backend
+from streaming import StreamingAggregateEngine, StreamingStore, use_streaming
+from forecast import FORECAST_WINDOW
+from similarity import SimilarityIndex
+from title_search import TitleIndex
+from exports import EXPORT_EXTENSIONS, EXPORT_FORMATS, ExportCache, available_formats, export_sources, exports_root
+from charts import adaptive_scatter, add_forecast_bands, scatter_mode
+from figure_cache import FigureCache, plotly_figure
+from perf_report import PerfReport
 
 # Configuration de la page
 st.set_page_config(
@@ -185,293 +200,435 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Chargement des données
-@st.cache_data
-def load_data():
-    df = pd.read_csv("vgsales.csv")
-    # Renommer la colonne pour plus de clarté
-    df.rename(columns={"Year_of_Release": "Year"}, inplace=True)
-    # Supprimer les lignes avec des valeurs manquantes dans les colonnes essentielles
-    df.dropna(subset=["Year", "Genre", "Platform", "Global_Sales"], inplace=True)
-    df["Year"] = df["Year"].astype(int)
-    return df
-
-df = load_data()
+# Chargeurs des modes sans deltas : clés sur la signature (mtime, taille) de vgsales.csv, reconstruits quand il change
+@st.cache_resource(max_entries=1)
+def load_shared_dataset(signature):
+    # Une seule copie par processus : snapshot Feather memory-mappé, régénéré uniquement si vgsales.csv change
+    return SharedDataset("vgsales.csv")
 
-# Sidebar améliorée avec navigation
-with st.sidebar:
-    st.markdown("<div style='text-align: center; padding: 1rem;'><h2 style='color: #667eea; margin: 0;'>🎮 Gaming Analytics</h2></div>", unsafe_allow_html=True)
-    
-    # Navigation menu
-    selected = option_menu(
-        menu_title=None,
-        options=["📊 Dashboard", "🎯 Analyse", "📈 Tendances"],
-        icons=["bar-chart", "bullseye", "graph-up"],
-        menu_icon="cast",
-        default_index=0,
-        orientation="vertical",
-        styles={
-            "container": {"padding": "0!important", "background-color": "transparent"},
-            "icon": {"color": "#667eea", "font-size": "18px"},
-            "nav-link": {"font-size": "16px", "text-align": "left", "margin": "0px", "--hover-color": "#e3f2fd"},
-            "nav-link-selected": {"background-color": "#667eea"},
-        }
-    )
-    
-    st.markdown("---")
-    
-    # Filtres
-    st.markdown("### 🔍 Filtres")
-    year_range = st.slider("Année de sortie", int(df["Year"].min()), int(df["Year"].max()), (2000, 2015))
-    selected_platforms = st.multiselect("Plateforme(s)", options=sorted(df["Platform"].unique()), default=["PS2", "X360", "PC"])
-    selected_genres = st.multiselect("Genre(s)", options=sorted(df["Genre"].unique()), default=["Action", "Shooter", "Sports"])
-    
-    # Statistiques rapides
-    st.markdown("---")
-    st.markdown("### 📊 Statistiques rapides")
-    total_games = len(df)
-    total_sales = df["Global_Sales"].sum()
-    avg_score = df["Critic_Score"].mean() if "Critic_Score" in df.columns else 0
-    
-    st.metric("Total Jeux", f"{total_games:,}")
-    st.metric("Ventes Totales", f"{total_sales:.1f}M")
-    if avg_score > 0:
-        st.metric("Score Moyen", f"{avg_score:.1f}/100")
+@st.cache_resource(max_entries=1)
+def load_cube(signature):
+    # Cube Year × Genre × Platform construit une seule fois par version du CSV, partagé par toutes les sessions
+    return SalesCube(load_shared_dataset(signature).frame)
 
-# Filtrage
-df_filtered = df[
-    (df["Year"] >= year_range[0]) & (df["Year"] <= year_range[1]) &
-    (df["Platform"].isin(selected_platforms)) &
-    (df["Genre"].isin(selected_genres))
-]
+@st.cache_resource
+def load_live_dataset():
+    # Dataset, cube, bitmaps et top éditeurs tenus à jour par les deltas déposés dans vgsales.deltas/
+    return LiveDataset("vgsales.csv", max_entries=64)
 
-# Titre principal avec design amélioré
-st.markdown('<div class="main-header"><h1>🎮 Gaming Analytics Dashboard</h1></div>', unsafe_allow_html=True)
+@st.cache_resource(max_entries=1)
+def load_alternate_engine(signature):
+    # Modes sans deltas : streaming pour les très gros CSV, ou backend de requêtes choisi par variable d'environnement
+    if use_streaming("vgsales.csv"):
+        # CSV plus gros que la RAM : agrégation par morceaux, lignes laissées sur disque
+        # (partitionnées par année, et par plateforme avec VGSALES_PARTITION_BY=Year,Platform)
+        partition_by = os.environ.get("VGSALES_PARTITION_BY", "Year").split(",")
+        return StreamingAggregateEngine(StreamingStore("vgsales.csv", partition_by=partition_by), max_entries=64)
+    backend = os.environ.get("VGSALES_BACKEND", "cube")
+    if backend != "cube":
+        # Backend de requêtes au choix (pandas de référence, ou SQL embarqué DuckDB/SQLite)
+        frame = load_shared_dataset(signature).frame
+        return BackendAggregateEngine(frame, load_cube(signature), make_backend(backend, frame), max_entries=64,
+                                      data_version=dataset_version("vgsales.csv"))
+    return None
 
-# Métriques principales
-col1, col2, col3, col4 = st.columns(4)
+def load_engine():
+    # Moteur d'agrégats partagé : un calcul par état de filtres, mémorisé (LRU borné)
+    # vgsales.csv modifié : moteur reconstruit au rerun suivant (pas de deltas dans ces modes)
+    engine = load_alternate_engine(file_signature("vgsales.csv"))
+    if engine is not None:
+        return engine
+    live = load_live_dataset()
+    # vgsales.csv modifié : rechargement en arrière-plan ; deltas en attente appliqués par un seul rerun.
+    # Le moteur lu ici sert tout le rerun, même si une nouvelle version est publiée entre-temps
+    live.refresh()
+    return live.engine
 
-with col1:
-    st.markdown(f"""
-    <div class="metric-card">
-        <div class="metric-value">{len(df_filtered):,}</div>
-        <div class="metric-label">Jeux analysés</div>
-    </div>
-    """, unsafe_allow_html=True)
+@st.cache_resource(max_entries=2)
+def load_approx_engine(data_version, _engine):
+    # Sketches (échantillon stratifié, HyperLogLog, KLL) construits une fois par version des données
+    return approximate(_engine)
 
-with col2:
-    total_sales_filtered = df_filtered["Global_Sales"].sum()
-    st.markdown(f"""
-    <div class="metric-card">
-        <div class="metric-value">{total_sales_filtered:.1f}M</div>
-        <div class="metric-label">Ventes totales</div>
-    </div>
-    """, unsafe_allow_html=True)
+@st.cache_resource(max_entries=2)
+def load_similarity_index(data_version, _frame):
+    # Matrice de caractéristiques normalisée, construite une fois par version des données
+    return SimilarityIndex(_frame)
 
-with col3:
-    avg_sales = df_filtered["Global_Sales"].mean()
-    st.markdown(f"""
-    <div class="metric-card">
-        <div class="metric-value">{avg_sales:.2f}M</div>
-        <div class="metric-label">Ventes moyennes</div>
-    </div>
-    """, unsafe_allow_html=True)
-    # Ajout intervalle de confiance avec numpy
-    sales = df_filtered["Global_Sales"].dropna()
-    mean_sales = np.mean(sales)
-    std_sales = np.std(sales)
-    n = len(sales)
-    conf_interval = 1.96 * std_sales / np.sqrt(n)  # 95% confidence
-    st.markdown(f"<div style='font-size:0.9rem;color:#1976d2;'>IC 95% : ±{conf_interval:.2f}M</div>", unsafe_allow_html=True)
+@st.cache_resource(max_entries=2)
+def load_title_index(data_version, _frame):
+    # Titres distincts triés (autocomplétion) et index de trigrammes (fautes de frappe), une fois par version
+    return TitleIndex(_frame["Name"])
 
-with col4:
-    top_genre = df_filtered.groupby("Genre")["Global_Sales"].sum().idxmax()
-    st.markdown(f"""
-    <div class="metric-card">
-        <div class="metric-value">{top_genre}</div>
-        <div class="metric-label">Genre dominant</div>
-    </div>
-    """, unsafe_allow_html=True)
+@st.cache_resource
+def load_figure_cache():
+    # Figures déjà rendues (spécifications Plotly / PNG matplotlib), partagées entre sessions et gardées sur disque
+    return FigureCache(max_bytes=64 * 1024 * 1024, directory=figures_root("vgsales.csv"))
 
-# Insight box
-st.markdown(f"""
-<div class="insight-box">
-    <h4 style="color: #1976d2;">📈 Insights clés</h4>
-    <p style="color: #424242;">Analyse de <strong>{len(df_filtered)} jeux</strong> entre <strong>{year_range[0]}</strong> et <strong>{year_range[1]}</strong></p>
-    <p style="color: #424242;">• Période couverte : {year_range[1] - year_range[0]} années</p>
-    <p style="color: #424242;">• Plateformes sélectionnées : {', '.join(selected_platforms)}</p>
-    <p style="color: #424242;">• Genres analysés : {', '.join(selected_genres)}</p>
-</div>
-""", unsafe_allow_html=True)
+@st.cache_resource
+def load_export_cache():
+    # Exports générés au clic, écrits par morceaux puis gardés sur disque par état de filtres et version
+    return ExportCache(exports_root("vgsales.csv"))
+
+@st.cache_resource
+def load_perf_report():
+    # Temps de démarrage et latence par page, agrégés sur tout le processus
+    return PerfReport()
+
+engine = load_engine()
+# Table vue par cette session : une écriture (colonne ajoutée, inplace...) ne modifie pas la table des autres sessions
+session_frame = shared_view(engine.df)
+figure_cache = load_figure_cache()
+export_cache = load_export_cache()
+perf_report = load_perf_report()
+data_version = engine.data_version
+
+def truncated_rows_note(agg):
+    """Avertit quand le graphique ne porte que sur les premières lignes de la sélection (mode streaming)"""
+    if not agg["rows_complete"]:
+        st.caption(f"⚠️ Calculé sur les {len(agg['rows']):,} premières lignes de la sélection "
+                   f"({agg['count']:,} au total)")
+
+
+# Distincts et quantiles : estimations avec IC 95 % en mode approché et en mode streaming
+def format_estimate(estimate, fmt):
+    value = fmt.format(estimate["value"])
+    if estimate["low"] == estimate["high"]:
+        return value
+    return f"≈ {value} (IC 95 % : {fmt.format(estimate['low'])} – {fmt.format(estimate['high'])})"
+
+
+def section_selection_profile(agg):
+    """Titres et éditeurs distincts, médiane et p90 des ventes de la sélection"""
+    col1, col2, col3 = st.columns(3)
+    quantiles = agg["sales_quantiles"]
+    col1.markdown(f"**Titres distincts** : {format_estimate(agg['distinct_titles'], '{:,.0f}')}")
+    col2.markdown(f"**Éditeurs distincts** : {format_estimate(agg['distinct_publishers'], '{:,.0f}')}")
+    col3.markdown(f"**Ventes médiane / p90** : {format_estimate(quantiles['median'], '{:.2f}M')} / "
+                  f"{format_estimate(quantiles['p90'], '{:.2f}M')}")
+
+
+# st.fragment (Streamlit >= 1.37) : sans lui, les sections s'exécutent comme de simples fonctions
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+# Sections : chaque graphique est un fragment, relancé seul quand ses propres contrôles changent
+# (les filtres globaux relancent tout, mais les sections retombent alors sur le cache de figures)
+@fragment
+def section_genre_sales(agg):
+    """Ventes globales par genre"""
+    import plotly.express as px
 
-# Navigation entre les pages
-if selected == "📊 Dashboard":
-    # Contenu du Dashboard principal
-    
     # --- Ventes mondiales par genre ---
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
     st.subheader("💡 Ventes globales par genre")
-    genre_sales = df_filtered.groupby("Genre")["Global_Sales"].sum().sort_values(ascending=False)
-
-    fig1 = px.bar(
-        x=genre_sales.values,
-        y=genre_sales.index,
-        orientation='h',
-        title="Ventes par genre (en millions)",
-        color=genre_sales.values,
-        color_continuous_scale="viridis",
-        labels={'x': 'Ventes (millions)', 'y': 'Genre'}
-    )
-    fig1.update_layout(
-        height=500,
-        showlegend=False,
-        title_font_size=16,
-        font=dict(size=12, color='#424242'),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)'
-    )
-    st.plotly_chart(fig1, use_container_width=True)
+    genre_sales = agg["genre_sales"]
+
+    def build_fig1():
+        fig1 = px.bar(
+            x=genre_sales.values,
+            y=genre_sales.index,
+            orientation='h',
+            title="Ventes par genre (en millions)",
+            color=genre_sales.values,
+            color_continuous_scale="viridis",
+            labels={'x': 'Ventes (millions)', 'y': 'Genre'}
+        )
+        fig1.update_layout(
+            height=500,
+            showlegend=False,
+            title_font_size=16,
+            font=dict(size=12, color='#424242'),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        return fig1
+    fig1 = figure_cache.plotly(("fig1", agg.key, data_version), build_fig1)
+    st.plotly_chart(plotly_figure(fig1), use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
+
+@fragment
+def section_top_games(agg):
+    """Top 10 jeux par ventes globales"""
+    import plotly.express as px
+
     # --- Top 10 jeux ---
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
     st.subheader("🏆 Top 10 jeux par ventes globales")
-    top_games = df_filtered.sort_values(by="Global_Sales", ascending=False).head(10)
-
-    fig2 = px.bar(
-        top_games,
-        x="Global_Sales",
-        y="Name",
-        orientation='h',
-        title="Top 10 des jeux les plus vendus",
-        color="Global_Sales",
-        color_continuous_scale="plasma",
-        labels={'Global_Sales': 'Ventes (millions)', 'Name': 'Jeu'}
-    )
-    fig2.update_layout(
-        height=500,
-        showlegend=False,
-        title_font_size=16,
-        font=dict(size=12, color='#424242'),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)'
-    )
-    st.plotly_chart(fig2, use_container_width=True)
+    top_games = agg["top_games"]
+
+    def build_fig2():
+        fig2 = px.bar(
+            top_games,
+            x="Global_Sales",
+            y="Name",
+            orientation='h',
+            title="Top 10 des jeux les plus vendus",
+            color="Global_Sales",
+            color_continuous_scale="plasma",
+            labels={'Global_Sales': 'Ventes (millions)', 'Name': 'Jeu'}
+        )
+        fig2.update_layout(
+            height=500,
+            showlegend=False,
+            title_font_size=16,
+            font=dict(size=12, color='#424242'),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        return fig2
+    fig2 = figure_cache.plotly(("fig2", agg.key, data_version), build_fig2)
+    st.plotly_chart(plotly_figure(fig2), use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
+
+@fragment
+def section_sales_by_year(agg):
+    """Ventes totales par année"""
+    import plotly.express as px
+
     # --- Ventes par année ---
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
     st.subheader("📈 Ventes totales par année")
-    sales_by_year = df_filtered.groupby("Year")["Global_Sales"].sum().reset_index()
-
-    fig3 = px.line(
-        sales_by_year,
-        x="Year",
-        y="Global_Sales",
-        title="Évolution des ventes par année",
-        markers=True,
-        line_shape="spline"
-    )
-    fig3.update_traces(
-        line=dict(color='#667eea', width=3),
-        marker=dict(size=8, color='#764ba2')
-    )
-    fig3.update_layout(
-        height=400,
-        title_font_size=16,
-        font=dict(size=12, color='#424242'),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        xaxis_title="Année",
-        yaxis_title="Ventes (millions)"
-    )
-    st.plotly_chart(fig3, use_container_width=True)
+    sales_by_year = agg["sales_by_year"]
+
+    def build_fig3():
+        fig3 = px.line(
+            sales_by_year,
+            x="Year",
+            y="Global_Sales",
+            title="Évolution des ventes par année",
+            markers=True,
+            line_shape="spline"
+        )
+        fig3.update_traces(
+            line=dict(color='#667eea', width=3),
+            marker=dict(size=8, color='#764ba2')
+        )
+        fig3.update_layout(
+            height=400,
+            title_font_size=16,
+            font=dict(size=12, color='#424242'),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            xaxis_title="Année",
+            yaxis_title="Ventes (millions)"
+        )
+        return fig3
+    fig3 = figure_cache.plotly(("fig3", agg.key, data_version), build_fig3)
+    st.plotly_chart(plotly_figure(fig3), use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
-elif selected == "🎯 Analyse":
-    # Page d'analyse détaillée
-    st.markdown('<div class="main-header"><h1>🎯 Analyse Détaillée</h1></div>', unsafe_allow_html=True)
-    
+
+@fragment
+def section_platform_share(agg):
+    """Répartition des ventes par plateforme"""
+    import plotly.express as px
+
     # --- Analyses par plateforme ---
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
     st.subheader("🎮 Répartition des ventes par plateforme")
-    platform_sales = df_filtered.groupby("Platform")["Global_Sales"].sum().sort_values(ascending=False).head(10)
+    platform_sales = agg["top_platforms"]
 
-    fig4 = px.pie(
-        values=platform_sales.values,
-        names=platform_sales.index,
-        title="Top 10 plateformes par ventes",
-        color_discrete_sequence=px.colors.qualitative.Set3
-    )
-    fig4.update_layout(
-        height=500,
-        title_font_size=16,
-        font=dict(size=12, color='#424242'),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)'
-    )
-    st.plotly_chart(fig4, use_container_width=True)
+    def build_fig4():
+        fig4 = px.pie(
+            values=platform_sales.values,
+            names=platform_sales.index,
+            title="Top 10 plateformes par ventes",
+            color_discrete_sequence=px.colors.qualitative.Set3
+        )
+        fig4.update_layout(
+            height=500,
+            title_font_size=16,
+            font=dict(size=12, color='#424242'),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        return fig4
+    fig4 = figure_cache.plotly(("fig4", agg.key, data_version), build_fig4)
+    st.plotly_chart(plotly_figure(fig4), use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
+
+@fragment
+def section_heatmap_plotly(agg):
+    """Heatmap Genre vs Plateforme (Plotly)"""
+    import plotly.express as px
+
     # --- Heatmap des ventes par genre et plateforme ---
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
     st.subheader("🔥 Heatmap Genre vs Plateforme (Plotly)")
     # Créer une matrice de corrélation
-    heatmap_data = df_filtered.groupby(["Genre", "Platform"])["Global_Sales"].sum().reset_index()
-    heatmap_pivot = heatmap_data.pivot(index="Genre", columns="Platform", values="Global_Sales").fillna(0)
+    heatmap_pivot = agg["genre_platform"]
     # Sélectionner les top plateformes pour éviter un graphique trop chargé
-    top_platforms = df_filtered.groupby("Platform")["Global_Sales"].sum().sort_values(ascending=False).head(8).index
+    top_platforms = agg["top_platforms"].head(8).index
     heatmap_pivot = heatmap_pivot[top_platforms]
-    fig5 = px.imshow(
-        heatmap_pivot,
-        aspect="auto",
-        color_continuous_scale="Viridis",
-        title="Ventes par Genre et Plateforme (Top 8 plateformes)"
-    )
-    fig5.update_layout(
-        height=500,
-        title_font_size=16,
-        font=dict(size=12, color='#424242'),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)'
-    )
-    st.plotly_chart(fig5, use_container_width=True)
+    def build_fig5():
+        fig5 = px.imshow(
+            heatmap_pivot,
+            aspect="auto",
+            color_continuous_scale="Viridis",
+            title="Ventes par Genre et Plateforme (Top 8 plateformes)"
+        )
+        fig5.update_layout(
+            height=500,
+            title_font_size=16,
+            font=dict(size=12, color='#424242'),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        return fig5
+    fig5 = figure_cache.plotly(("fig5", agg.key, data_version), build_fig5)
+    st.plotly_chart(plotly_figure(fig5), use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
+
+
+@fragment
+def section_heatmap_seaborn(agg):
+    """Heatmap Genre vs Plateforme (Seaborn/Matplotlib)"""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     # Ajout heatmap matplotlib/seaborn
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
     st.subheader("🔥 Heatmap Genre vs Plateforme (Seaborn/Matplotlib)")
-    top5_platforms = df_filtered.groupby("Platform")["Global_Sales"].sum().sort_values(ascending=False).head(5).index
-    heatmap_data2 = df_filtered[df_filtered["Platform"].isin(list(top5_platforms))]
-    pivot2 = heatmap_data2.pivot_table(index="Genre", columns="Platform", values="Global_Sales", aggfunc="sum", fill_value=0)
-    fig_sea, ax = plt.subplots(figsize=(8, 5))
-    sns.heatmap(pivot2, annot=True, fmt=".1f", cmap="Blues", ax=ax)
-    st.pyplot(fig_sea)
+    pivot2 = agg["heatmap_top5"]
+    def build_fig_sea():
+        fig_sea, ax = plt.subplots(figsize=(8, 5))
+        sns.heatmap(pivot2, annot=True, fmt=".1f", cmap="Blues", ax=ax)
+        return fig_sea
+    # Rendu matplotlib le plus coûteux de la page : PNG mémorisé par état de filtres
+    st.image(figure_cache.png(("fig_sea", agg.key, data_version), build_fig_sea), use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
+
+@fragment
+def section_critic_scatter(agg):
+    """Note critique vs ventes (zoom local)"""
     # --- Note critique vs ventes (si dispo) ---
-    if "Critic_Score" in df.columns:
+    if "Critic_Score" in engine.columns:
         st.markdown('<div class="chart-container">', unsafe_allow_html=True)
         st.subheader("🎯 Corrélation : Note critique vs Ventes")
-        df_score = df_filtered.dropna(subset=["Critic_Score"])
-        
-        fig6 = px.scatter(
-            df_score, 
-            x="Critic_Score", 
-            y="Global_Sales",
-            color="Genre",
-            size="Global_Sales",
-            hover_data=["Name", "Platform", "Year"],
-            title="Relation entre note critique et ventes",
-            labels={'Critic_Score': 'Note Critique', 'Global_Sales': 'Ventes (millions)'}
-        )
-        fig6.update_layout(
+        df_score = agg["rows"].dropna(subset=["Critic_Score"])
+        truncated_rows_note(agg)
+
+        # Au-delà du seuil de points, densité 2D : zoomer sur une plage de notes pour revoir les jeux
+        zoom_critic = None
+        if scatter_mode(len(df_score)) == "density":
+            with st.expander("🔎 Zoom sur une plage de notes"):
+                zoom_critic = st.slider("Note critique", 0, 100, (0, 100), key="zoom_fig6")
+        def build_fig6():
+            fig6 = adaptive_scatter(
+                df_score,
+                x="Critic_Score",
+                y="Global_Sales",
+                color="Genre",
+                size="Global_Sales",
+                hover_data=["Name", "Platform", "Year"],
+                title="Relation entre note critique et ventes",
+                labels={'Critic_Score': 'Note Critique', 'Global_Sales': 'Ventes (millions)'},
+                x_range=zoom_critic
+            )
+            fig6.update_layout(
+                height=500,
+                title_font_size=16,
+                font=dict(size=12, color='#424242'),
+                plot_bgcolor='rgba(0,0,0,0)',
+                paper_bgcolor='rgba(0,0,0,0)'
+            )
+            return fig6
+        fig6 = figure_cache.plotly(("fig6", agg.key, data_version, zoom_critic), build_fig6)
+        st.plotly_chart(plotly_figure(fig6), use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+
+@fragment
+def section_sales_distribution(agg):
+    """Distribution des ventes par genre, plateforme ou éditeur (boîtes, violons, centiles)"""
+    import plotly.graph_objects as go
+
+    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+    st.subheader("📦 Distribution des ventes")
+    col1, col2 = st.columns(2)
+    dimension = col1.radio("Regrouper par", ["Genre", "Plateforme", "Éditeur"], horizontal=True, key="dist_dim")
+    chart = col2.radio("Graphique", ["Boîtes", "Violons"], horizontal=True, key="dist_chart")
+    # Centiles lus dans les ventes pré-triées par modalité : aucun tri au changement de filtres
+    profile = agg[{"Genre": "genre_distribution", "Plateforme": "platform_distribution",
+                   "Éditeur": "publisher_distribution"}[dimension]]
+    truncated_rows_note(agg)
+    if profile.empty:
+        st.info("Aucune vente dans la sélection.")
+        st.markdown('</div>', unsafe_allow_html=True)
+        return
+
+    def build_fig_dist():
+        fig_dist = go.Figure()
+        for label, row in profile.iterrows():
+            if chart == "Boîtes":
+                # Boîtes précalculées : quartiles et moustaches (min / max) issus du profil
+                fig_dist.add_trace(go.Box(name=str(label), q1=[row["P25"]], median=[row["P50"]], q3=[row["P75"]],
+                                          lowerfence=[row["P0"]], upperfence=[row["P100"]]))
+            else:
+                # Violon tracé sur les 101 centiles : même forme que sur toutes les lignes
+                fig_dist.add_trace(go.Violin(name=str(label), y=row.drop("Count").to_numpy(dtype=float),
+                                             box_visible=True, meanline_visible=False, points=False))
+        fig_dist.update_layout(
             height=500,
+            title=f"Ventes par jeu selon {dimension.lower()} (échelle log)",
             title_font_size=16,
+            showlegend=False,
+            yaxis=dict(type="log", title="Ventes (millions)"),
             font=dict(size=12, color='#424242'),
             plot_bgcolor='rgba(0,0,0,0)',
             paper_bgcolor='rgba(0,0,0,0)'
         )
-        st.plotly_chart(fig6, use_container_width=True)
-        st.markdown('</div>', unsafe_allow_html=True)
+        return fig_dist
+    fig_dist = figure_cache.plotly(("fig_dist", agg.key, data_version, dimension, chart), build_fig_dist)
+    st.plotly_chart(plotly_figure(fig_dist), use_container_width=True)
+
+    # Moyenne ou médiane par modalité avec IC 95 % bootstrap (asymétriques)
+    boot = agg[{"Genre": "genre_bootstrap", "Plateforme": "platform_bootstrap",
+                "Éditeur": "publisher_bootstrap"}[dimension]]
+    statistic = st.radio("Statistique", ["Moyenne", "Médiane"], horizontal=True, key="dist_stat")
+    column = {"Moyenne": "Mean", "Médiane": "Median"}[statistic]
+
+    def build_fig_boot():
+        ordered = boot.sort_values(column, ascending=False)
+        fig_boot = go.Figure(go.Bar(
+            x=ordered.index.astype(str),
+            y=ordered[column],
+            error_y=dict(type="data", symmetric=False,
+                         array=ordered[f"{column}_High"] - ordered[column],
+                         arrayminus=ordered[column] - ordered[f"{column}_Low"]),
+            marker_color="#667eea",
+        ))
+        fig_boot.update_layout(
+            height=400,
+            title=f"{statistic} des ventes par jeu (IC 95 % bootstrap)",
+            title_font_size=16,
+            yaxis_title="Ventes (millions)",
+            font=dict(size=12, color='#424242'),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        return fig_boot
+    fig_boot = figure_cache.plotly(("fig_boot", agg.key, data_version, dimension, column), build_fig_boot)
+    st.plotly_chart(plotly_figure(fig_boot), use_container_width=True)
+
+    table = profile[["Count", "P10", "P25", "P50", "P75", "P90", "P99"]].rename(
+        columns={"Count": "Jeux", "P50": "Médiane"})
+    for label, stat in (("IC moyenne", "Mean"), ("IC médiane", "Median")):
+        low, high = boot[f"{stat}_Low"].reindex(table.index), boot[f"{stat}_High"].reindex(table.index)
+        table[label] = [f"{lo:.2f} – {hi:.2f}" for lo, hi in zip(low, high)]
+    st.dataframe(table.style.format({col: "{:.2f}" for col in table.columns if col.startswith("P") or col == "Médiane"}),
+                 use_container_width=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+
+@fragment
+def section_publishers_regions(agg):
+    """Éditeurs et répartition par région"""
+    import plotly.express as px
+    import plotly.graph_objects as go
 
     # --- Section d'analyse comparative ---
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
@@ -480,161 +637,485 @@ elif selected == "🎯 Analyse":
 
     with col1:
         # Top éditeurs
-        if "Publisher" in df.columns:
-            top_publishers = df_filtered.groupby("Publisher")["Global_Sales"].sum().sort_values(ascending=False).head(10)
-            fig8 = px.bar(
-                x=top_publishers.index,
-                y=top_publishers.values,
-                title="Top 10 éditeurs par ventes",
-                color=top_publishers.values,
-                color_continuous_scale="Blues"
-            )
-            fig8.update_layout(
-                height=400,
-                xaxis_tickangle=-45,
-                showlegend=False,
-                title_font_size=14,
-                font=dict(size=10, color='#424242'),
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)'
-            )
-            st.plotly_chart(fig8, use_container_width=True)
+        if "Publisher" in engine.columns:
+            top_publishers = agg["top_publishers"]
+            def build_fig8():
+                fig8 = px.bar(
+                    x=top_publishers.index,
+                    y=top_publishers.values,
+                    title="Top 10 éditeurs par ventes",
+                    color=top_publishers.values,
+                    color_continuous_scale="Blues"
+                )
+                fig8.update_layout(
+                    height=400,
+                    xaxis_tickangle=-45,
+                    showlegend=False,
+                    title_font_size=14,
+                    font=dict(size=10, color='#424242'),
+                    plot_bgcolor='rgba(0,0,0,0)',
+                    paper_bgcolor='rgba(0,0,0,0)'
+                )
+                return fig8
+            fig8 = figure_cache.plotly(("fig8", agg.key, data_version), build_fig8)
+            st.plotly_chart(plotly_figure(fig8), use_container_width=True)
 
     with col2:
         # Répartition des ventes par région
-        if all(col in df.columns for col in ["NA_Sales", "EU_Sales", "JP_Sales", "Other_Sales"]):
+        if all(col in engine.columns for col in ["NA_Sales", "EU_Sales", "JP_Sales", "Other_Sales"]):
             region_sales = {
-                "Amérique du Nord": df_filtered["NA_Sales"].sum(),
-                "Europe": df_filtered["EU_Sales"].sum(),
-                "Japon": df_filtered["JP_Sales"].sum(),
-                "Autres": df_filtered["Other_Sales"].sum()
+                "Amérique du Nord": agg["region_sales"]["NA_Sales"],
+                "Europe": agg["region_sales"]["EU_Sales"],
+                "Japon": agg["region_sales"]["JP_Sales"],
+                "Autres": agg["region_sales"]["Other_Sales"]
             }
-            fig9 = px.pie(
-                values=list(region_sales.values()),
-                names=list(region_sales.keys()),
-                title="Répartition des ventes par région",
-                color_discrete_sequence=px.colors.qualitative.Pastel
-            )
-            fig9.update_layout(
-                height=400,
-                title_font_size=14,
-                font=dict(size=10, color='#424242'),
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)'
-            )
-            st.plotly_chart(fig9, use_container_width=True)
+            def build_fig9():
+                fig9 = px.pie(
+                    values=list(region_sales.values()),
+                    names=list(region_sales.keys()),
+                    title="Répartition des ventes par région",
+                    color_discrete_sequence=px.colors.qualitative.Pastel
+                )
+                fig9.update_layout(
+                    height=400,
+                    title_font_size=14,
+                    font=dict(size=10, color='#424242'),
+                    plot_bgcolor='rgba(0,0,0,0)',
+                    paper_bgcolor='rgba(0,0,0,0)'
+                )
+                return fig9
+            fig9 = figure_cache.plotly(("fig9", agg.key, data_version), build_fig9)
+            st.plotly_chart(plotly_figure(fig9), use_container_width=True)
             # Ajout donut chart plotly.graph_objects
-            fig_go = go.Figure(data=[go.Pie(labels=list(region_sales.keys()), values=list(region_sales.values()), hole=.4)])
-            fig_go.update_layout(title_text="Répartition des ventes par région (Plotly GO)")
-            st.plotly_chart(fig_go, use_container_width=True)
+            def build_fig_go():
+                fig_go = go.Figure(data=[go.Pie(labels=list(region_sales.keys()), values=list(region_sales.values()), hole=.4)])
+                fig_go.update_layout(title_text="Répartition des ventes par région (Plotly GO)")
+                return fig_go
+            fig_go = figure_cache.plotly(("fig_go", agg.key, data_version), build_fig_go)
+            st.plotly_chart(plotly_figure(fig_go), use_container_width=True)
 
     st.markdown('</div>', unsafe_allow_html=True)
 
-elif selected == "📈 Tendances":
-    # Page des tendances
-    st.markdown('<div class="main-header"><h1>📈 Tendances & Évolutions</h1></div>', unsafe_allow_html=True)
-    
+
+@fragment
+def section_genre_trends(agg):
+    """Évolution des genres dans le temps"""
+    import plotly.express as px
+
     # --- Analyses temporelles avancées ---
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
     st.subheader("📊 Évolution des genres dans le temps")
     # Analyse de l'évolution des genres par année
-    genre_year = df_filtered.groupby(["Year", "Genre"])["Global_Sales"].sum().reset_index()
-    top_genres = df_filtered.groupby("Genre")["Global_Sales"].sum().sort_values(ascending=False).head(6).index
-    genre_year_filtered = genre_year[genre_year["Genre"].isin(list(top_genres))]
-
-    fig7 = px.line(
-        genre_year_filtered,
-        x="Year",
-        y="Global_Sales",
-        color="Genre",
-        title="Évolution des ventes par genre (Top 6 genres)",
-        markers=True
-    )
-    fig7.update_layout(
-        height=500,
-        title_font_size=16,
-        font=dict(size=12, color='#424242'),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        xaxis_title="Année",
-        yaxis_title="Ventes (millions)"
-    )
-    st.plotly_chart(fig7, use_container_width=True)
+    genre_year_filtered = agg["genre_year"]
+    # Tendance linéaire des dernières années prolongée de 3 ans, avec bande de prédiction à 95 %
+    show_forecast = st.checkbox("Afficher les prévisions", value=True, key="forecast_genres")
+
+    def build_fig7():
+        fig7 = px.line(
+            genre_year_filtered,
+            x="Year",
+            y="Global_Sales",
+            color="Genre",
+            title="Évolution des ventes par genre (Top 6 genres)",
+            markers=True
+        )
+        fig7.update_layout(
+            height=500,
+            title_font_size=16,
+            font=dict(size=12, color='#424242'),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            xaxis_title="Année",
+            yaxis_title="Ventes (millions)"
+        )
+        if show_forecast:
+            add_forecast_bands(fig7, agg["genre_forecast"], "Genre")
+        return fig7
+    fig7 = figure_cache.plotly(("fig7", agg.key, data_version, show_forecast), build_fig7)
+    st.plotly_chart(plotly_figure(fig7), use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
+
+@fragment
+def section_platform_cycles(agg):
+    """Cycles de vie des plateformes"""
+    import plotly.express as px
+
     # --- Analyse des cycles de plateformes ---
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
     st.subheader("🎮 Cycles de vie des plateformes")
-    platform_year = df_filtered.groupby(["Year", "Platform"])["Global_Sales"].sum().reset_index()
-    top_platforms_trend = df_filtered.groupby("Platform")["Global_Sales"].sum().sort_values(ascending=False).head(8).index
-    platform_year_filtered = platform_year[platform_year["Platform"].isin(list(top_platforms_trend))]
-
-    fig_platform = px.line(
-        platform_year_filtered,
-        x="Year",
-        y="Global_Sales",
-        color="Platform",
-        title="Évolution des ventes par plateforme (Top 8 plateformes)",
-        markers=True
-    )
-    fig_platform.update_layout(
-        height=500,
-        title_font_size=16,
-        font=dict(size=12, color='#424242'),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        xaxis_title="Année",
-        yaxis_title="Ventes (millions)"
-    )
-    st.plotly_chart(fig_platform, use_container_width=True)
-    st.markdown('</div>', unsafe_allow_html=True)
+    platform_year_filtered = agg["platform_year"]
+    show_forecast = st.checkbox("Afficher les prévisions", value=True, key="forecast_platforms")
 
-    # --- Analyse des scores utilisateurs vs critiques ---
-    if "User_Score" in df.columns and "Critic_Score" in df.columns:
-        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-        st.subheader("👥 Scores Utilisateurs vs Critiques")
-        df_both_scores = df_filtered.dropna(subset=["User_Score", "Critic_Score"])
-        
-        # Convertir User_Score en numérique si nécessaire
-        df_both_scores = df_both_scores.copy()
-        df_both_scores["User_Score"] = pd.to_numeric(df_both_scores["User_Score"], errors='coerce')
-        df_both_scores = df_both_scores.dropna(subset=["User_Score"])
-        df_both_scores["User_Score"] = df_both_scores["User_Score"] * 10  # Convertir en échelle 0-100
-
-        fig_scores = px.scatter(
-            df_both_scores, 
-            x="Critic_Score", 
-            y="User_Score",
-            color="Genre",
-            size="Global_Sales",
-            hover_data=["Name", "Platform", "Year"],
-            title="Corrélation entre scores critiques et utilisateurs",
-            labels={'Critic_Score': 'Score Critique', 'User_Score': 'Score Utilisateur'}
+    def build_fig_platform():
+        fig_platform = px.line(
+            platform_year_filtered,
+            x="Year",
+            y="Global_Sales",
+            color="Platform",
+            title="Évolution des ventes par plateforme (Top 8 plateformes)",
+            markers=True
         )
-        fig_scores.update_layout(
+        fig_platform.update_layout(
             height=500,
             title_font_size=16,
             font=dict(size=12, color='#424242'),
             plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)'
+            paper_bgcolor='rgba(0,0,0,0)',
+            xaxis_title="Année",
+            yaxis_title="Ventes (millions)"
         )
-        st.plotly_chart(fig_scores, use_container_width=True)
+        if show_forecast:
+            add_forecast_bands(fig_platform, agg["platform_forecast"], "Platform")
+        return fig_platform
+    fig_platform = figure_cache.plotly(("fig_platform", agg.key, data_version, show_forecast), build_fig_platform)
+    st.plotly_chart(plotly_figure(fig_platform), use_container_width=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+
+@fragment
+def section_user_vs_critic(agg):
+    """Scores utilisateurs vs critiques (zoom local)"""
+    # --- Analyse des scores utilisateurs vs critiques ---
+    if "User_Score" in engine.columns and "Critic_Score" in engine.columns:
+        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+        st.subheader("👥 Scores Utilisateurs vs Critiques")
+        # User_Score est déjà numérique (nettoyé au chargement)
+        df_both_scores = agg["rows"].dropna(subset=["User_Score", "Critic_Score"])
+        truncated_rows_note(agg)
+        df_both_scores = df_both_scores.assign(User_Score=df_both_scores["User_Score"] * 10)  # Convertir en échelle 0-100
+
+        zoom_scores = None
+        if scatter_mode(len(df_both_scores)) == "density":
+            with st.expander("🔎 Zoom sur une plage de scores"):
+                zoom_scores = st.slider("Score critique", 0, 100, (0, 100), key="zoom_fig_scores")
+        def build_fig_scores():
+            fig_scores = adaptive_scatter(
+                df_both_scores,
+                x="Critic_Score",
+                y="User_Score",
+                color="Genre",
+                size="Global_Sales",
+                hover_data=["Name", "Platform", "Year"],
+                title="Corrélation entre scores critiques et utilisateurs",
+                labels={'Critic_Score': 'Score Critique', 'User_Score': 'Score Utilisateur'},
+                x_range=zoom_scores
+            )
+            fig_scores.update_layout(
+                height=500,
+                title_font_size=16,
+                font=dict(size=12, color='#424242'),
+                plot_bgcolor='rgba(0,0,0,0)',
+                paper_bgcolor='rgba(0,0,0,0)'
+            )
+            return fig_scores
+        fig_scores = figure_cache.plotly(("fig_scores", agg.key, data_version, zoom_scores), build_fig_scores)
+        st.plotly_chart(plotly_figure(fig_scores), use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+
+# Pages : chaque page déclare les agrégats dont elle a besoin et enchaîne ses sections
+@fragment
+def section_title_search(agg):
+    """Recherche d'un jeu par titre (préfixe puis correspondance approchée) et fiche détaillée"""
+    if session_frame is None:
+        return
+    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+    st.subheader("🔎 Rechercher un jeu")
+    query = st.text_input("Titre", placeholder="ex. zelda, modern warfare…", key="title_query")
+    if not query.strip():
         st.markdown('</div>', unsafe_allow_html=True)
+        return
+    frame = session_frame
+    index = load_title_index(engine.data_version, frame)
+    results = index.search(query, k=10)
+    if results.empty:
+        st.info("Aucun titre ne correspond à la recherche.")
+        st.markdown('</div>', unsafe_allow_html=True)
+        return
+    title_id = st.selectbox("Résultats", results["Title_Id"].tolist(),
+                            format_func=lambda t: index.titles[t], key="title_result")
+
+    # Fiche du jeu : une ligne par plateforme
+    positions = index.positions(title_id)
+    columns = ["Name", "Platform", "Year", "Genre", "Publisher", "NA_Sales", "EU_Sales", "JP_Sales",
+               "Other_Sales", "Global_Sales", "Critic_Score", "User_Score", "Developer", "Rating"]
+    details = frame.iloc[positions]
+    st.dataframe(details[[col for col in columns if col in details.columns]], use_container_width=True, hide_index=True)
+
+    if engine.index is not None:
+        target = int(positions[0]) if len(positions) == 1 else st.selectbox(
+            "Version", [int(p) for p in positions],
+            format_func=lambda p: f"{frame['Platform'].iat[p]} ({frame['Year'].iat[p]})", key="title_version")
+        # Le rappel modifie le jeu de référence avant la réexécution complète de la page
+        if st.button("🎲 Voir les jeux similaires", on_click=lambda: st.session_state.update(similar_game=target)):
+            st.rerun()
+    st.markdown('</div>', unsafe_allow_html=True)
+
+
+@fragment
+def section_similar_games(agg):
+    """Jeux les plus proches d'un jeu choisi (ventes par région, notes, genre, plateforme)"""
+    # Index en mémoire requis (positions des lignes) : absent en mode streaming et avec les backends SQL
+    if engine.index is None:
+        return
+    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+    st.subheader("🎲 Jeux similaires")
+    frame = session_frame
+    choices = [int(p) for p in agg["game_choices"]]
+    chosen = st.session_state.get("similar_game")
+    if chosen is not None and chosen not in choices:
+        choices.insert(0, chosen)
+    if not choices:
+        st.info("Aucun jeu dans la sélection.")
+        st.markdown('</div>', unsafe_allow_html=True)
+        return
+    position = st.selectbox(
+        "Jeu de référence",
+        choices,
+        format_func=lambda p: f"{frame['Name'].iat[p]} ({frame['Platform'].iat[p]}, {frame['Year'].iat[p]})",
+        key="similar_game",
+    )
+    similar = load_similarity_index(engine.data_version, frame).similar_games(frame, position, k=10)
+    columns = ["Similarity", "Name", "Platform", "Year", "Genre", "Publisher",
+               "NA_Sales", "EU_Sales", "JP_Sales", "Other_Sales", "Global_Sales", "Critic_Score"]
+    st.dataframe(similar[[col for col in columns if col in similar.columns]].rename(columns={"Similarity": "Similarité"}),
+                 use_container_width=True, hide_index=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+
 
-    # --- Prédictions et insights ---
-    st.markdown("""
+def render_dashboard(agg):
+    """Page Dashboard : distincts et quantiles, genres, top 10 jeux, ventes par année"""
+    # Contenu du Dashboard principal
+    section_selection_profile(agg)
+    section_title_search(agg)
+    section_genre_sales(agg)
+    section_top_games(agg)
+    section_sales_by_year(agg)
+    section_similar_games(agg)
+
+
+def render_analyse(agg):
+    """Page Analyse : plateformes, heatmaps, scores, éditeurs et régions"""
+    # Page d'analyse détaillée
+    st.markdown('<div class="main-header"><h1>🎯 Analyse Détaillée</h1></div>', unsafe_allow_html=True)
+    section_platform_share(agg)
+    section_heatmap_plotly(agg)
+    section_heatmap_seaborn(agg)
+    section_critic_scatter(agg)
+    section_sales_distribution(agg)
+    section_publishers_regions(agg)
+
+
+def render_tendances(agg):
+    """Page Tendances : évolution des genres et plateformes, scores utilisateurs"""
+    # Page des tendances
+    st.markdown('<div class="main-header"><h1>📈 Tendances & Évolutions</h1></div>', unsafe_allow_html=True)
+    section_genre_trends(agg)
+    section_platform_cycles(agg)
+    section_user_vs_critic(agg)
+
+    # --- Prévisions : séries en plus forte hausse et en plus forte baisse ---
+    genre_trends, platform_trends = agg["genre_trends"], agg["platform_trends"]
+
+    def describe(trends):
+        if trends.empty:
+            return "—", "—"
+        rising = ", ".join(f"{label} ({slope:+.1f}M/an)" for label, slope in trends["Slope"].head(2).items() if slope > 0)
+        falling = ", ".join(f"{label} ({slope:+.1f}M/an)" for label, slope in trends["Slope"].tail(2)[::-1].items() if slope < 0)
+        return rising or "—", falling or "—"
+
+    genres_up, genres_down = describe(genre_trends)
+    platforms_up, platforms_down = describe(platform_trends)
+    st.markdown(f"""
     <div class="warning-box">
         <h4 style="color: #f57c00;">📊 Analyse des tendances</h4>
-        <p style="color: #424242;"><strong>Observations clés :</strong></p>
+        <p style="color: #424242;"><strong>Tendances ajustées sur les {FORECAST_WINDOW} dernières années sélectionnées :</strong></p>
         <ul style="color: #424242;">
-            <li><strong>Pic de l'industrie</strong> : Les années 2008-2009 marquent l'apogée des ventes</li>
-            <li><strong>Évolution des genres</strong> : Déclin des jeux de sport, montée du Action</li>
-            <li><strong>Cycles de plateformes</strong> : Durée de vie moyenne de 6-8 ans par génération</li>
-            <li><strong>Corrélation qualité-ventes</strong> : Relation positive mais non linéaire</li>
+            <li><strong>Genres en hausse</strong> : {genres_up}</li>
+            <li><strong>Genres en baisse</strong> : {genres_down}</li>
+            <li><strong>Plateformes en hausse</strong> : {platforms_up}</li>
+            <li><strong>Plateformes en baisse</strong> : {platforms_down}</li>
         </ul>
     </div>
     """, unsafe_allow_html=True)
 
+
+# Agrégats affichés sur toutes les pages (KPIs et encadré d'insights)
+COMMON_AGGREGATES = ["count", "total_sales", "avg_sales", "conf_interval", "top_genre"]
+# IC bootstrap de la carte "Ventes moyennes" : affiché en mode exact seulement
+EXACT_AGGREGATES = ["sales_bootstrap"]
+# Chaque page déclare tous les agrégats que lisent ses sections (test_streamlit_app.py le vérifie) ;
+# index_aggregates : lus seulement avec l'index bitmap en mémoire (jeux similaires)
+PAGES = {
+    "📊 Dashboard": {"aggregates": ["distinct_titles", "distinct_publishers", "sales_quantiles",
+                                   "genre_sales", "top_games", "sales_by_year"],
+                    "index_aggregates": ["game_choices"], "render": render_dashboard},
+    "🎯 Analyse": {"aggregates": ["top_platforms", "genre_platform", "heatmap_top5", "rows", "rows_complete",
+                                 "top_publishers", "region_sales",
+                                 "genre_distribution", "platform_distribution", "publisher_distribution",
+                                 "genre_bootstrap", "platform_bootstrap", "publisher_bootstrap"],
+                  "index_aggregates": [], "render": render_analyse},
+    "📈 Tendances": {"aggregates": ["genre_year", "platform_year", "rows", "rows_complete", "genre_forecast",
+                                   "platform_forecast", "genre_trends", "platform_trends"],
+                    "index_aggregates": [], "render": render_tendances},
+}
+
+# Sidebar améliorée avec navigation
+with st.sidebar:
+    st.markdown("<div style='text-align: center; padding: 1rem;'><h2 style='color: #667eea; margin: 0;'>🎮 Gaming Analytics</h2></div>", unsafe_allow_html=True)
+    
+    # Navigation menu
+    selected = option_menu(
+        menu_title=None,
+        options=list(PAGES),
+        icons=["bar-chart", "bullseye", "graph-up"],
+        menu_icon="cast",
+        default_index=0,
+        orientation="vertical",
+        styles={
+            "container": {"padding": "0!important", "background-color": "transparent"},
+            "icon": {"color": "#667eea", "font-size": "18px"},
+            "nav-link": {"font-size": "16px", "text-align": "left", "margin": "0px", "--hover-color": "#e3f2fd"},
+            "nav-link-selected": {"background-color": "#667eea"},
+        }
+    )
+    
+    st.markdown("---")
+    
+    # Filtres
+    st.markdown("### 🔍 Filtres")
+    # Bornes et modalités lues dans le cube : aucun scan de la table, y compris en mode streaming
+    year_range = st.slider("Année de sortie", engine.cube.year_min, engine.cube.year_max, (2000, 2015))
+    selected_platforms = st.multiselect("Plateforme(s)", options=engine.cube.platforms, default=["PS2", "X360", "PC"])
+    selected_genres = st.multiselect("Genre(s)", options=engine.cube.genres, default=["Action", "Shooter", "Sports"])
+    
+    # Statistiques rapides
+    st.markdown("---")
+    st.markdown("### 📊 Statistiques rapides")
+    total_games = engine.dataset_stats["total_games"]
+    total_sales = engine.dataset_stats["total_sales"]
+    avg_score = engine.dataset_stats["avg_score"]
+    
+    st.metric("Total Jeux", f"{total_games:,}")
+    st.metric("Ventes Totales", f"{total_sales:.1f}M")
+    if avg_score > 0:
+        st.metric("Score Moyen", f"{avg_score:.1f}/100")
+
+    # Mode approché (sketches) : par défaut sur les gros datasets, calcul exact à la demande
+    exact_mode = True
+    if engine.index is not None:
+        exact_mode = st.toggle("🎯 Mode exact", value=not use_approximate(total_games),
+                               help="Désactivé : distincts, quantiles, nuages de points et éditeurs "
+                                    "estimés depuis des sketches, avec intervalle de confiance à 95 %")
+
+    # Gain mémoire du schéma compact (mesuré à l'ingestion)
+    mem = memory_report("vgsales.csv")
+    if mem:
+        st.caption(f"💾 Mémoire : {mem['memory_before_mb']:.1f} Mo → {mem['memory_after_mb']:.1f} Mo")
+
+    # Rempli en fin de script avec les temps mesurés
+    perf_slot = st.empty()
+
+if not exact_mode:
+    engine = load_approx_engine(data_version, engine)
+    data_version = engine.data_version
+
+# Filtrage : tous les agrégats de la sélection sont calculés en une passe par le moteur
+agg = engine.run(year_range, selected_platforms, selected_genres).prefetch(
+    COMMON_AGGREGATES + (EXACT_AGGREGATES if exact_mode else []))
+n_games = agg["count"]
+
+# Titre principal avec design amélioré
+st.markdown('<div class="main-header"><h1>🎮 Gaming Analytics Dashboard</h1></div>', unsafe_allow_html=True)
+
+# Métriques principales
+col1, col2, col3, col4 = st.columns(4)
+
+with col1:
+    st.markdown(f"""
+    <div class="metric-card">
+        <div class="metric-value">{n_games:,}</div>
+        <div class="metric-label">Jeux analysés</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+with col2:
+    total_sales_filtered = agg["total_sales"]
+    st.markdown(f"""
+    <div class="metric-card">
+        <div class="metric-value">{total_sales_filtered:.1f}M</div>
+        <div class="metric-label">Ventes totales</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+with col3:
+    avg_sales = agg["avg_sales"]
+    st.markdown(f"""
+    <div class="metric-card">
+        <div class="metric-value">{avg_sales:.2f}M</div>
+        <div class="metric-label">Ventes moyennes</div>
+    </div>
+    """, unsafe_allow_html=True)
+    if exact_mode and agg["sales_bootstrap"]:
+        # IC bootstrap (percentiles) : asymétrique, adapté à la distribution très étalée des ventes
+        boot = agg["sales_bootstrap"]
+        st.markdown(f"<div style='font-size:0.9rem;color:#1976d2;'>IC 95% (bootstrap) : {boot['Mean_Low']:.2f}M – {boot['Mean_High']:.2f}M</div>",
+                    unsafe_allow_html=True)
+    else:
+        # Ajout intervalle de confiance (écart-type via la somme des carrés du cube)
+        conf_interval = agg["conf_interval"]  # 95% confidence
+        st.markdown(f"<div style='font-size:0.9rem;color:#1976d2;'>IC 95% : ±{conf_interval:.2f}M</div>", unsafe_allow_html=True)
+
+with col4:
+    top_genre = agg["top_genre"]
+    st.markdown(f"""
+    <div class="metric-card">
+        <div class="metric-value">{top_genre}</div>
+        <div class="metric-label">Genre dominant</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+if not exact_mode:
+    st.caption("⚡ Mode approché : nuages de points sur un échantillon stratifié, top éditeurs estimé")
+
+# Insight box
+st.markdown(f"""
+<div class="insight-box">
+    <h4 style="color: #1976d2;">📈 Insights clés</h4>
+    <p style="color: #424242;">Analyse de <strong>{n_games} jeux</strong> entre <strong>{year_range[0]}</strong> et <strong>{year_range[1]}</strong></p>
+    <p style="color: #424242;">• Période couverte : {year_range[1] - year_range[0]} années</p>
+    <p style="color: #424242;">• Plateformes sélectionnées : {', '.join(selected_platforms)}</p>
+    <p style="color: #424242;">• Genres analysés : {', '.join(selected_genres)}</p>
+</div>
+""", unsafe_allow_html=True)
+
+# Navigation entre les pages : seuls les agrégats déclarés par la page sont calculés
+page = PAGES[selected]
+page_aggregates = page["aggregates"] + (page["index_aggregates"] if engine.index is not None else [])
+page["render"](agg.prefetch(page_aggregates))
+
+# --- Export des données filtrées et des agrégats ---
+EXPORT_LABELS = {
+    "rows": "Lignes filtrées", "genre_sales": "Ventes par genre", "platform_sales": "Ventes par plateforme",
+    "sales_by_year": "Ventes par année", "region_sales": "Ventes par région", "top_games": "Top 10 jeux",
+    "top_publishers": "Top 10 éditeurs", "genre_platform": "Matrice genre × plateforme",
+    "genre_year": "Genres par année", "platform_year": "Plateformes par année",
+}
+with st.expander("📥 Exporter les données"):
+    col1, col2 = st.columns(2)
+    export_name = col1.selectbox("Contenu", list(EXPORT_LABELS), format_func=EXPORT_LABELS.get, key="export_name")
+    export_format = col2.selectbox("Format", available_formats(), format_func=str.upper, key="export_format")
+    # Fichier généré seulement au clic (données passées en fonction), par morceaux : toute la sélection, sans plafond
+    st.download_button(
+        "⬇️ Télécharger",
+        data=partial(export_cache.open, data_version, export_name, agg.key, export_format,
+                     export_sources(engine, agg)[export_name]),
+        file_name=f"vgsales-{export_name}.{EXPORT_EXTENSIONS[export_format]}",
+        mime=EXPORT_FORMATS[export_format],
+        on_click="ignore",
+    )
+
 # --- Recommandations et insights ---
 st.markdown("""
 <div class="warning-box">
@@ -662,3 +1143,10 @@ st.markdown("""
     </p>
 </div>
 """, unsafe_allow_html=True)
+
+# Agrégats calculés pendant ce rerun écrits dans la vue matérialisée (redémarrages à chaud)
+engine.persist(agg)
+
+# Rapport de performance : démarrage à froid et latence par page
+perf_report.record(selected, time.perf_counter() - _script_start)
+perf_slot.caption(perf_report.format_summary())
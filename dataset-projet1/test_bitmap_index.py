@@ -0,0 +1,65 @@
+"""
+Index bitmap : sélections et extension en fin de table comparées à un masque pandas
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from bitmap_index import BitmapIndex, sparse_positions
+from data_store import ingest_csv
+
+CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vgsales.csv")
+
+FILTERS = [
+    ((2000, 2015), ["PS2", "X360", "PC"], ["Action", "Shooter", "Sports"]),
+    ((1980, 2020), ["Wii", "DS", "GB", "NES"], ["Platform", "Puzzle", "Role-Playing", "Misc"]),
+    ((2010, 2010), ["PS3"], ["Racing"]),
+    ((2000, 2015), ["PS2"], []),
+    ((2030, 2040), ["PS2"], ["Action"]),
+    ((2000, 2015), ["PS2", "Inconnue"], ["Action"]),
+]
+
+
+@pytest.fixture(scope="module")
+def games():
+    return ingest_csv(CSV)[0]
+
+
+def expected_positions(games, year_range, platforms, genres):
+    mask = games["Year"].between(*year_range) & games["Platform"].isin(platforms) & games["Genre"].isin(genres)
+    return np.flatnonzero(mask.to_numpy())
+
+
+@pytest.mark.parametrize("key", FILTERS)
+def test_resolve_matches_mask(games, key):
+    """Positions du bitmap résolu = lignes du masque pandas, dans l'ordre"""
+    index = BitmapIndex(games)
+    bits = index.resolve(*key)
+    assert bits.dtype == np.uint8 and len(bits) == index.n_bytes
+    np.testing.assert_array_equal(index.to_positions(bits), expected_positions(games, *key))
+
+
+@pytest.mark.parametrize("split", [0, 1, 8, 4321, 16000])
+def test_extended_matches_rebuild(games, split):
+    """Index étendu ligne à ligne (octet de tête partiel compris) = index reconstruit"""
+    head, tail = games.iloc[:split], games.iloc[split:]
+    extended = BitmapIndex(head).extended(tail)
+    rebuilt = BitmapIndex(games)
+    assert extended.n_rows == rebuilt.n_rows
+    for col, bitmaps in rebuilt.bitmaps.items():
+        assert set(extended.bitmaps[col]) == set(bitmaps)
+        for value, bits in bitmaps.items():
+            np.testing.assert_array_equal(extended.bitmaps[col][value], bits)
+    for key in FILTERS:
+        np.testing.assert_array_equal(extended.positions(*key), expected_positions(games, *key))
+
+
+@pytest.mark.parametrize("n_rows", [1, 7, 64, 65, 4321])
+def test_sparse_positions_matches_unpack(n_rows):
+    """Positions lues mot par mot = décompression complète, bitmap complémenté compris"""
+    bits = np.packbits(np.random.default_rng(n_rows).random(n_rows) < 0.05)
+    for packed in (bits, ~bits):
+        np.testing.assert_array_equal(sparse_positions(packed, n_rows),
+                                      np.flatnonzero(np.unpackbits(packed, count=n_rows)))
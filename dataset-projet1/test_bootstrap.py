@@ -0,0 +1,74 @@
+"""
+Bootstrap vectorisé : distributions rééchantillonnées comparées à un bootstrap naïf (tirage des lignes)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bootstrap import bootstrap_means, bootstrap_medians, bootstrap_table
+
+N_BOOT = 4000
+# Groupes de tailles paires et impaires, dont un groupe d'une seule ligne
+COUNTS = np.array([1, 2, 7, 40, 301, 2000])
+
+
+@pytest.fixture(scope="module")
+def segments():
+    """Ventes (log-normales, comme les vraies) triées par groupe : (valeurs, débuts, effectifs)"""
+    rng = np.random.default_rng(0)
+    groups = [np.sort(rng.lognormal(-1, 1.2, size=c)) for c in COUNTS]
+    starts = np.r_[0, np.cumsum(COUNTS)[:-1]]
+    return np.concatenate(groups), starts, COUNTS
+
+
+def naive(values, starts, counts, statistic, rng):
+    """Bootstrap de référence : n lignes tirées avec remise, statistique recalculée à chaque réplication"""
+    out = np.empty((len(counts), N_BOOT))
+    for g, (s, c) in enumerate(zip(starts, counts)):
+        segment = values[s:s + c]
+        out[g] = statistic(segment[rng.integers(c, size=(N_BOOT, c))], axis=1)
+    return out
+
+
+@pytest.mark.parametrize("statistic, vectorized", [(np.median, bootstrap_medians), (np.mean, bootstrap_means)])
+def test_matches_naive_bootstrap(segments, statistic, vectorized):
+    """Quantiles des distributions bootstrap proches de ceux du tirage naïf"""
+    values, starts, counts = segments
+    fast = vectorized(values, starts, counts, N_BOOT, np.random.default_rng(1))
+    slow = naive(values, starts, counts, statistic, np.random.default_rng(2))
+    assert fast.shape == (len(counts), N_BOOT)
+    for g in range(len(counts)):
+        segment = values[starts[g]:starts[g] + counts[g]]
+        assert fast[g].min() >= segment.min() and fast[g].max() <= segment.max()
+        if counts[g] <= 7:
+            # Petits groupes : loi discrète, mêmes fréquences pour chaque valeur atteinte
+            support = np.union1d(fast[g], slow[g])
+            freq = lambda x: (x[:, None] == support).mean(axis=0)
+            np.testing.assert_allclose(freq(fast[g]), freq(slow[g]), atol=0.03)
+            continue
+        # Écart toléré : quelques pourcents de l'étendue du groupe (bruit Monte-Carlo des deux côtés)
+        tolerance = 0.05 * (segment.max() - segment.min())
+        for q in (0.025, 0.25, 0.5, 0.75, 0.975):
+            assert abs(np.quantile(fast[g], q) - np.quantile(slow[g], q)) <= tolerance, (g, q)
+
+
+def test_table_matches_pandas(segments):
+    """Moyenne et médiane = groupby pandas ; IC encadrent la valeur ; résultat reproductible (graine)"""
+    values, starts, counts = segments
+    labels = [f"G{i}" for i in range(len(counts))]
+    table = bootstrap_table(labels, values, starts, counts, "Genre")
+    frame = pd.DataFrame({"Genre": np.repeat(labels, counts), "Global_Sales": values})
+    expected = frame.groupby("Genre")["Global_Sales"].agg(["mean", "median", "size"]).loc[labels]
+    np.testing.assert_allclose(table["Mean"], expected["mean"], rtol=1e-12)
+    np.testing.assert_allclose(table["Median"], expected["median"], rtol=1e-12)
+    np.testing.assert_array_equal(table["Count"], expected["size"])
+    for stat in ("Mean", "Median"):
+        assert (table[f"{stat}_Low"] <= table[stat] + 1e-12).all()
+        assert (table[f"{stat}_High"] >= table[stat] - 1e-12).all()
+    pd.testing.assert_frame_equal(table, bootstrap_table(labels, values, starts, counts, "Genre"))
+
+
+def test_empty_table():
+    table = bootstrap_table([], np.zeros(0), np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp), "Genre")
+    assert table.empty and "Median_High" in table.columns
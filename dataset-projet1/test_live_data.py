@@ -0,0 +1,145 @@
+"""
+Deltas appliqués à chaud : structures mises à jour comparées à une reconstruction complète
+"""
+
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bitmap_index import BitmapIndex
+from data_store import shared_view
+from live_data import LiveDataset, deltas_dir
+from sales_cube import SalesCube
+
+CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vgsales.csv")
+
+# Jeux existants dont les ventes changent, puis nouveaux jeux (dont une plateforme absente du cube)
+UPDATES = pd.DataFrame({
+    "Name": ["Wii Sports", "Super Mario Bros.", "Mario Kart Wii"],
+    "Platform": ["Wii", "NES", "Wii"],
+    "NA_Sales": [42.0, 30.0, 16.0],
+    "Global_Sales": [83.5, 41.0, 36.0],
+})
+INSERTS = pd.DataFrame({
+    "Name": ["Nouveau Jeu", "Jeu Futur", "Wii Sports"],
+    "Platform": ["PS4", "PS6", "Wii"],
+    "Year_of_Release": [2014, 2016, 2006],
+    "Genre": ["Action", "Shooter", "Sports"],
+    "Publisher": ["Éditeur Test", "Nintendo", "Nintendo"],
+    "NA_Sales": [1.0, 2.0, 43.0],
+    "EU_Sales": [0.5, 1.0, 29.0],
+    "JP_Sales": [0.1, 0.2, 3.8],
+    "Other_Sales": [0.2, 0.3, 8.5],
+    "Global_Sales": [1.8, 3.5, 84.3],
+})
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = str(tmp_path / "vgsales.csv")
+    shutil.copyfile(CSV, path)
+    os.makedirs(deltas_dir(path))
+    return path
+
+
+def write_deltas(csv_path, *deltas):
+    for i, delta in enumerate(deltas):
+        delta.to_csv(os.path.join(deltas_dir(csv_path), f"{i:03d}.csv"), index=False)
+
+
+def test_deltas_match_rebuild(csv_path):
+    """Cube, bitmaps et top éditeurs mis à jour par delta = structures reconstruites sur la table finale"""
+    live = LiveDataset(csv_path)
+    base_rows = len(live.engine.df)
+    write_deltas(csv_path, UPDATES, INSERTS)
+    assert live.refresh(force=True)
+    engine = live.engine
+    frame = engine.df
+
+    # Table finale : ventes remplacées par clé, jeux inconnus ajoutés en fin
+    assert len(frame) == base_rows + 2
+    last = frame.drop_duplicates(subset=["Name", "Platform"], keep="last").set_index(["Name", "Platform"])
+    assert float(last.loc[("Wii Sports", "Wii"), "Global_Sales"]) == pytest.approx(84.3, abs=1e-4)
+    assert float(last.loc[("Super Mario Bros.", "NES"), "Global_Sales"]) == pytest.approx(41.0, abs=1e-4)
+    assert list(frame["Name"].iloc[-2:].astype(str)) == ["Nouveau Jeu", "Jeu Futur"]
+
+    rebuilt = SalesCube(frame)
+    assert engine.cube.platforms == rebuilt.platforms and engine.cube.genres == rebuilt.genres
+    np.testing.assert_allclose(engine.cube.cube, rebuilt.cube, rtol=1e-6, atol=1e-6)
+    index = BitmapIndex(frame)
+    for col, bitmaps in index.bitmaps.items():
+        assert set(engine.index.bitmaps[col]) == set(bitmaps)
+        for value, bits in bitmaps.items():
+            np.testing.assert_array_equal(engine.index.bitmaps[col][value], bits)
+
+    key = ((2000, 2020), ["Wii", "NES", "PS4", "PS6"], ["Sports", "Platform", "Racing", "Action", "Shooter"])
+    result = engine.run(*key)
+    mask = frame["Year"].between(*key[0]) & frame["Platform"].isin(key[1]) & frame["Genre"].isin(key[2])
+    expected = (frame[mask].groupby(frame[mask]["Publisher"].astype(str))["Global_Sales"].sum()
+                .astype(np.float64).sort_values(ascending=False, kind="stable").head(10))
+    assert list(result["top_publishers"].index) == list(expected.index)
+    np.testing.assert_allclose(result["top_publishers"].to_numpy(), expected.to_numpy(), rtol=1e-6)
+    assert result["count"] == int(mask.sum())
+
+
+def test_version_follows_content(csv_path):
+    """Même contenu ⇒ même version : après compaction, après redémarrage, et après retour aux valeurs du CSV"""
+    base = LiveDataset(csv_path)
+    base_version = base.data_version
+    write_deltas(csv_path, UPDATES, INSERTS)
+    base.refresh(force=True)
+    version = base.data_version
+    assert version != base_version
+
+    base.compact()
+    assert base.data_version == version
+    assert os.listdir(deltas_dir(csv_path)) == ["001.compacted.csv"]
+    assert LiveDataset(csv_path).data_version == version
+
+    # Les ventes d'origine remises en place : on retombe sur la version du CSV
+    shutil.rmtree(deltas_dir(csv_path))
+    os.makedirs(deltas_dir(csv_path))
+    fresh = LiveDataset(csv_path)
+    frame = fresh.engine.df
+    keys = frame.drop_duplicates(subset=["Name", "Platform"], keep="last").set_index(["Name", "Platform"])
+    revert = UPDATES[["Name", "Platform"]].assign(
+        NA_Sales=[float(keys.loc[(n, p), "NA_Sales"]) for n, p in zip(UPDATES["Name"], UPDATES["Platform"])],
+        Global_Sales=[float(keys.loc[(n, p), "Global_Sales"]) for n, p in zip(UPDATES["Name"], UPDATES["Platform"])],
+    )
+    write_deltas(csv_path, UPDATES, revert)
+    fresh.refresh(force=True)
+    assert fresh.data_version == base_version
+
+
+def test_update_only_delta_with_unknown_key(csv_path):
+    """Delta de mises à jour seules (sans Year ni Genre) dont une clé est inconnue : ligne écartée, le reste appliqué une fois"""
+    live = LiveDataset(csv_path)
+    base_rows = len(live.engine.df)
+    unknown = pd.DataFrame({"Name": ["Jeu Inconnu"], "Platform": ["Wii"], "NA_Sales": [1.0], "Global_Sales": [2.0]})
+    write_deltas(csv_path, pd.concat([UPDATES, unknown], ignore_index=True))
+    assert live.refresh(force=True)
+    frame = live.engine.df
+    assert len(frame) == base_rows and live.rejected_rows == 1
+    last = frame.drop_duplicates(subset=["Name", "Platform"], keep="last").set_index(["Name", "Platform"])
+    assert float(last.loc[("Wii Sports", "Wii"), "Global_Sales"]) == pytest.approx(83.5, abs=1e-4)
+    np.testing.assert_allclose(live.engine.cube.cube, SalesCube(frame).cube, rtol=1e-6, atol=1e-6)
+
+    # Delta noté comme appliqué : un nouveau refresh ne rejoue rien, et le redémarrage donne le même état
+    assert not live.refresh(force=True)
+    restarted = LiveDataset(csv_path)
+    assert restarted.data_version == live.data_version and len(restarted.engine.df) == base_rows
+
+
+def test_session_view_leaves_shared_frame_intact(csv_path):
+    """Écritures d'une session sur sa vue (colonne, .loc, inplace) : table du moteur partagé inchangée"""
+    live = LiveDataset(csv_path)
+    shared = live.engine.df
+    before = shared.copy()
+    view = shared_view(shared)
+    view["Ratio"] = view["NA_Sales"] / view["Global_Sales"]
+    view.loc[0, "Global_Sales"] = -1.0
+    view.drop(columns=["Publisher"], inplace=True)
+    pd.testing.assert_frame_equal(live.engine.df, before)
@@ -0,0 +1,42 @@
+"""
+Group-by parallèle : sommes partielles du pool de processus comparées à np.bincount
+"""
+
+import numpy as np
+import pytest
+
+import parallel
+from parallel import group_sums, worker_count
+
+
+@pytest.fixture
+def small_partitions(monkeypatch):
+    # Partitions de quelques milliers de lignes : le pool sert dès un petit tableau
+    monkeypatch.setattr(parallel, "MIN_PARTITION_ROWS", 1_000)
+
+
+def test_worker_count_thresholds():
+    assert worker_count(10, workers=4) == 1
+    assert worker_count(parallel.PARALLEL_MIN_ROWS, workers=4) == 4
+    assert worker_count(parallel.PARALLEL_MIN_ROWS, workers=1) == 1
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_pooled_sums_match_bincount(small_partitions, workers):
+    """Même résultat que le chemin mono-cœur, mesures comptées (None) et pondérées mélangées"""
+    rng = np.random.default_rng(workers)
+    n_rows, size = 10_007, 97
+    codes = rng.integers(0, size - 1, n_rows)  # dernier groupe vide : minlength respecté
+    weights = [rng.random(n_rows), None, rng.normal(size=n_rows).astype(np.float32)]
+    assert worker_count(n_rows, workers, min_rows=1) == workers
+    pooled = group_sums(codes, weights, size, workers=workers, min_rows=1)
+    expected = np.stack([np.bincount(codes, weights=w, minlength=size) for w in weights])
+    assert pooled.shape == (len(weights), size)
+    np.testing.assert_allclose(pooled, expected, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(group_sums(codes, weights, size, workers=1), expected, rtol=1e-12)
+
+
+def test_pooled_counts_only(small_partitions):
+    codes = np.repeat(np.arange(5), 2_000)
+    np.testing.assert_array_equal(group_sums(codes, [None], 6, workers=2, min_rows=1),
+                                  [[2_000] * 5 + [0]])
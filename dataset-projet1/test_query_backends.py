@@ -0,0 +1,119 @@
+"""
+Parité des backends de requêtes : pandas (référence), SQL embarqué et moteur cube + bitmaps
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bitmap_index import BitmapIndex
+from data_store import ingest_csv
+from query_backend import BackendAggregateEngine, PandasBackend, SQLBackend, make_backend
+from query_engine import AggregateEngine
+from sales_cube import SalesCube
+
+CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vgsales.csv")
+
+FILTERS = [
+    ((2000, 2015), ["PS2", "X360", "PC"], ["Action", "Shooter", "Sports"]),
+    ((1980, 2020), ["Wii", "DS", "GB", "NES"], ["Platform", "Puzzle", "Role-Playing", "Misc"]),
+    ((2010, 2010), ["PS3"], ["Racing"]),
+    ((2000, 2015), ["PS2"], []),
+    ((2030, 2040), ["PS2"], ["Action"]),
+]
+AGGREGATES = ["count", "total_sales", "avg_sales", "conf_interval", "top_genre", "region_sales",
+              "genre_sales", "platform_sales", "top_platforms", "sales_by_year", "genre_platform",
+              "heatmap_top5", "genre_year", "platform_year", "top_games", "top_publishers", "rows"]
+
+
+@pytest.fixture(scope="module")
+def games():
+    return ingest_csv(CSV)[0]
+
+
+@pytest.fixture(scope="module")
+def backends(games):
+    return [PandasBackend(games), SQLBackend(games)]
+
+
+def assert_same(expected, actual):
+    """Égalité aux arrondis flottants près, quel que soit le type de résultat"""
+    if isinstance(expected, pd.DataFrame):
+        expected, actual = expected.reset_index(drop=True), actual.reset_index(drop=True)
+        assert list(expected.columns) == list(actual.columns)
+        for col in expected.columns:
+            assert_same(expected[col], actual[col])
+    elif isinstance(expected, pd.Series):
+        assert [str(v) for v in expected.index] == [str(v) for v in actual.index]
+        if pd.api.types.is_numeric_dtype(expected.dtype):
+            np.testing.assert_allclose(expected.to_numpy(dtype=np.float64), actual.to_numpy(dtype=np.float64),
+                                       rtol=1e-9, atol=1e-6)
+        else:
+            assert expected.astype(str).tolist() == actual.astype(str).tolist()
+    elif isinstance(expected, dict):
+        assert expected.keys() == actual.keys()
+        for key in expected:
+            assert_same(expected[key], actual[key])
+    elif isinstance(expected, float):
+        np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-6)
+    else:
+        assert expected == actual
+
+
+@pytest.mark.parametrize("key", FILTERS)
+def test_cells_match(backends, key):
+    """Mêmes cellules Year × Genre × Platform et mêmes mesures"""
+    reference, sql = backends
+    expected, actual = reference.cells(*key), sql.cells(*key)
+    assert len(expected) == len(actual)
+    if len(expected):
+        assert_same(expected.astype({"Year": "int64"}), actual.astype({"Year": "int64"}))
+
+
+@pytest.mark.parametrize("key", FILTERS)
+def test_top_games_and_publishers_match(backends, key):
+    """Mêmes top 10 jeux et éditeurs, égalités départagées de la même façon"""
+    reference, sql = backends
+    assert reference.top_games(*key)["Name"].astype(str).tolist() == sql.top_games(*key)["Name"].astype(str).tolist()
+    assert_same(reference.top_publishers(*key), sql.top_publishers(*key))
+
+
+@pytest.mark.parametrize("key", FILTERS)
+def test_rows_match(backends, key):
+    """Mêmes lignes de détail, dans l'ordre du fichier"""
+    reference, sql = backends
+    expected, actual = reference.rows(*key), sql.rows(*key)
+    assert len(expected) == len(actual)
+    for col in ["Name", "Platform", "Year", "Genre", "Global_Sales", "Critic_Score"]:
+        assert expected[col].astype(str).tolist() == actual[col].astype(str).tolist()
+
+
+@pytest.mark.parametrize("name", ["pandas", "sql"])
+@pytest.mark.parametrize("key", FILTERS)
+def test_engine_matches_cube(games, name, key):
+    """Les agrégats du dashboard sont identiques quel que soit le backend"""
+    cube = SalesCube(games)
+    reference = AggregateEngine(games, cube, BitmapIndex(games)).run(*key)
+    backend = BackendAggregateEngine(games, cube, make_backend(name, games)).run(*key)
+    for aggregate in AGGREGATES:
+        expected, actual = reference[aggregate], backend[aggregate]
+        if aggregate in ("top_games", "rows"):
+            assert expected["Name"].astype(str).tolist() == actual["Name"].astype(str).tolist()
+        elif aggregate == "count" or not (isinstance(expected, float) and np.isnan(expected)):
+            assert_same(expected, actual)
+
+
+def test_unknown_backend(games):
+    with pytest.raises(ValueError):
+        make_backend("oracle", games)
+
+
+@pytest.mark.parametrize("key", FILTERS)
+def test_row_batches_cover_rows(backends, key):
+    """Lots de l'export (petits lots, curseur SQL) = toutes les lignes de la sélection, dans l'ordre"""
+    for backend in backends:
+        batches = list(backend.row_batches(*key, chunk_rows=500))
+        assert batches and all(len(batch) <= 500 for batch in batches)
+        assert_same(backend.rows(*key), pd.concat(batches, ignore_index=True))
@@ -0,0 +1,84 @@
+"""
+Cube Year × Genre × Platform : fenêtres par sommes cumulées comparées à un groupby pandas
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_store import ingest_csv
+from sales_cube import MEASURES, REGION_COLUMNS, SalesCube
+
+CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vgsales.csv")
+
+FILTERS = [
+    ((2000, 2015), ["PS2", "X360", "PC"], ["Action", "Shooter", "Sports"]),
+    ((1980, 2020), ["Wii", "DS", "GB", "NES"], ["Platform", "Puzzle", "Role-Playing", "Misc"]),
+    ((2010, 2010), ["PS3"], ["Racing"]),
+    ((1970, 1985), ["NES", "2600"], ["Action", "Platform"]),
+    ((2030, 2040), ["PS2"], ["Action"]),
+    ((2000, 2015), ["PS2", "Inconnue"], ["Action", "Inconnu"]),
+]
+
+
+@pytest.fixture(scope="module")
+def games():
+    return ingest_csv(CSV)[0]
+
+
+@pytest.fixture(scope="module")
+def cube(games):
+    return SalesCube(games)
+
+
+def selection(games, year_range, platforms, genres):
+    mask = (games["Year"].between(*year_range) & games["Platform"].isin(platforms) & games["Genre"].isin(genres))
+    rows = games[mask].astype({"Genre": str, "Platform": str})
+    return rows.assign(Count=1.0, Global_Sales_Sq=rows["Global_Sales"].astype(np.float64) ** 2)
+
+
+@pytest.mark.parametrize("key", FILTERS)
+def test_window_matches_groupby(games, cube, key):
+    """Sommes Genre × Platform de la fenêtre d'années = groupby des lignes filtrées"""
+    window = cube.window(*key)
+    genre_labels, platform_labels = cube.labels(key[1], key[2])
+    assert window.shape == (len(MEASURES), len(genre_labels), len(platform_labels))
+    expected = selection(games, *key).groupby(["Genre", "Platform"])[MEASURES].sum()
+    for m, measure in enumerate(MEASURES):
+        table = pd.DataFrame(window[m], index=genre_labels, columns=platform_labels)
+        stacked = table.stack()
+        reference = expected[measure].reindex(stacked.index, fill_value=0.0)
+        np.testing.assert_allclose(stacked.to_numpy(), reference.to_numpy(dtype=np.float64), rtol=1e-5, atol=1e-6)
+    # Toutes les lignes filtrées sont dans la fenêtre
+    assert window[cube.measure("Count")].sum() == len(selection(games, *key))
+
+
+@pytest.mark.parametrize("key", FILTERS)
+def test_series_matches_groupby(games, cube, key):
+    """Sous-cube annuel et années couvertes = groupby par année"""
+    series = cube.series(*key)
+    years = cube.selected_years(key[0])
+    assert series.shape[1] == len(years)
+    expected = selection(games, *key).groupby("Year")[["Global_Sales"] + REGION_COLUMNS].sum()
+    for measure in ["Global_Sales"] + REGION_COLUMNS:
+        by_year = pd.Series(series[cube.measure(measure)].sum(axis=(1, 2)), index=years)
+        reference = expected[measure].reindex(years, fill_value=0.0)
+        np.testing.assert_allclose(by_year.to_numpy(), reference.to_numpy(dtype=np.float64), rtol=1e-5, atol=1e-6)
+
+
+def test_every_year_window_matches_cube(cube):
+    """Chaque fenêtre [y0, y1] par différence de sommes cumulées = somme directe du cube"""
+    platforms, genres = cube.platforms, cube.genres
+    for y0 in range(cube.year_min, cube.year_max + 1, 3):
+        for y1 in range(y0, cube.year_max + 1, 4):
+            direct = cube.cube[:, y0 - cube.year_min:y1 - cube.year_min + 1].sum(axis=1)
+            np.testing.assert_allclose(cube.window((y0, y1), platforms, genres), direct, rtol=1e-9, atol=1e-6)
+
+
+def test_from_arrays_round_trip(cube):
+    """Cube relu depuis ses tableaux (vue matérialisée) : mêmes fenêtres"""
+    copy = SalesCube.from_arrays(cube.cube, cube.year_min, cube.genres, cube.platforms)
+    for key in FILTERS:
+        np.testing.assert_array_equal(copy.window(*key), cube.window(*key))
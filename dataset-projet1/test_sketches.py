@@ -0,0 +1,92 @@
+"""
+Sketches : distincts HyperLogLog et quantiles KLL comparés aux valeurs exactes, dans leurs bornes d'erreur
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from approximate import CellSketches
+from data_store import ingest_csv
+from sketches import HLL_PRECISION, KLL_RANK_ERROR, KLLSketch, hash_values, hll_interval, hll_registers
+
+CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vgsales.csv")
+# Erreur relative type du HyperLogLog ; on tolère 3 écarts-types
+HLL_ERROR = 1.04 / np.sqrt(1 << HLL_PRECISION)
+
+
+def titles(n, repeat=3):
+    """n titres distincts, chacun répété (les doublons ne doivent pas compter)"""
+    return pd.Series([f"Jeu {i}" for i in range(n)] * repeat)
+
+
+@pytest.mark.parametrize("n", [10, 500, 5_000, 100_000])
+def test_hll_matches_nunique(n):
+    """Cardinalité estimée à moins de 3 écarts-types, valeur exacte dans l'IC 95 %"""
+    values = titles(n)
+    registers = hll_registers(hash_values(values), np.zeros(len(values), dtype=np.intp), 1)[0]
+    estimate = hll_interval(registers)
+    assert abs(estimate["value"] - n) <= 3 * HLL_ERROR * n + 1
+    assert estimate["low"] <= values.nunique() <= estimate["high"]
+
+
+def test_hll_registers_merge_by_max():
+    """Registres de groupes fusionnés par max = registres de l'union"""
+    values = titles(20_000, repeat=1)
+    groups = np.arange(len(values)) % 4
+    per_group = hll_registers(hash_values(values), groups, 4)
+    union = hll_registers(hash_values(values), np.zeros(len(values), dtype=np.intp), 1)[0]
+    np.testing.assert_array_equal(per_group.max(axis=0), union)
+
+
+def rank(values, x):
+    """Rang empirique (0-1) d'une valeur dans l'échantillon"""
+    return np.searchsorted(np.sort(values), x, side="right") / len(values)
+
+
+@pytest.mark.parametrize("q", [0.1, 0.5, 0.9, 0.99])
+def test_kll_rank_error(q):
+    """Rang de la valeur estimée à moins de l'erreur de rang annoncée, sketch fusionné compris"""
+    values = np.random.default_rng(1).lognormal(size=200_000)
+    single = KLLSketch(seed=0).update(values)
+    merged = KLLSketch(seed=0)
+    for i, part in enumerate(np.array_split(values, 7)):
+        merged.merge(KLLSketch(seed=i).update(part))
+    for sketch in (single, merged):
+        assert sketch.n == len(values)
+        assert abs(rank(values, sketch.quantile(q)) - q) <= KLL_RANK_ERROR
+        bounds = sketch.interval(q)
+        assert bounds["low"] <= np.quantile(values, q) <= bounds["high"]
+
+
+def test_kll_is_deterministic():
+    """Même graine, mêmes données : mêmes quantiles"""
+    values = np.random.default_rng(2).exponential(size=50_000)
+    assert KLLSketch(seed=3).update(values).quantile(0.9) == KLLSketch(seed=3).update(values).quantile(0.9)
+
+
+def test_cell_sketches_chunks_match_single_pass():
+    """Sketches repliés par morceaux = sketches construits en une passe (comptes et registres)"""
+    games = ingest_csv(CSV)[0]
+    whole = CellSketches()
+    whole.fold(games)
+    whole.finish()
+    chunked = CellSketches()
+    for start in range(0, len(games), 3_000):
+        chunked.fold(games.iloc[start:start + 3_000])
+    chunked.finish()
+
+    key = ((2000, 2015), ["PS2", "X360", "PC"], ["Action", "Shooter", "Sports"])
+    a, b = whole.select(key), chunked.select(key)
+    assert (sorted(zip(whole.cell_year[a], whole.cell_genre[a], whole.cell_platform[a]))
+            == sorted(zip(chunked.cell_year[b], chunked.cell_genre[b], chunked.cell_platform[b])))
+    assert whole.counts[a].sum() == chunked.counts[b].sum()
+    assert whole.distinct_titles(a) == chunked.distinct_titles(b)
+    assert whole.distinct_publishers(a) == chunked.distinct_publishers(b)
+
+    mask = games["Year"].between(*key[0]) & games["Platform"].isin(key[1]) & games["Genre"].isin(key[2])
+    assert whole.counts[a].sum() == int(mask.sum())
+    estimate = chunked.sales_quantiles(b)["median"]
+    assert estimate["low"] <= np.quantile(games.loc[mask, "Global_Sales"].astype(np.float64), 0.5) <= estimate["high"]
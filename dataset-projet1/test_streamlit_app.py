@@ -0,0 +1,64 @@
+"""
+Pages du dashboard : chaque agrégat lu par une page doit figurer dans ceux qu'elle déclare (prefetch)
+"""
+
+import os
+import sys
+
+import pytest
+
+streamlit_option_menu = pytest.importorskip("streamlit_option_menu")
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from query_engine import AggregateResult  # noqa: E402
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(HERE, "streamlit_app.py")
+PAGES = ["📊 Dashboard", "🎯 Analyse", "📈 Tendances"]
+
+
+@pytest.fixture
+def tracked(monkeypatch):
+    """Agrégats déclarés (prefetch) et agrégats lus directement par le script de l'application"""
+    declared, read = set(), set()
+    getitem, prefetch = AggregateResult.__getitem__, AggregateResult.prefetch
+
+    def tracking_getitem(self, name):
+        if sys._getframe(1).f_code.co_filename == APP:
+            read.add(name)
+        return getitem(self, name)
+
+    def tracking_prefetch(self, names):
+        names = list(names)
+        declared.update(names)
+        return prefetch(self, names)
+
+    monkeypatch.setattr(AggregateResult, "__getitem__", tracking_getitem)
+    monkeypatch.setattr(AggregateResult, "prefetch", tracking_prefetch)
+    monkeypatch.chdir(HERE)
+    return declared, read
+
+
+def assert_declared(app, declared, read):
+    assert not app.exception, [e.message for e in app.exception]
+    assert read, "aucun agrégat lu : suivi inopérant"
+    assert read <= declared, f"agrégats lus sans être déclarés : {sorted(read - declared)}"
+
+
+@pytest.mark.parametrize("exact", [True, False])
+@pytest.mark.parametrize("page", PAGES)
+def test_page_reads_only_declared_aggregates(monkeypatch, tracked, page, exact):
+    """Lectures de la page ⊆ agrégats déclarés, en mode exact et approché, pour chaque regroupement"""
+    declared, read = tracked
+    monkeypatch.setattr(streamlit_option_menu, "option_menu", lambda *args, options, **kwargs: page)
+    app = AppTest.from_file(APP, default_timeout=300)
+    app.run()
+    app.toggle[0].set_value(exact).run()
+    assert_declared(app, declared, read)
+    # Distributions : chaque regroupement lit ses propres agrégats
+    radios = [radio for radio in app.radio if radio.key == "dist_dim"]
+    for option in (radios[0].options if radios else []):
+        declared.clear()
+        read.clear()
+        app.radio(key="dist_dim").set_value(option).run()
+        assert_declared(app, declared, read)
@@ -0,0 +1,101 @@
+import unicodedata
+from collections import defaultdict
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+# Longueur des n-grammes de l'index approché
+NGRAM = 3
+# Part minimale de n-grammes communs (Dice) pour qu'un titre soit proposé en correspondance approchée
+MIN_FUZZY_SCORE = 0.3
+
+
+def normalize(text: str) -> str:
+    """Forme de recherche d'un titre : minuscules, sans accents ni ponctuation, espaces simples"""
+    text = unicodedata.normalize("NFKD", str(text).casefold())
+    text = "".join(c if c.isalnum() else " " for c in text if not unicodedata.combining(c))
+    return " ".join(text.split())
+
+
+def ngrams(text: str, n: int = NGRAM) -> List[str]:
+    """N-grammes distincts d'un texte normalisé, bordé d'espaces (les débuts de mots comptent)"""
+    padded = f" {text} "
+    return sorted({padded[i:i + n] for i in range(max(len(padded) - n + 1, 1))})
+
+
+class TitleIndex:
+    """Index des titres distincts : tableau trié (préfixes) et index inversé de n-grammes (approché).
+
+    Les deux index portent sur les titres distincts ; chaque titre renvoie ensuite aux
+    positions de ses lignes (une par plateforme).
+    """
+
+    def __init__(self, names: pd.Series):
+        codes, titles = pd.factorize(names, sort=True)
+        self.titles = np.array([str(t) for t in titles], dtype=object)
+        normalized = [normalize(t) for t in self.titles]
+
+        # Lignes de chaque titre : positions triées par code, bornes par titre
+        valid = np.flatnonzero(codes >= 0)
+        self.row_order = valid[np.argsort(codes[valid], kind="stable")]
+        self.row_bounds = np.r_[0, np.cumsum(np.bincount(codes[valid], minlength=len(titles)))]
+
+        # Autocomplétion : titres normalisés triés, recherche dichotomique sur le préfixe
+        self.sorted_order = np.argsort(np.array(normalized, dtype=str), kind="stable")
+        self.sorted_keys = np.array(normalized, dtype=str)[self.sorted_order]
+
+        # Index inversé : n-gramme -> titres (listes de postings en tableaux contigus)
+        postings: Dict[str, List[int]] = defaultdict(list)
+        self.gram_counts = np.zeros(len(titles), dtype=np.int32)
+        for title_id, text in enumerate(normalized):
+            grams = ngrams(text)
+            self.gram_counts[title_id] = len(grams)
+            for gram in grams:
+                postings[gram].append(title_id)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def prefix(self, query: str, k: int = 10) -> np.ndarray:
+        """Titres (identifiants) dont la forme normalisée commence par la requête, ordre alphabétique"""
+        key = normalize(query)
+        if not key:
+            return np.zeros(0, dtype=np.intp)
+        start = np.searchsorted(self.sorted_keys, key, side="left")
+        stop = np.searchsorted(self.sorted_keys, key + "\U0010ffff", side="left")
+        return self.sorted_order[start:min(stop, start + k)]
+
+    def fuzzy(self, query: str, k: int = 10) -> Dict[str, np.ndarray]:
+        """Titres partageant le plus de n-grammes avec la requête (score de Dice décroissant)"""
+        grams = ngrams(normalize(query))
+        hits = [self.postings[g] for g in grams if g in self.postings]
+        if not hits:
+            return {"titles": np.zeros(0, dtype=np.intp), "scores": np.zeros(0)}
+        shared = np.bincount(np.concatenate(hits), minlength=len(self.titles))
+        candidates = np.flatnonzero(shared)
+        scores = 2 * shared[candidates] / (len(grams) + self.gram_counts[candidates])
+        keep = scores >= MIN_FUZZY_SCORE
+        candidates, scores = candidates[keep], scores[keep]
+        if len(candidates) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            candidates, scores = candidates[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return {"titles": candidates[order], "scores": scores[order]}
+
+    def search(self, query: str, k: int = 10) -> pd.DataFrame:
+        """Correspondances par préfixe d'abord, complétées par les correspondances approchées"""
+        found = list(self.prefix(query, k))
+        scores = [1.0] * len(found)
+        fuzzy = self.fuzzy(query, k)
+        for title_id, score in zip(fuzzy["titles"], fuzzy["scores"]):
+            if len(found) >= k:
+                break
+            if title_id not in found:
+                found.append(title_id)
+                scores.append(float(score))
+        return pd.DataFrame({"Title_Id": np.array(found, dtype=np.intp),
+                             "Name": self.titles[np.array(found, dtype=np.intp)],
+                             "Score": scores})
+
+    def positions(self, title_id: int) -> np.ndarray:
+        """Positions des lignes d'un titre"""
+        return self.row_order[self.row_bounds[title_id]:self.row_bounds[title_id + 1]]
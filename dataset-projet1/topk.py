@@ -0,0 +1,121 @@
+import threading
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from bitmap_index import sparse_positions
+from parallel import group_sums
+
+
+def top_k_indices(values: np.ndarray, k: int) -> np.ndarray:
+    """Indices des k plus grandes valeurs, triés par valeur décroissante (sélection partielle)"""
+    values = np.asarray(values)
+    n = len(values)
+    if k <= 0 or n == 0:
+        return np.zeros(0, dtype=np.intp)
+    if k >= n:
+        return np.argsort(-values, kind="stable")
+    part = np.argpartition(-values, k - 1)[:k]
+    return part[np.argsort(-values[part], kind="stable")]
+
+
+def top_k_series(series: pd.Series, k: int) -> pd.Series:
+    """Équivalent de series.sort_values(ascending=False).head(k) sans tri complet"""
+    return series.iloc[top_k_indices(series.to_numpy(dtype=np.float64), k)]
+
+
+def top_k_rows(df: pd.DataFrame, positions: np.ndarray, column: str, k: int) -> pd.DataFrame:
+    """Les k lignes (parmi positions) ayant la plus grande valeur de column"""
+    values = df[column].to_numpy(dtype=np.float64)[positions]
+    return df.iloc[positions[top_k_indices(values, k)]]
+
+
+class IncrementalTopK:
+    """Sommes par modalité d'une dimension pour la sélection courante, mises à jour par delta de lignes"""
+
+    def __init__(self, column: pd.Series, values: pd.Series):
+        codes, uniques = pd.factorize(column, sort=True)
+        self.codes = codes
+        self.labels: List[str] = [str(u) for u in uniques]
+        self.name = column.name
+        self.values = values.to_numpy(dtype=np.float64)
+        self.values_name = values.name
+        self.n_rows = len(codes)
+        self._valid = codes >= 0
+        self._sums = np.zeros(len(self.labels))
+        self._counts = np.zeros(len(self.labels), dtype=np.int64)
+        self._bits: Optional[np.ndarray] = None
+        self._selected = 0
+        self._lock = threading.Lock()
+
+    def _fold(self, rows: np.ndarray, sign: int) -> None:
+        """Ajoute (sign=+1) ou retire (sign=-1) des lignes des sommes par modalité"""
+        rows = rows[self._valid[rows]]
+        sums, counts = group_sums(self.codes[rows], [self.values[rows], None], len(self.labels))
+        self._sums += sign * sums
+        self._counts += sign * counts.astype(np.int64)
+
+    def updated(self, positions: np.ndarray, values: np.ndarray, appended: pd.Series,
+                appended_values: np.ndarray) -> "IncrementalTopK":
+        """Nouvelle instance : valeurs remplacées aux positions données, puis lignes ajoutées en fin.
+
+        Les nouvelles modalités prennent les codes suivants ; la sélection mémorisée est oubliée
+        (le prochain top() recompte la sélection).
+        """
+        new = object.__new__(IncrementalTopK)
+        new.name, new.values_name = self.name, self.values_name
+        new.labels = list(self.labels)
+        positions_of = {label: i for i, label in enumerate(new.labels)}
+        appended_codes = np.full(len(appended), -1, dtype=self.codes.dtype)
+        for i, label in enumerate(appended):
+            if pd.isna(label):
+                continue
+            label = str(label)
+            if label not in positions_of:
+                positions_of[label] = len(new.labels)
+                new.labels.append(label)
+            appended_codes[i] = positions_of[label]
+        new.codes = np.concatenate([self.codes, appended_codes])
+        new.values = np.concatenate([self.values, np.asarray(appended_values, dtype=np.float64)])
+        new.values[positions] = values
+        new.n_rows = len(new.codes)
+        new._valid = new.codes >= 0
+        new._sums = np.zeros(len(new.labels))
+        new._counts = np.zeros(len(new.labels), dtype=np.int64)
+        new._bits = None
+        new._selected = 0
+        new._lock = threading.Lock()
+        return new
+
+    def update(self, bits: np.ndarray) -> None:
+        """Passe à une nouvelle sélection (bitmap packé) en ne traitant que les lignes ajoutées/retirées.
+
+        Le delta se lit sur les mots packés (XOR puis mots non nuls seulement) : son coût suit
+        le nombre de lignes qui changent, pas la taille de la table.
+        """
+        if self._bits is not None:
+            changed = sparse_positions(bits ^ self._bits, self.n_rows)
+            if len(changed) < self._selected:
+                now_set = (bits[changed >> 3] >> (7 - (changed & 7))) & 1 == 1
+                self._fold(changed[now_set], +1)
+                self._fold(changed[~now_set], -1)
+                self._selected += 2 * int(now_set.sum()) - len(changed)
+                self._bits = bits.copy()
+                return
+        # Premier appel ou delta plus gros que la sélection : recalcul complet (évite aussi la dérive flottante)
+        self._sums[:] = 0
+        self._counts[:] = 0
+        rows = np.flatnonzero(np.unpackbits(bits, count=self.n_rows))
+        self._fold(rows, +1)
+        self._selected = len(rows)
+        self._bits = bits.copy()
+
+    def top(self, bits: np.ndarray, k: int) -> pd.Series:
+        """Top k des modalités pour la sélection donnée, triées par somme décroissante"""
+        with self._lock:
+            self.update(bits)
+            present = np.flatnonzero(self._counts > 0)
+            best = present[top_k_indices(self._sums[present], k)]
+            return pd.Series(self._sums[best], index=pd.Index([self.labels[i] for i in best], name=self.name),
+                             name=self.values_name)